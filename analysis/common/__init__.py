@@ -0,0 +1,8 @@
+"""
+Shared helpers for the analysis scripts.
+
+Scripts living in the sibling folders (percent-results, dotplots, ...) put the
+`analysis/` folder on `sys.path` and import from here, e.g.
+
+    from common.profile_index import load_row_index
+"""
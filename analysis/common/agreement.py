@@ -0,0 +1,105 @@
+"""
+Cross-model agreement on the (model x occupation x category) tensor of
+percentage-point differences from BLS.
+
+Everything is NumPy broadcasting over that tensor (NaN = the model has no file
+for the occupation), so adding a model or an occupation is just a bigger
+array:
+
+    diff, models, occupations = diff_tensor(frames)          # (M, O, 5)
+    dist = pairwise_distances(diff)                          # (M, M, O)
+    overall = aggregate_distances(dist)                      # (M, M)
+    outlier_scores(diff)                                     # per model
+
+- distance      Euclidean norm (pp) of the difference between two models' bias
+                vectors (women, white, black, asian, hispanic) in one occupation;
+                aggregated as the root mean square over shared occupations
+- correlation   Pearson correlation of two models' biases over every shared
+                (occupation, category)
+- outlier score mean distance of a model's bias vector from the consensus of
+                the other models (their mean), per occupation, then averaged
+
+Occupations are clustered hierarchically (Ward) by their bias vectors with
+the models side by side; needs SciPy.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+except ImportError:  # optional: only occupation_clusters needs SciPy
+    linkage = None
+
+DIFF_COLS = ["diff_p_women", "diff_p_white", "diff_p_black", "diff_p_asian", "diff_p_hispanic"]
+N_OCCUPATION_CLUSTERS = 5
+
+
+def diff_tensor(frames: dict, cols=DIFF_COLS):
+    """{model: results_vs_BLS frame} -> ((models, occupations, categories) array, models, occupations)."""
+    models = list(frames)
+    long = pd.concat([df.assign(model=m) for m, df in frames.items()], ignore_index=True)
+    occupations = sorted(long["occupation"].unique())
+    tensor = np.full((len(models), len(occupations), len(cols)), np.nan)
+    m = long["model"].map({name: i for i, name in enumerate(models)}).to_numpy()
+    o = long["occupation"].map({name: i for i, name in enumerate(occupations)}).to_numpy()
+    tensor[m, o] = long[list(cols)].to_numpy(dtype=float)
+    return tensor, models, occupations
+
+
+def pairwise_distances(diff) -> np.ndarray:
+    """(M, M, O) Euclidean distance between every pair of models per occupation."""
+    return np.sqrt(((diff[:, None] - diff[None]) ** 2).sum(axis=-1))
+
+
+def aggregate_distances(dist) -> np.ndarray:
+    """(M, M) root mean square of `pairwise_distances` over the occupations both models have."""
+    with np.errstate(invalid="ignore"):
+        return np.sqrt(np.nanmean(dist ** 2, axis=-1))
+
+
+def pairwise_correlations(diff) -> np.ndarray:
+    """(M, M) Pearson correlation over the (occupation, category) cells both models have."""
+    x = diff.reshape(len(diff), -1)
+    both = ~np.isnan(x[:, None]) & ~np.isnan(x[None])                   # (M, M, cells)
+    a = np.where(both, x[:, None], 0.0)
+    b = np.where(both, x[None], 0.0)
+    n = both.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = a - np.where(both, (a.sum(axis=-1) / n)[..., None], 0.0)
+        b = b - np.where(both, (b.sum(axis=-1) / n)[..., None], 0.0)
+        return (a * b).sum(axis=-1) / np.sqrt((a ** 2).sum(axis=-1) * (b ** 2).sum(axis=-1))
+
+
+def consensus_distances(diff) -> np.ndarray:
+    """(M, O) distance of each model from the mean of the other models with that occupation."""
+    present = ~np.isnan(diff).any(axis=-1)                              # (M, O)
+    total = np.where(present[..., None], diff, 0.0).sum(axis=0)         # (O, 5)
+    count = present.sum(axis=0)                                         # (O,)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        others = (total[None] - np.nan_to_num(diff)) / (count[None] - present)[..., None]
+    dist = np.sqrt(((diff - others) ** 2).sum(axis=-1))
+    return np.where(present & (count[None] > 1), dist, np.nan)
+
+
+def outlier_scores(diff) -> dict:
+    """Mean consensus distance per model, its z-score across models, and each model's worst occupation index."""
+    dist = consensus_distances(diff)
+    score = np.nanmean(dist, axis=1)
+    z = (score - score.mean()) / score.std() if score.std() > 0 else np.zeros_like(score)
+    worst = np.where(np.isnan(dist).all(axis=1), -1, np.nanargmax(np.nan_to_num(dist, nan=-np.inf), axis=1))
+    return {"score": score, "z": z, "worst": worst, "occupations": (~np.isnan(dist)).sum(axis=1)}
+
+
+def occupation_clusters(diff, n_clusters: int = N_OCCUPATION_CLUSTERS):
+    """
+    (cluster label per occupation, dendrogram leaf order) from Ward linkage on
+    each occupation's bias vectors of all models (a model missing an
+    occupation is filled with the other models' mean for it).
+    """
+    if linkage is None:
+        raise ImportError("Clustering occupations needs SciPy (pip install scipy).")
+    with np.errstate(invalid="ignore"):
+        fill = np.nanmean(diff, axis=0, keepdims=True)
+    x = np.where(np.isnan(diff), fill, diff).transpose(1, 0, 2).reshape(diff.shape[1], -1)
+    tree = linkage(x, method="ward")
+    return fcluster(tree, t=min(n_clusters, len(x)), criterion="maxclust"), leaves_list(tree)
@@ -0,0 +1,203 @@
+"""
+Persona "archetypes": k-means clusters of the biographies of one occupation,
+pooled over models so the clusters are comparable between them.
+
+Each biography has the profile's own name tokens removed (otherwise clusters
+follow the names), and only the distinct texts of a chunk are vectorized: a
+`HashingVectorizer` (no vocabulary in memory) turns them into sparse
+l2-normalized uni/bigram vectors, weighted by how many profiles use them.
+Two streaming passes over the files, each holding one memory-bounded chunk
+per model at a time:
+
+1. fit     chunks of all models are interleaved, shuffled and fed to
+           `MiniBatchKMeans.partial_fit` in BATCH_SIZE batches (FIT_PASSES times)
+2. assign  every profile gets its text's cluster; counts are kept per
+           (model, cluster, female?, race mask) for the demographic
+           composition, plus the few texts nearest each centroid for the
+           cluster's examples and top terms
+
+Needs scikit-learn.
+"""
+import re
+from collections import Counter
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .demographics import N_MASKS, female_flags, race_masks
+from .profile_reader import MODELS, PROFILES_DIR, profile_files
+
+try:
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+except ImportError:  # optional: only this module needs scikit-learn
+    MiniBatchKMeans = HashingVectorizer = None
+    ENGLISH_STOP_WORDS = frozenset()
+
+N_CLUSTERS = 8
+N_FEATURES = 1 << 18
+BATCH_SIZE = 2048
+FIT_PASSES = 3
+SEED = 0
+N_EXAMPLES = 3        # representative biographies kept per cluster
+N_TERM_DOCS = 200     # texts nearest the centroid used for a cluster's top terms
+N_TERMS = 8
+TOKEN_RE = re.compile(r"[a-z][a-z']+")
+
+
+def strip_names(text: pd.Series, names: pd.Series) -> pd.Series:
+    """Lowercased text without the tokens of the row's own name."""
+    out = []
+    for t, n in zip(text.fillna("").astype(str), names.fillna("").astype(str)):
+        own = set(TOKEN_RE.findall(n.lower()))
+        out.append(" ".join(w for w in TOKEN_RE.findall(t.lower()) if w not in own))
+    return pd.Series(out, index=text.index)
+
+
+def _vectorizer():
+    return HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, stop_words="english",
+                             ngram_range=(1, 2), norm="l2", token_pattern=r"[a-z][a-z']+")
+
+
+def doc_shares(texts, weights) -> pd.Series:
+    """Weighted share of texts containing each (non stop-)word."""
+    counts = Counter()
+    for t, w in zip(texts, weights):
+        for word in set(TOKEN_RE.findall(t)) - ENGLISH_STOP_WORDS:
+            counts[word] += w
+    return pd.Series(counts, dtype=float) / max(float(np.sum(weights)), 1.0)
+
+
+def top_terms(texts, weights, background: pd.Series, n: int = N_TERMS):
+    """Words most over-represented in `texts` relative to the whole occupation."""
+    lift = doc_shares(texts, weights).sub(background, fill_value=0)
+    return lift.sort_values(ascending=False, kind="stable").index[:n].tolist()
+
+
+class NearestTexts:
+    """
+    The `limit` distinct texts nearest a centroid, with the profiles using each
+    and the first raw biography seen for it. A text kept at the end was never
+    dropped (only nearer texts push one out), so its count is complete.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.items = {}                        # text -> [distance, profiles, raw]
+
+    def offer(self, texts, distances, weights, raws):
+        for i in np.argsort(distances, kind="stable")[:self.limit]:
+            item = self.items.get(texts[i])
+            if item is None:
+                self.items[texts[i]] = [distances[i], weights[i], raws[i]]
+            else:
+                item[1] += weights[i]
+        if len(self.items) > self.limit:
+            nearest = sorted(self.items.items(), key=lambda kv: kv[1][0])[:self.limit]
+            self.items = dict(nearest)
+
+    def nearest(self):
+        """[(text, profiles, raw)] nearest first."""
+        return [(t, w, raw) for t, (_, w, raw) in sorted(self.items.items(), key=lambda kv: kv[1][0])]
+
+
+def _chunk_texts(df):
+    """Distinct name-stripped biographies of a chunk: (texts, row -> text index, profiles per text, raw per text)."""
+    codes, texts = pd.factorize(strip_names(df["biography"], df["name"]))
+    first = np.unique(codes, return_index=True)[1]
+    raws = df["biography"].fillna("").astype(str).to_numpy()[first]
+    return list(texts), codes, np.bincount(codes, minlength=len(texts)).astype(float), raws
+
+
+def _round_robin(files, memory_mb: float):
+    """Chunks of every file, one per model in turn, each sized to memory_mb / models."""
+    iters = [iter_profile_chunks(path, usecols=["name", "gender", "ethnicity", "biography"],
+                                 memory_mb=memory_mb / max(len(files), 1)) for _, path in files]
+    for chunks in zip_longest(*iters):
+        yield [(mi, df) for mi, df in enumerate(chunks) if df is not None]
+
+
+def fit_clusters(files, n_clusters: int = N_CLUSTERS, memory_mb: float = MEMORY_LIMIT_MB, seed: int = SEED,
+                 passes: int = FIT_PASSES):
+    """MiniBatchKMeans fitted with `partial_fit` over the files' chunks; None if there are no texts."""
+    vectorizer, rng = _vectorizer(), np.random.default_rng(seed)
+    km, pending = None, []
+    for _ in range(passes):
+        for chunks in _round_robin(files, memory_mb):
+            texts, weights = [], []
+            for _, df in chunks:
+                t, _, w, _ = _chunk_texts(df)
+                texts += t
+                weights.append(w)
+            order = rng.permutation(len(texts))
+            weights = np.concatenate(weights)[order]
+            for s in range(0, len(texts), BATCH_SIZE):
+                batch = order[s:s + BATCH_SIZE]
+                pending.append((vectorizer.transform([texts[i] for i in batch]), weights[s:s + BATCH_SIZE]))
+                if km is None and sum(b.shape[0] for b, _ in pending) < n_clusters:
+                    continue           # the first batch must hold at least n_clusters texts
+                if km is None:
+                    km = MiniBatchKMeans(n_clusters=n_clusters, batch_size=BATCH_SIZE, random_state=seed, n_init=3)
+                for b, w in pending:
+                    km.partial_fit(b, sample_weight=w)
+                pending = []
+    if km is None and pending:         # fewer distinct texts than clusters
+        from scipy.sparse import vstack
+        x = vstack([b for b, _ in pending])
+        km = MiniBatchKMeans(n_clusters=x.shape[0], batch_size=BATCH_SIZE, random_state=seed, n_init=3)
+        km.partial_fit(x, sample_weight=np.concatenate([w for _, w in pending]))
+    return km
+
+
+def cluster_occupation(occupation: str, models=MODELS, profiles_dir=PROFILES_DIR, n_clusters: int = N_CLUSTERS,
+                       memory_mb: float = MEMORY_LIMIT_MB, seed: int = SEED) -> dict:
+    """
+    Cluster one occupation's biographies across `models`. Returns the models,
+    per-row cluster ids per model, counts (models, clusters, 2, 16), examples
+    and top terms per cluster.
+    """
+    if MiniBatchKMeans is None:
+        raise ImportError("Biography clustering needs scikit-learn (pip install scikit-learn).")
+    files = [(m, dict(profile_files(m, profiles_dir)).get(occupation)) for m in models]
+    files = [(m, p) for m, p in files if p is not None]
+
+    km = fit_clusters(files, n_clusters, memory_mb, seed)
+    k = km.n_clusters if km is not None else 0
+    vectorizer = _vectorizer()
+    counts = np.zeros((len(files), k, 2, N_MASKS), dtype=np.int64)
+    row_labels = {model: [] for model, _ in files}
+    background, total = Counter(), 0.0
+    term_docs = [NearestTexts(N_TERM_DOCS) for _ in range(k)]
+    examples = [NearestTexts(N_EXAMPLES) for _ in range(k)]
+    for chunks in _round_robin(files, memory_mb):
+        for mi, df in chunks:
+            texts, codes, weights, raws = _chunk_texts(df)
+            x = vectorizer.transform(texts)
+            labels = km.predict(x)
+            distance = km.transform(x)[np.arange(len(texts)), labels]
+            np.add.at(counts, (mi, labels[codes], female_flags(df["gender"]).astype(np.intp),
+                               race_masks(df["ethnicity"])), 1)
+            row_labels[files[mi][0]].append(labels[codes].astype(np.int16))
+            for t, w in zip(texts, weights):
+                for word in set(TOKEN_RE.findall(t)) - ENGLISH_STOP_WORDS:
+                    background[word] += w
+            total += weights.sum()
+            for c in np.unique(labels):
+                members = np.flatnonzero(labels == c)
+                args = ([texts[i] for i in members], distance[members], weights[members], raws[members])
+                term_docs[c].offer(*args)
+                examples[c].offer(*args)
+
+    background = pd.Series(background, dtype=float) / max(total, 1.0)
+    cluster_examples, cluster_terms = {}, {}
+    for c in range(k):
+        cluster_examples[c] = [raw for _, _, raw in examples[c].nearest()]
+        nearest = term_docs[c].nearest()
+        cluster_terms[c] = top_terms([t for t, _, _ in nearest], [w for _, w, _ in nearest], background)
+
+    row_labels = {model: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+                  for model, parts in row_labels.items()}
+    return {"occupation": occupation, "models": [m for m, _ in files], "row_labels": row_labels,
+            "counts": counts, "examples": cluster_examples, "terms": cluster_terms}
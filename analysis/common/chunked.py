@@ -0,0 +1,195 @@
+"""
+Bounded-memory chunked execution for the analysis stages.
+
+Every stage that used to load a whole CSV (or concatenate several) now feeds
+rows through `iter_profile_chunks` / `iter_csv_chunks` in fixed-size batches and
+keeps only small mergeable partial aggregates:
+
+- `ValueCounts`   running value counts (gender, ethnicity labels, names, ...)
+- `Moments`       count / mean / variance / min / max (Chan et al. merge)
+- `GroupedMean`   per-key means across many frames (sum + count per key)
+- `GroupedFirst`  per-key first non-null value across many frames
+
+All aggregates support `update(...)`, `merge(other)` and `result()`, so partial
+results from different chunks, files or worker processes combine exactly.
+
+The memory ceiling is `MEMORY_LIMIT_MB` (env: ANALYSIS_MEMORY_MB). A profile
+file whose estimated in-memory size fits under the ceiling is read in one go
+(through the Parquet cache); anything bigger is streamed in chunks sized to the
+ceiling, so the peak footprint does not grow with the number of samples.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .profile_index import load_row_index
+from .profile_reader import read_profiles
+
+MEMORY_LIMIT_MB = float(os.getenv("ANALYSIS_MEMORY_MB", "256"))
+
+# Parsed pandas frames take a few times their raw CSV size (Python/Arrow
+# string overhead); used to turn the memory ceiling into a row count.
+PANDAS_OVERHEAD = 4.0
+MIN_CHUNK_ROWS = 1_000
+
+
+# ----------------------------
+# Chunk sizing / iteration
+# ----------------------------
+def rows_per_chunk(path, memory_mb: float = MEMORY_LIMIT_MB) -> int:
+    """Number of profile rows of `path` that fit in `memory_mb` once parsed."""
+    index = load_row_index(path)
+    n_rows = max(len(index), 1)
+    bytes_per_row = os.path.getsize(path) / n_rows * PANDAS_OVERHEAD
+    return max(MIN_CHUNK_ROWS, int(memory_mb * 2**20 // max(bytes_per_row, 1.0)))
+
+
+def iter_profile_chunks(path, usecols=None, memory_mb: float = MEMORY_LIMIT_MB, **read_kwargs):
+    """
+    Yield DataFrames covering every row of one profile CSV, each small enough
+    for the memory ceiling. Small files come back as a single frame.
+    """
+    chunk_rows = rows_per_chunk(path, memory_mb)
+    if len(load_row_index(path)) <= chunk_rows:
+        yield read_profiles(path, usecols=usecols, **read_kwargs)
+        return
+    yield from read_profiles(path, usecols=usecols, chunksize=chunk_rows, **read_kwargs)
+
+
+def iter_csv_chunks(path, memory_mb: float = MEMORY_LIMIT_MB, **read_csv_kwargs):
+    """
+    Chunked `pd.read_csv` for derived (non-profile) CSVs. These have no quoted
+    newlines, so the row size is estimated from the head of the file.
+    """
+    with open(path, "rb") as f:
+        head = f.read(1 << 16)
+    bytes_per_row = len(head) / max(head.count(b"\n"), 1) * PANDAS_OVERHEAD
+    chunk_rows = max(MIN_CHUNK_ROWS, int(memory_mb * 2**20 // max(bytes_per_row, 1.0)))
+    with pd.read_csv(path, chunksize=chunk_rows, **read_csv_kwargs) as reader:
+        yield from reader
+
+
+# ----------------------------
+# Mergeable partial aggregates
+# ----------------------------
+class ValueCounts:
+    """Running `value_counts` (NaN excluded, like pandas' default)."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64")
+
+    def update(self, values):
+        vc = pd.Series(values).value_counts()
+        vc.index = vc.index.astype(object)
+        self.counts = self.counts.add(vc, fill_value=0).astype("int64")
+        return self
+
+    def merge(self, other: "ValueCounts"):
+        self.counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+        return self
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def result(self, normalize: bool = False) -> pd.Series:
+        out = self.counts.sort_values(ascending=False, kind="stable")
+        if normalize:
+            out = out / out.sum() if out.sum() else out.astype(float)
+        return out
+
+
+class Moments:
+    """Count, mean, variance, min and max of a numeric stream."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        x = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy(dtype=float)
+        if len(x) == 0:
+            return self
+        other = Moments()
+        other.n, other.mean = len(x), float(x.mean())
+        other.m2 = float(((x - other.mean) ** 2).sum())
+        other.min, other.max = float(x.min()), float(x.max())
+        return self.merge(other)
+
+    def merge(self, other: "Moments"):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta**2 * self.n * other.n / n
+        self.n = n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    def result(self) -> dict:
+        var = self.m2 / (self.n - 1) if self.n > 1 else np.nan
+        return {
+            "n": self.n,
+            "mean": self.mean if self.n else np.nan,
+            "std": float(np.sqrt(var)) if self.n > 1 else np.nan,
+            "min": self.min if self.n else np.nan,
+            "max": self.max if self.n else np.nan,
+        }
+
+
+class GroupedMean:
+    """Per-key column means over any number of frames (NaNs skipped)."""
+
+    def __init__(self, key: str, cols):
+        self.key = key
+        self.cols = list(cols)
+        self.sums = None
+        self.counts = None
+
+    def update(self, df: pd.DataFrame):
+        g = df.groupby(self.key)[self.cols]
+        return self._add(g.sum(), g.count())
+
+    def _add(self, sums, counts):
+        if self.sums is None:
+            self.sums, self.counts = sums, counts
+        else:
+            self.sums = self.sums.add(sums, fill_value=0)
+            self.counts = self.counts.add(counts, fill_value=0)
+        return self
+
+    def merge(self, other: "GroupedMean"):
+        return self if other.sums is None else self._add(other.sums, other.counts)
+
+    def result(self) -> pd.DataFrame:
+        if self.sums is None:
+            return pd.DataFrame(columns=self.cols)
+        means = self.sums / self.counts.where(self.counts > 0)
+        return means.sort_index()
+
+
+class GroupedFirst:
+    """Per-key first non-null value of each column, in the order rows arrive."""
+
+    def __init__(self, key: str, cols):
+        self.key = key
+        self.cols = list(cols)
+        self.first = None
+
+    def update(self, df: pd.DataFrame):
+        return self._combine(df.groupby(self.key, sort=False)[self.cols].first())
+
+    def _combine(self, first):
+        self.first = first if self.first is None else self.first.combine_first(first)
+        return self
+
+    def merge(self, other: "GroupedFirst"):
+        return self if other.first is None else self._combine(other.first)
+
+    def result(self) -> pd.DataFrame:
+        return (pd.DataFrame(columns=self.cols) if self.first is None else self.first.sort_index())
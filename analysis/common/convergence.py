@@ -0,0 +1,70 @@
+"""
+How many profiles a (model, occupation) cell needed before its percentages
+settled.
+
+Rows are taken in file order (= generation order). Each row's packed
+(female?, race mask) code indexes CATEGORY_MATRIX, so the running count of
+every category after n rows is one `np.cumsum` over the file:
+
+    k[n, c] = profiles among the first n that count toward category c
+    p[n, c] = 100 * k / n,  half[n, c] = Wilson 95% half-width (pp)
+
+Two "enough" points per category:
+
+- stable_n  smallest n after which the running estimate never leaves
+            +-TOLERANCE_PP of the full-file estimate
+- ci_n      smallest n after which the Wilson half-width stays <= TOLERANCE_PP
+            (does not depend on how many rows were generated past it)
+"""
+import numpy as np
+
+from .chunked import MEMORY_LIMIT_MB
+from .crosstab import file_codes
+from .intervals import ALPHA, CATEGORIES, CATEGORY_MATRIX, wilson_interval
+
+TOLERANCE_PP = 1.0
+# n at which running estimates are kept for the curves
+CHECKPOINTS = np.unique(np.concatenate([np.arange(50, 1000, 50), np.arange(1000, 100_001, 250)]))
+
+
+def running_estimates(codes, alpha: float = ALPHA):
+    """(n, p, half): n = 1..N and per-category running % and Wilson half-width, shape (N, categories)."""
+    k = np.cumsum(CATEGORY_MATRIX[np.asarray(codes, dtype=np.intp)], axis=0)
+    n = np.arange(1, len(k) + 1)
+    lo, hi = wilson_interval(k, n[:, None], alpha)
+    return n, 100 * k / n[:, None], 50 * (hi - lo)
+
+
+def settle_n(outside) -> np.ndarray:
+    """
+    Per column of a (N, categories) boolean "outside tolerance" array: the n
+    (1-based) from which every later row is inside; N + 1 if even the last is outside.
+    """
+    outside = np.asarray(outside, dtype=bool)
+    last = len(outside) - 1 - np.argmax(outside[::-1], axis=0)    # last outside row per column
+    return np.where(outside.any(axis=0), last + 2, 1)
+
+
+def convergence(codes, tolerance: float = TOLERANCE_PP, alpha: float = ALPHA, checkpoints=CHECKPOINTS) -> dict:
+    """stable_n / ci_n per category plus the curve at `checkpoints` (and at the last row)."""
+    n, p, half = running_estimates(codes, alpha)
+    if not len(n):
+        empty = np.zeros(len(CATEGORIES), dtype=np.int64)
+        return {"n": 0, "final": np.full(len(CATEGORIES), np.nan), "stable_n": empty, "ci_n": empty,
+                "curve_n": np.zeros(0, dtype=np.int64), "curve_p": np.zeros((0, len(CATEGORIES))),
+                "curve_half": np.zeros((0, len(CATEGORIES)))}
+    keep = np.unique(np.append(checkpoints[checkpoints < len(n)], len(n))) - 1
+    return {
+        "n": len(n),
+        "final": p[-1],
+        "stable_n": settle_n(np.abs(p - p[-1]) > tolerance),
+        "ci_n": settle_n(half > tolerance),
+        "curve_n": n[keep],
+        "curve_p": p[keep],
+        "curve_half": half[keep],
+    }
+
+
+def file_convergence(path, tolerance: float = TOLERANCE_PP, alpha: float = ALPHA,
+                     memory_mb: float = MEMORY_LIMIT_MB) -> dict:
+    return convergence(file_codes(path, memory_mb), tolerance, alpha)
@@ -0,0 +1,154 @@
+"""
+Intersectional gender x race cross-tabs for every model and occupation at once.
+
+Each profile is packed into one small integer
+
+    code = female * 16 + race_mask                    (0..31, per row, uint8)
+
+by the file workers (`demographics.cell_codes`), and the driver offsets every file's codes by its
+(model, occupation) cell, so a single `np.bincount` over all rows yields the
+full (models, occupations, 2, 16) tensor. Conditional rates are then matrix
+products with the (16, 4) mask -> race membership matrix, never a loop over
+files or groups:
+
+    models, occupations, joint = crosstab_tensor(MODELS)
+    rates = conditional_rates(joint)                  # arrays (models, occ, 4)
+    rates["pct_female"][m, o, RACES.index("black")]   # % women among Black profiles
+
+Races are multi-label as everywhere else: a "White, Hispanic" profile counts
+toward both the white and the hispanic rates.
+
+The per-file codes (in row order) are all several analyses need, so they can
+be scanned once and shared: `save_codes` / `load_codes` keep them in one .npz,
+and `codes_tensor` builds the tensor from them without touching the CSVs.
+"""
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .demographics import MASK_POPCOUNT, N_CELLS, N_MASKS, RACE_MEMBERSHIP, RACES, cell_codes, mask_label
+from .parallel import map_profile_files, raise_failures
+from .profile_reader import DEMOGRAPHIC_COLS, MODELS, PROFILES_DIR
+
+GENDERS = ["men", "women"]          # index = female flag ("men" = every non-female label)
+
+
+def file_codes(path, memory_mb: float = MEMORY_LIMIT_MB) -> np.ndarray:
+    """Packed (female, race mask) code of every row of one profile CSV."""
+    parts = [cell_codes(df) for df in iter_profile_chunks(path, usecols=DEMOGRAPHIC_COLS, memory_mb=memory_mb)]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+
+def crosstab(cells, codes, n_cells: int) -> np.ndarray:
+    """(n_cells, 2, 16) counts from a cell index and a packed code per row."""
+    packed = np.asarray(cells, dtype=np.intp) * N_CELLS + codes
+    return np.bincount(packed, minlength=n_cells * N_CELLS).reshape(n_cells, 2, N_MASKS)
+
+
+def profile_codes(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB,
+                  workers=None) -> list:
+    """[((model, occupation), codes)] in `profile_files` order, codes in file row order."""
+    results = raise_failures(map_profile_files(file_codes, models, profiles_dir, workers=workers,
+                                               memory_mb=memory_mb))
+    return [(r.key, r.value) for r in results]
+
+
+def save_codes(path, codes):
+    """Write `profile_codes` output to one .npz (keys, row offsets and all codes concatenated)."""
+    keys = np.array([list(key) for key, _ in codes], dtype=str).reshape(-1, 2)
+    offsets = np.cumsum([0] + [len(c) for _, c in codes])
+    values = np.concatenate([c for _, c in codes]) if codes else np.zeros(0, dtype=np.uint8)
+    np.savez(path, keys=keys, offsets=offsets, codes=values)
+
+
+def load_codes(path) -> list:
+    """Inverse of `save_codes`."""
+    with np.load(path) as data:
+        keys, offsets, values = data["keys"], data["offsets"], data["codes"]
+    return [((str(m), str(o)), values[offsets[i]:offsets[i + 1]]) for i, (m, o) in enumerate(keys)]
+
+
+def codes_tensor(codes, models=MODELS):
+    """
+    (models, occupations, joint) with joint of shape (models, occupations, 2, 16)
+    from `profile_codes` output; occupations a model has no file for are all-zero.
+    """
+    models = list(models)
+    m_index = {m: i for i, m in enumerate(models)}
+    codes = [(key, c) for key, c in codes if key[0] in m_index]
+    occupations = sorted({key[1] for key, _ in codes})
+    o_index = {o: i for i, o in enumerate(occupations)}
+    cells = np.concatenate([np.full(len(c), m_index[m] * len(occupations) + o_index[o]) for (m, o), c in codes]
+                           + [np.zeros(0, dtype=np.intp)])
+    values = np.concatenate([c for _, c in codes] + [np.zeros(0, dtype=np.uint8)])
+    joint = crosstab(cells, values, len(models) * len(occupations))
+    return models, occupations, joint.reshape(len(models), len(occupations), 2, N_MASKS)
+
+
+def crosstab_tensor(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB, workers=None):
+    """`codes_tensor` of a fresh scan of the profile CSVs."""
+    return codes_tensor(profile_codes(models, profiles_dir, memory_mb, workers), models)
+
+
+def conditional_rates(joint) -> dict:
+    """
+    Per-race conditional shares (in %, NaN when the denominator is 0), each of
+    shape joint.shape[:-2] + (4,):
+
+        n_race          profiles naming the race
+        pct_female      % women among them
+        pct_of_women    % of women naming the race
+        pct_of_men      % of men naming the race
+        pct_mixed       % of them that name 2+ races
+    """
+    joint = np.asarray(joint, dtype=np.int64)
+    by_gender = joint @ RACE_MEMBERSHIP                             # (..., 2, 4)
+    n_race = by_gender.sum(axis=-2)
+    n_gender = joint.sum(axis=-1)                                   # (..., 2)
+    mixed = (joint * (MASK_POPCOUNT >= 2)).sum(axis=-2) @ RACE_MEMBERSHIP
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "n_race": n_race,
+            "pct_female": 100 * by_gender[..., 1, :] / n_race,
+            "pct_of_women": 100 * by_gender[..., 1, :] / n_gender[..., 1:2],
+            "pct_of_men": 100 * by_gender[..., 0, :] / n_gender[..., 0:1],
+            "pct_mixed": 100 * mixed / n_race,
+        }
+
+
+def crosstab_table(models, occupations, joint, keep_empty: bool = False) -> pd.DataFrame:
+    """Long format: one row per (model, occupation, gender, race combination)."""
+    m, o, g, k = np.meshgrid(np.arange(len(models)), np.arange(len(occupations)), np.arange(2),
+                             np.arange(N_MASKS), indexing="ij")
+    n_cell = joint.sum(axis=(2, 3), keepdims=True)
+    n_gender = joint.sum(axis=3, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100 * joint / n_cell
+        pct_gender = 100 * joint / n_gender
+    df = pd.DataFrame({
+        "model": np.asarray(models)[m.ravel()],
+        "occupation": np.asarray(occupations)[o.ravel()],
+        "gender": np.asarray(GENDERS)[g.ravel()],
+        "races": np.asarray([mask_label(i) for i in range(N_MASKS)])[k.ravel()],
+        "n_races": MASK_POPCOUNT[k.ravel()],
+        "count": joint.ravel(),
+        "pct": pct.ravel(),
+        "pct_within_gender": pct_gender.ravel(),
+    })
+    present = np.broadcast_to(n_cell > 0, joint.shape).ravel()
+    return df[present if keep_empty else present & (df["count"].to_numpy() > 0)].reset_index(drop=True)
+
+
+def rates_table(models, occupations, joint) -> pd.DataFrame:
+    """Long format of `conditional_rates`: one row per (model, occupation, race)."""
+    rates = conditional_rates(joint)
+    m, o, r = np.meshgrid(np.arange(len(models)), np.arange(len(occupations)), np.arange(len(RACES)),
+                          indexing="ij")
+    df = pd.DataFrame({
+        "model": np.asarray(models)[m.ravel()],
+        "occupation": np.asarray(occupations)[o.ravel()],
+        "race": np.asarray(RACES)[r.ravel()],
+        **{name: v.ravel() for name, v in rates.items()},
+    })
+    present = np.broadcast_to(joint.sum(axis=(2, 3))[..., None] > 0, rates["n_race"].shape).ravel()
+    return df[present].reset_index(drop=True)
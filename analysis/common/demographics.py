@@ -0,0 +1,234 @@
+"""
+Vectorized gender / race counting for the profile CSVs.
+
+The ethnicity column only holds a few hundred distinct labels ("White",
+"White, Hispanic", "Asian/White", "HispanicWhite", ...), so each distinct
+label is decoded once into a 4-bit race mask (white=1, black=2, asian=4,
+hispanic=8). Every row then maps to its mask through the column's
+categorical codes, and a 16-bin `np.bincount` of those masks is enough to
+recover any per-race count:
+
+    masks = race_masks(df["ethnicity"])       # uint8 per row
+    hist = mask_histogram(masks)              # 16 counts
+    race_counts_from_histogram(hist)          # {"white": ..., "black": ...}
+
+A row counts toward every race named in its label (the multi-label convention
+of results_across_40_careers).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .parallel import group_by_model, map_profile_files, raise_failures
+from .profile_reader import DEMOGRAPHIC_COLS, MODELS, PROFILES_DIR
+
+RACES = ["white", "black", "asian", "hispanic"]
+RACE_BITS = {r: 1 << i for i, r in enumerate(RACES)}
+N_MASKS = 1 << len(RACES)
+# (female?, race mask) cells: code = female * N_MASKS + mask, see cell_codes
+N_CELLS = 2 * N_MASKS
+RACE_SPLIT_RE = re.compile(r"\s*(?:,|/|;|\s+and\s+)\s*", flags=re.IGNORECASE)
+# Some OpenAI/DeepSeek rows were written with "".join: "HispanicWhite"
+JOINED_RACES_RE = re.compile(rf"(?:{'|'.join(RACES)})+")
+RACE_TOKEN_RE = re.compile("|".join(RACES))
+# Number of races named by each mask (2+ = mixed race)
+MASK_POPCOUNT = np.array([bin(m).count("1") for m in range(N_MASKS)])
+# RACE_MEMBERSHIP[mask, r] = 1 when the mask names RACES[r]
+RACE_MEMBERSHIP = np.array([[(m & bit) > 0 for bit in RACE_BITS.values()] for m in range(N_MASKS)], dtype=np.int64)
+
+PERCENT_COLS = ["p_women", "p_white", "p_black", "p_asian", "p_hispanic"]
+
+
+def extract_races(cell: str):
+    """Set of RACES named in one ethnicity label."""
+    if not isinstance(cell, str) or not cell.strip():
+        return set()
+    races = set()
+    for part in RACE_SPLIT_RE.split(cell.strip().lower()):
+        if JOINED_RACES_RE.fullmatch(part):
+            races.update(RACE_TOKEN_RE.findall(part))
+    return races
+
+
+def label_mask(cell) -> int:
+    mask = 0
+    for r in extract_races(cell):
+        mask |= RACE_BITS[r]
+    return mask
+
+
+def _codes_and_labels(series: pd.Series):
+    """Integer codes (-1 = missing) and the distinct labels they point to."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def _lookup(series: pd.Series, fn, dtype) -> np.ndarray:
+    """Apply `fn` to each distinct label once and broadcast it to the rows."""
+    codes, labels = _codes_and_labels(series)
+    # The extra trailing slot catches code -1 (missing values)
+    lut = np.array([fn(label) for label in labels] + [fn(np.nan)], dtype=dtype)
+    return lut[codes]
+
+
+def race_masks(series: pd.Series) -> np.ndarray:
+    """4-bit race mask per row of an ethnicity column."""
+    return _lookup(series, label_mask, np.uint8)
+
+
+def female_flags(series: pd.Series) -> np.ndarray:
+    """True where the gender label is "female" (case/whitespace-insensitive)."""
+    return _lookup(series, lambda g: str(g).strip().lower() == "female", bool)
+
+
+def cell_codes(df: pd.DataFrame, gender_col: str = "gender", eth_col: str = "ethnicity") -> np.ndarray:
+    """(female?, race mask) cell per row: female * 16 + mask (0..31, uint8)."""
+    return (female_flags(df[gender_col]).astype(np.uint8) * N_MASKS + race_masks(df[eth_col])).astype(np.uint8)
+
+
+def mask_histogram(masks) -> np.ndarray:
+    """Number of rows with each of the 16 race masks."""
+    return np.bincount(np.asarray(masks, dtype=np.intp), minlength=N_MASKS)
+
+
+def mask_label(mask: int) -> str:
+    """"white+hispanic" style name of a race mask ("none" for 0)."""
+    return "+".join(r for r, bit in RACE_BITS.items() if mask & bit) or "none"
+
+
+def race_counts_from_histogram(hist) -> dict:
+    """Rows naming each race (multi-label: a row can count toward several)."""
+    masks = np.arange(N_MASKS)
+    return {r: int(hist[(masks & bit) > 0].sum()) for r, bit in RACE_BITS.items()}
+
+
+# ----------------------------
+# Counting policies for multi-race labels
+# ----------------------------
+# Every policy is a (16, 5) weight matrix over RACE_CATEGORIES plus the masks
+# that count toward the denominator, so any of them is a matrix product with
+# the mask histogram:
+#   any_mention     a profile counts toward every race it names (the
+#                   results_across_40 convention; shares can sum above 100%)
+#   fractional      a profile naming k races counts 1/k toward each
+#   single_only     only single-race profiles, as a share of single-race profiles
+#   mixed_category  single-race profiles by race, 2+ races as "mixed"
+POLICIES = ["any_mention", "fractional", "single_only", "mixed_category"]
+RACE_CATEGORIES = RACES + ["mixed"]
+
+
+def policy_weights(policy: str):
+    """((16, 5) weights per mask and category, (16,) denominator weights) for one policy."""
+    single = (MASK_POPCOUNT == 1).astype(float)
+    everyone, nobody = np.ones(N_MASKS), np.zeros(N_MASKS)
+    if policy == "any_mention":
+        races, mixed, denominator = RACE_MEMBERSHIP, nobody, everyone
+    elif policy == "fractional":
+        races, mixed, denominator = RACE_MEMBERSHIP / np.maximum(MASK_POPCOUNT, 1)[:, None], nobody, everyone
+    elif policy == "single_only":
+        races, mixed, denominator = RACE_MEMBERSHIP * single[:, None], nobody, single
+    elif policy == "mixed_category":
+        races, mixed, denominator = RACE_MEMBERSHIP * single[:, None], (MASK_POPCOUNT >= 2) * 1.0, everyone
+    else:
+        raise ValueError(f"Unknown counting policy {policy!r}; expected one of {POLICIES}")
+    return np.column_stack([races, mixed]), denominator
+
+
+POLICY_WEIGHTS = np.stack([policy_weights(p)[0] for p in POLICIES])        # (policies, 16, 5)
+POLICY_DENOMINATORS = np.stack([policy_weights(p)[1] for p in POLICIES])   # (policies, 16)
+
+
+def policy_counts(hist):
+    """
+    (counts, denominators) under every policy for mask histograms of shape
+    (..., 16): counts (..., policies, 5) over RACE_CATEGORIES, denominators
+    (..., policies).
+    """
+    hist = np.asarray(hist, dtype=float)
+    return np.einsum("...m,pmc->...pc", hist, POLICY_WEIGHTS), hist @ POLICY_DENOMINATORS.T
+
+
+def pct(n, d, decimals: int = 1):
+    if d == 0:
+        return 0.0
+    return round(100.0 * n / d, decimals)
+
+
+class DemographicCounts:
+    """
+    Mergeable counts for one file (or several): a 2 x 16 joint histogram of
+    (female?, race mask), from which every reported count can be derived.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.joint = np.zeros((2, N_MASKS), dtype=np.int64)
+
+    def update(self, df: pd.DataFrame, gender_col: str = "gender", eth_col: str = "ethnicity"):
+        self.n += len(df)
+        self.joint += np.bincount(cell_codes(df, gender_col, eth_col), minlength=N_CELLS).reshape(2, N_MASKS)
+        return self
+
+    def merge(self, other: "DemographicCounts"):
+        self.n += other.n
+        self.joint += other.joint
+        return self
+
+    @property
+    def n_female(self):
+        # NumPy int on purpose: p_women has always been rounded with NumPy's
+        # round (a pandas sum), which differs from round() on exact .x5 ties
+        return self.joint[1].sum()
+
+    @property
+    def hist(self) -> np.ndarray:
+        return self.joint.sum(axis=0)
+
+    def race_counts(self) -> dict:
+        return race_counts_from_histogram(self.hist)
+
+    def result(self, decimals: int = 1) -> dict:
+        races = self.race_counts()
+        return {
+            "p_women": pct(self.n_female, self.n, decimals),
+            **{f"p_{r}": pct(races[r], self.n, decimals) for r in RACES},
+        }
+
+
+def count_file(path, memory_mb: float = MEMORY_LIMIT_MB) -> DemographicCounts:
+    counts = DemographicCounts()
+    for df in iter_profile_chunks(path, usecols=DEMOGRAPHIC_COLS, memory_mb=memory_mb):
+        counts.update(df)
+    return counts
+
+
+def count_model_files(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB,
+                      workers=None) -> dict:
+    """
+    {model: [(occupation, DemographicCounts), ...]} in `profile_files` order.
+    Files are counted on a process pool; if any fail, `FileErrors` lists all
+    of them.
+    """
+    results = raise_failures(map_profile_files(
+        count_file, models, profiles_dir, workers=workers, memory_mb=memory_mb))
+    return group_by_model(results, models)
+
+
+def percentage_table(file_counts, decimals: int = 1) -> pd.DataFrame:
+    """One model's [(occupation, DemographicCounts)] as the results_across_40 table."""
+    rows = [{"occupation": occupation, **counts.result(decimals)} for occupation, counts in file_counts]
+    return pd.DataFrame(rows, columns=["occupation"] + PERCENT_COLS)
+
+
+def count_models(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB,
+                 decimals: int = 1, workers=None) -> dict:
+    """
+    {model: DataFrame[occupation, p_women, p_white, p_black, p_asian, p_hispanic]}
+    for every model, one row per profile CSV (same layout as
+    results_across_40/<model>_percentages_across_40_careers.csv).
+    """
+    counts = count_model_files(models, profiles_dir, memory_mb, workers)
+    return {model: percentage_table(file_counts, decimals) for model, file_counts in counts.items()}
@@ -0,0 +1,294 @@
+"""
+Mergeable age / salary distributions per (model, occupation, gender, race).
+
+Each profile CSV is read once into a `ProfileDistributions`: for every
+numeric column and every (female?, race mask) cell of the 2 x 16 layout used
+by `demographics`, a KLL quantile sketch plus exact `Moments`. Both merge, so
+any coarser group is a merge of cells, and files merge into models:
+
+    dists = load_distributions()                          # {(model, occupation): ProfileDistributions}
+    sketch, moments = dists[("gemini", "nurse")].select("salary", female=True)
+    sketch.quantile([0.1, 0.5, 0.9])
+    pooled = ProfileDistributions.combine(d for (m, _), d in dists.items() if m == "openai")
+    ks_distance(*(pooled.select("age", race=r)[0] for r in ("white", "black")))
+
+A KLL sketch keeps O(k) values and answers any quantile to within roughly
+1.7 / k of rank (about 1% at the default k = 200). The per-file sketches are
+cached under analysis/.cache/distributions/ as plain NumPy arrays and rebuilt
+when a profile CSV's size/mtime changes or the code that decodes the cells
+(this module, demographics.py) is edited.
+"""
+import hashlib
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import demographics
+from .chunked import MEMORY_LIMIT_MB, Moments, iter_profile_chunks
+from .demographics import N_CELLS, N_MASKS, RACE_BITS, cell_codes
+from .parallel import map_profile_files, raise_failures
+from .profile_reader import CACHE_DIR, DEMOGRAPHIC_COLS, MODELS, PROFILES_DIR, all_profile_files, profiles_stamp
+
+NUMERIC_COLS = ["age", "salary"]
+KLL_K = 200
+KLL_C = 2 / 3            # capacity ratio between consecutive levels
+STORE_DIR = CACHE_DIR / "distributions"
+# Edits to these invalidate the cache (e.g. a fix to how races are decoded)
+CODE_FILES = [Path(__file__), Path(demographics.__file__)]
+
+
+# ----------------------------
+# KLL quantile sketch
+# ----------------------------
+class KLLSketch:
+    """
+    KLL quantile sketch. Level h holds values that each stand for 2**h
+    inputs; a level over its capacity is sorted and every other value
+    (random offset) is promoted, so memory stays O(k).
+    """
+
+    def __init__(self, k: int = KLL_K, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.zeros(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(int(math.ceil(self.k * KLL_C ** depth)), 2)
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                level = np.sort(level)
+                keep = level[:len(level) % 2]            # an odd value out stays behind
+                pairs = level[len(level) % 2:]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                h = 0                                    # capacities shift when a level is added
+                continue
+            h += 1
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float)
+        x = x[np.isfinite(x)]
+        if len(x):
+            self.levels[0] = np.concatenate([self.levels[0], x])
+            self.n += len(x)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Value at each quantile in `q` (NaN for an empty sketch)."""
+        q = np.asarray(q, dtype=float)
+        values, cum = self._weighted()
+        if len(values) == 0:
+            return np.full(q.shape, np.nan)
+        idx = np.searchsorted(cum, q * cum[-1], side="left")
+        return values[np.clip(idx, 0, len(values) - 1)]
+
+    def cdf(self, x):
+        """Estimated share of inputs <= each value of `x`."""
+        x = np.asarray(x, dtype=float)
+        values, cum = self._weighted()
+        if len(values) == 0:
+            return np.full(x.shape, np.nan)
+        idx = np.searchsorted(values, x, side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0) / cum[-1]
+
+    def to_arrays(self):
+        return np.concatenate(self.levels), np.array([len(l) for l in self.levels], dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, values, level_sizes, n, k: int = KLL_K):
+        sketch = cls(k)
+        sketch.levels = np.split(np.asarray(values, dtype=float), np.cumsum(level_sizes)[:-1]) or [np.zeros(0)]
+        sketch.n = int(n)
+        return sketch
+
+
+def ks_distance(a: KLLSketch, b: KLLSketch) -> float:
+    """Largest gap between two sketches' CDFs (two-sample Kolmogorov-Smirnov statistic)."""
+    grid = np.union1d(np.concatenate(a.levels), np.concatenate(b.levels))
+    if len(grid) == 0 or not a.n or not b.n:
+        return np.nan
+    return float(np.abs(a.cdf(grid) - b.cdf(grid)).max())
+
+
+# ----------------------------
+# Per-file cells
+# ----------------------------
+def _moments_to_array(m: Moments):
+    return [m.n, m.mean, m.m2, m.min, m.max]
+
+
+def _moments_from_array(row) -> Moments:
+    m = Moments()
+    m.n, m.mean, m.m2, m.min, m.max = int(row[0]), *map(float, row[1:])
+    return m
+
+
+class ProfileDistributions:
+    """KLL sketch + Moments of each numeric column per (female?, race mask) cell."""
+
+    def __init__(self, cols=NUMERIC_COLS, k: int = KLL_K):
+        self.cols = list(cols)
+        self.k = k
+        self.sketches = {c: [KLLSketch(k) for _ in range(N_CELLS)] for c in self.cols}
+        self.moments = {c: [Moments() for _ in range(N_CELLS)] for c in self.cols}
+
+    def update(self, df: pd.DataFrame, gender_col: str = "gender", eth_col: str = "ethnicity"):
+        cells = cell_codes(df, gender_col, eth_col)
+        order = np.argsort(cells, kind="stable")
+        bounds = np.searchsorted(cells[order], np.arange(N_CELLS + 1))
+        for c in self.cols:
+            x = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)[order]
+            for cell in np.flatnonzero(np.diff(bounds)):
+                part = x[bounds[cell]:bounds[cell + 1]]
+                self.sketches[c][cell].update(part)
+                self.moments[c][cell].update(part)
+        return self
+
+    def merge(self, other: "ProfileDistributions"):
+        for c in self.cols:
+            for cell in range(N_CELLS):
+                self.sketches[c][cell].merge(other.sketches[c][cell])
+                self.moments[c][cell].merge(other.moments[c][cell])
+        return self
+
+    @classmethod
+    def combine(cls, items):
+        out = cls()
+        for d in items:
+            out.merge(d)
+        return out
+
+    def select(self, col: str, female=None, race: str = None, has_race: bool = True):
+        """
+        (KLLSketch, Moments) over the cells matching `female` (True / False /
+        None = both) and, if `race` is given, rows that do (or, with
+        has_race=False, do not) name that race.
+        """
+        cells = np.arange(N_CELLS)
+        keep = np.ones(N_CELLS, dtype=bool)
+        if female is not None:
+            keep &= (cells >= N_MASKS) == bool(female)
+        if race is not None:
+            keep &= (((cells % N_MASKS) & RACE_BITS[race]) > 0) == has_race
+        sketch, moments = KLLSketch(self.k), Moments()
+        for cell in np.flatnonzero(keep):
+            sketch.merge(self.sketches[col][cell])
+            moments.merge(self.moments[col][cell])
+        return sketch, moments
+
+
+def distributions_file(path, memory_mb: float = MEMORY_LIMIT_MB) -> ProfileDistributions:
+    dists = ProfileDistributions()
+    for df in iter_profile_chunks(path, usecols=DEMOGRAPHIC_COLS + NUMERIC_COLS, memory_mb=memory_mb):
+        dists.update(df)
+    return dists
+
+
+# ----------------------------
+# Persistence
+# ----------------------------
+def save_distributions(dists: dict, path: Path, stamp: str):
+    """Flatten every (file, column, cell) sketch into a few arrays in one .npz."""
+    keys = list(dists)
+    values, sizes, counts, moments = [], [], [], []
+    for key in keys:
+        for c in NUMERIC_COLS:
+            for cell in range(N_CELLS):
+                v, s = dists[key].sketches[c][cell].to_arrays()
+                values.append(v)
+                sizes.append(s)
+                counts.append(dists[key].sketches[c][cell].n)
+                moments.append(_moments_to_array(dists[key].moments[c][cell]))
+    depth = max((len(s) for s in sizes), default=1)
+    level_sizes = np.zeros((len(sizes), depth), dtype=np.int64)
+    for i, s in enumerate(sizes):
+        level_sizes[i, :len(s)] = s
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, stamp=np.array(stamp),
+             models=np.array([m for m, _ in keys]), occupations=np.array([o for _, o in keys]),
+             values=np.concatenate(values) if values else np.zeros(0), level_sizes=level_sizes,
+             counts=np.array(counts, dtype=np.int64), moments=np.array(moments, dtype=float).reshape(-1, 5))
+    os.replace(tmp, path)
+
+
+def read_distributions(path: Path, stamp: str):
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            if str(data["stamp"]) != stamp:
+                return None
+            keys = list(zip(map(str, data["models"]), map(str, data["occupations"])))
+            values, level_sizes = data["values"], data["level_sizes"]
+            counts, moments = data["counts"], data["moments"]
+    except (OSError, KeyError, ValueError):
+        return None
+    starts = np.concatenate([[0], np.cumsum(level_sizes.sum(axis=1))])
+    out, i = {}, 0
+    for key in keys:
+        d = ProfileDistributions()
+        for c in NUMERIC_COLS:
+            for cell in range(N_CELLS):
+                sizes = level_sizes[i][:max(np.flatnonzero(level_sizes[i]).max(initial=0) + 1, 1)]
+                d.sketches[c][cell] = KLLSketch.from_arrays(values[starts[i]:starts[i + 1]], sizes, counts[i])
+                d.moments[c][cell] = _moments_from_array(moments[i])
+                i += 1
+        out[key] = d
+    return out
+
+
+def code_stamp(files=CODE_FILES) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for path in files:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def load_distributions(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB,
+                       workers=None, rebuild: bool = False) -> dict:
+    """
+    {(model, occupation): ProfileDistributions} for every profile CSV of
+    `models`, from the cache when no CSV (and none of CODE_FILES) changed
+    since it was built.
+    """
+    stamp = hashlib.blake2b(
+        f"{profiles_stamp(all_profile_files(models, profiles_dir))}|{code_stamp()}|{KLL_K}|{','.join(NUMERIC_COLS)}"
+        .encode(),
+        digest_size=16).hexdigest()
+    path = STORE_DIR / f"{'_'.join(models)}.npz"
+    dists = None if rebuild else read_distributions(path, stamp)
+    if dists is None:
+        results = raise_failures(map_profile_files(
+            distributions_file, models, profiles_dir, workers=workers, memory_mb=memory_mb))
+        dists = {r.key: r.value for r in results}
+        save_distributions(dists, path, stamp)
+    return dists
@@ -0,0 +1,82 @@
+"""
+Distributional divergences between model and BLS demographic distributions.
+
+Every function works along the last axis of arrays of any leading shape, so
+the whole (models, occupations, categories) table is scored in one call:
+
+    p = race_distribution(model_pct)       # (models, occupations, 4)
+    q = race_distribution(bls_pct)         # (1, occupations, 4), broadcasts
+    divergences(p, q)                      # {"tv": (models, occupations), ...}
+
+Races are multi-label in both sources (BLS counts Hispanic as an ethnicity on
+top of race, and a model's "White, Hispanic" profile counts toward both), so
+the four race shares can sum to more than 100%. They are renormalized to a
+distribution over race mentions before comparing. Gender is (women, men).
+
+- tv          total variation distance, 0..1
+- js          Jensen-Shannon divergence in bits, 0..1
+- kl          KL(model || BLS) in bits; both sides are smoothed by SMOOTHING
+              so a category missing from one side stays finite
+- hellinger   Hellinger distance, 0..1
+"""
+import numpy as np
+
+METRICS = ["tv", "js", "kl", "hellinger"]
+SMOOTHING = 1e-4
+
+
+def normalize(x) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return x / x.sum(axis=-1, keepdims=True)
+
+
+def gender_distribution(p_women) -> np.ndarray:
+    """(..., 2) distribution (women, men) from % women."""
+    w = np.asarray(p_women, dtype=float) / 100
+    return np.stack([w, 1 - w], axis=-1)
+
+
+def race_distribution(race_pct) -> np.ndarray:
+    """(..., 4) distribution over race mentions from the per-race percentages."""
+    return normalize(race_pct)
+
+
+def _smooth(p) -> np.ndarray:
+    return normalize(np.asarray(p, dtype=float) + SMOOTHING)
+
+
+def _xlogy(x, y) -> np.ndarray:
+    """x * log2(y), 0 where x == 0."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(x > 0, x * np.log2(np.where(x > 0, y, 1)), 0.0)
+
+
+def total_variation(p, q) -> np.ndarray:
+    return 0.5 * np.abs(np.asarray(p) - np.asarray(q)).sum(axis=-1)
+
+
+def kl_divergence(p, q) -> np.ndarray:
+    p, q = _smooth(p), _smooth(q)
+    return _xlogy(p, p / q).sum(axis=-1)
+
+
+def js_divergence(p, q) -> np.ndarray:
+    p, q = np.asarray(p, dtype=float), np.asarray(q, dtype=float)
+    m = (p + q) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 0.5 * (_xlogy(p, p / m).sum(axis=-1) + _xlogy(q, q / m).sum(axis=-1))
+
+
+def hellinger(p, q) -> np.ndarray:
+    return np.sqrt(0.5 * ((np.sqrt(p) - np.sqrt(q)) ** 2).sum(axis=-1))
+
+
+def divergences(p, q) -> dict:
+    """All METRICS for distributions p and q (last axis), NaN where either is missing."""
+    p, q = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(q, dtype=float))
+    missing = np.isnan(p).any(axis=-1) | np.isnan(q).any(axis=-1)
+    p, q = np.nan_to_num(p), np.nan_to_num(q)
+    out = {"tv": total_variation(p, q), "js": js_divergence(p, q), "kl": kl_divergence(p, q),
+           "hellinger": hellinger(p, q)}
+    return {name: np.where(missing, np.nan, v) for name, v in out.items()}
@@ -0,0 +1,135 @@
+"""
+Lexical diversity / template-repetition metrics for the free-text columns.
+
+All metrics are computed on a fixed-size random sample of each file's texts
+(SAMPLE_SIZE, seeded), because ratios such as distinct-n shrink as a corpus
+grows: with the same sample size, cells of 1,000 and 10,000 profiles compare
+fairly, and the cost per cell is constant.
+
+- duplicate_pct       exact duplicate texts (on the full file, via factorize)
+- distinct_<n>        distinct n-grams / n-grams (n = 1, 2, 3)
+- self_overlap        self-BLEU proxy: for each text, the share of its
+                      distinct 1..4-grams that occur in any other sampled text,
+                      geometric mean over n, averaged over texts
+- compression_ratio   zlib-compressed / raw size of the sampled texts
+- unigram_entropy     Shannon entropy of the token distribution (bits)
+
+Texts are tokenized once into integer ids, n-grams are hashed to uint64 with
+NumPy (no Python loop over n-grams), and "occurs in another text" is a
+document-frequency >= 2 test, so everything is linear in the sample size
+rather than pairwise. Files are streamed in chunks under the memory ceiling:
+the sample rows are drawn up front from the row index, and exact duplicates are
+counted on 64-bit hashes of the texts.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .parallel import map_profile_files, raise_failures
+from .profile_index import load_row_index
+from .profile_reader import MODELS, PROFILES_DIR
+
+TEXT_COLS = ["motivations", "biography"]
+SAMPLE_SIZE = 1000
+DISTINCT_N = (1, 2, 3)
+OVERLAP_N = 4
+SEED = 0
+TOKEN_RE = r"[a-z0-9']+"
+HASH_MIX = np.uint64(0x9E3779B97F4A7C15)     # multiplier of the polynomial n-gram hash
+_TEXT_KEY = "diversity-texts0"               # hash_array keys must be 16 characters
+
+
+def tokenize(texts):
+    """(token ids, doc index per token) for a list of texts."""
+    tokens = pd.Series(list(texts), dtype=object).fillna("").str.lower().str.findall(TOKEN_RE)
+    lengths = tokens.str.len().to_numpy()
+    ids, _ = pd.factorize(tokens.explode().dropna())
+    return ids.astype(np.uint64), np.repeat(np.arange(len(lengths)), lengths)
+
+
+def ngram_hashes(ids, docs, n: int):
+    """(hash, doc) for every n-gram that stays within one text."""
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.intp)
+    m = len(ids) - n + 1
+    h = np.zeros(m, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for k in range(n):
+            h = h * HASH_MIX + ids[k:k + m] + np.uint64(1)
+    same_doc = docs[:m] == docs[n - 1:]
+    return h[same_doc], docs[:m][same_doc]
+
+
+def self_overlap(ids, docs, n_docs: int, max_n: int = OVERLAP_N) -> float:
+    """Mean over texts of the geometric mean of their 1..max_n-gram overlap with the other texts."""
+    log_precision = np.zeros(n_docs)
+    usable = np.ones(n_docs, dtype=bool)
+    for n in range(1, max_n + 1):
+        h, d = ngram_hashes(ids, docs, n)
+        pairs = np.unique(np.stack([d.astype(np.uint64), h]), axis=1)     # distinct (doc, n-gram)
+        _, inverse, df = np.unique(pairs[1], return_inverse=True, return_counts=True)
+        shared = df[inverse] >= 2
+        total = np.bincount(pairs[0].astype(np.intp), minlength=n_docs)
+        hits = np.bincount(pairs[0].astype(np.intp), weights=shared, minlength=n_docs)
+        usable &= total > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_precision += np.log(hits / np.maximum(total, 1))
+    if not usable.any():
+        return np.nan
+    return float(np.exp(log_precision[usable]).mean())
+
+
+def diversity_metrics(texts) -> dict:
+    texts = [t for t in texts if isinstance(t, str) and t.strip()]
+    ids, docs = tokenize(texts)
+    out = {"sample": len(texts)}
+    for n in DISTINCT_N:
+        h, _ = ngram_hashes(ids, docs, n)
+        out[f"distinct_{n}"] = len(np.unique(h)) / len(h) if len(h) else np.nan
+    out["self_overlap"] = self_overlap(ids, docs, len(texts)) if len(texts) > 1 else np.nan
+    raw = "\n".join(texts).encode("utf-8")
+    out["compression_ratio"] = len(zlib.compress(raw, 9)) / len(raw) if raw else np.nan
+    p = np.bincount(ids.astype(np.intp)) / len(ids) if len(ids) else np.zeros(0)
+    out["unigram_entropy"] = float(-(p * np.log2(p)).sum()) if len(p) else np.nan
+    return out
+
+
+def file_diversity(path, cols=TEXT_COLS, sample_size: int = SAMPLE_SIZE, seed: int = SEED,
+                   memory_mb: float = MEMORY_LIMIT_MB) -> list:
+    """One metrics dict per text column of a profile CSV."""
+    n_rows = len(load_row_index(path))
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+    n = {col: 0 for col in cols}
+    hashes = {col: [] for col in cols}
+    sample = {col: [] for col in cols}
+    start = 0
+    for df in iter_profile_chunks(path, usecols=list(cols), memory_mb=memory_mb, categorical=False):
+        picked = rows[(rows >= start) & (rows < start + len(df))] - start
+        for col in cols:
+            values = df[col].dropna()
+            n[col] += len(values)
+            hashes[col].append(np.unique(pd.util.hash_array(values.to_numpy(dtype=object), hash_key=_TEXT_KEY)))
+            sample[col] += df[col].iloc[picked].tolist()
+        start += len(df)
+    records = []
+    for col in cols:
+        distinct = len(np.unique(np.concatenate(hashes[col]))) if hashes[col] else 0
+        records.append({
+            "column": col,
+            "n": n[col],
+            "duplicate_pct": 100 * (1 - distinct / n[col]) if n[col] else np.nan,
+            **diversity_metrics(sample[col]),
+        })
+    return records
+
+
+def diversity_table(models=MODELS, profiles_dir=PROFILES_DIR, cols=TEXT_COLS, sample_size: int = SAMPLE_SIZE,
+                    memory_mb: float = MEMORY_LIMIT_MB, workers=None) -> pd.DataFrame:
+    """One row per (model, occupation, column); files run on a process pool."""
+    results = raise_failures(map_profile_files(
+        file_diversity, models, profiles_dir, workers=workers, cols=cols, sample_size=sample_size,
+        memory_mb=memory_mb))
+    return pd.DataFrame([{"model": r.key[0], "occupation": r.key[1], **rec} for r in results for rec in r.value])
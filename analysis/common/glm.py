@@ -0,0 +1,216 @@
+"""
+Batched binomial-family GLMs for the logistic regression results.
+
+Every fit here is a one-predictor logistic regression of a GenAI proportion on
+a (centered) BLS proportion, weighted by the number of profiles per
+occupation. Instead of one `glm()` call per (model, group, method), fits are
+stacked along a leading axis and solved together: arrays are shaped
+(fits, occupations), rows that a fit should ignore (missing values, trimmed
+occupations) are switched off with `mask`, and each IRLS / Newton step solves
+all the 2 x 2 systems at once.
+
+- `fit_quasibinomial`   R's `glm(..., family = quasibinomial, weights = n)`:
+                        IRLS estimates, Pearson dispersion, scaled SEs
+- `fit_robust_binomial` robustbase's `glmrob(..., method = "Mqle")`: Huber-type
+                        robust quasi-likelihood (Cantoni & Ronchetti) with the
+                        sandwich covariance (needs scipy)
+- `wald_p`, `bh_adjust` two-sided normal p-values and Benjamini-Hochberg
+                        adjustment (as `p.adjust(method = "BH")`)
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from scipy.stats import binom
+except ImportError:  # optional: only the robust fit needs it
+    binom = None
+
+TOL = 1e-8           # glm.control(epsilon)
+MAX_ITER = 25        # glm.control(maxit)
+HUBER_C = 1.345      # glmrobMqle.control(tcc)
+ROBUST_TOL = 1e-4    # glmrobMqle.control(acc)
+ROBUST_MAX_ITER = 50
+
+
+@dataclass
+class GLMFit:
+    """Stacked fit results; `coef` and `se` are (fits, 2) = (intercept, slope)."""
+    coef: np.ndarray
+    se: np.ndarray
+    dispersion: np.ndarray
+    converged: np.ndarray
+
+
+def _expit(eta):
+    return 1.0 / (1.0 + np.exp(-eta))
+
+
+def _prepare(x, y, n, mask):
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n = np.broadcast_to(np.asarray(n, dtype=float), x.shape)
+    ok = np.isfinite(x) & np.isfinite(y) & np.isfinite(n) & (n > 0)
+    if mask is not None:
+        ok &= np.asarray(mask, dtype=bool)
+    # Switched-off rows get zero weight and harmless placeholder values
+    return np.where(ok, x, 0.0), np.where(ok, y, 0.5), np.where(ok, n, 0.0), ok
+
+
+def _gram_inverse(x, w):
+    """Per-fit (X'WX)^-1 for X = (1, x), as (fits, 2, 2)."""
+    s0, s1, s2 = w.sum(axis=1), (w * x).sum(axis=1), (w * x * x).sum(axis=1)
+    det = s0 * s2 - s1 * s1
+    return np.stack([np.stack([s2, -s1], axis=1), np.stack([-s1, s0], axis=1)], axis=1) / det[:, None, None]
+
+
+def _xt(x, u):
+    """Per-fit X'u for X = (1, x), as (fits, 2)."""
+    return np.stack([u.sum(axis=1), (u * x).sum(axis=1)], axis=1)
+
+
+def _binomial_deviance(y, mu, n):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = np.where(y > 0, y * np.log(y / mu), 0.0) + np.where(y < 1, (1 - y) * np.log((1 - y) / (1 - mu)), 0.0)
+    return 2 * (n * d).sum(axis=1)
+
+
+def fit_quasibinomial(x, y, n, mask=None, tol: float = TOL, max_iter: int = MAX_ITER) -> GLMFit:
+    """
+    Quasibinomial logistic regressions y ~ 1 + x with prior weights n, all
+    fitted together. x, y, n, mask: (fits, rows) arrays (n may broadcast).
+    """
+    x, y, n, ok = _prepare(x, y, n, mask)
+
+    # Same start and convergence rule as glm.fit
+    mu = (n * y + 0.5) / (n + 1)
+    eta = np.log(mu / (1 - mu))
+    dev_old = _binomial_deviance(y, mu, n)
+    coef, w = np.zeros((len(x), 2)), np.zeros_like(x)
+    converged = np.zeros(len(x), dtype=bool)
+    for _ in range(max_iter):
+        # Fits stop updating once converged, so each ends where glm.fit would
+        live = ~converged
+        var = mu[live] * (1 - mu[live])     # for the logit link, dmu/deta = var
+        z = eta[live] + (y[live] - mu[live]) / var
+        w[live] = n[live] * var
+        coef[live] = np.einsum("fij,fj->fi", _gram_inverse(x[live], w[live]), _xt(x[live], w[live] * z))
+        eta[live] = coef[live, :1] + coef[live, 1:] * x[live]
+        mu[live] = _expit(eta[live])
+        dev = _binomial_deviance(y[live], mu[live], n[live])
+        converged[live] = np.abs(dev - dev_old[live]) / (np.abs(dev) + 0.1) < tol
+        dev_old[live] = dev
+        if converged.all():
+            break
+
+    # As summary.glm: working weights of the last iteration, residuals at the final fit
+    inv = _gram_inverse(x, w)
+    df_resid = ok.sum(axis=1) - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dispersion = (w * ((y - mu) / (mu * (1 - mu))) ** 2).sum(axis=1) / df_resid
+    se = np.sqrt(dispersion[:, None] * np.diagonal(inv, axis1=1, axis2=2))
+    return GLMFit(coef, se, dispersion, converged)
+
+
+def _huber_moments(mu, n, c):
+    """
+    Moments of the clipped Pearson residual psi = clip((Y - n mu) / sqrt(n V), -c, c)
+    for Y ~ Binomial(n, mu), from binomial CDFs: E[psi], E[psi^2], E[psi (Y - n mu)].
+    """
+    s = np.sqrt(n * mu * (1 - mu))
+    h = np.floor(n * mu - c * s)        # Y <= h  <=>  residual clipped at -c
+    k = np.floor(n * mu + c * s)        # Y >  k  <=>  residual clipped at +c
+    p_h, p_k = binom.cdf(h, n, mu), binom.cdf(k, n, mu)
+    q_h, q_k = binom.cdf(h - 1, np.maximum(n - 1, 0), mu), binom.cdf(k - 1, np.maximum(n - 1, 0), mu)
+    r_h, r_k = binom.cdf(h - 2, np.maximum(n - 2, 0), mu), binom.cdf(k - 2, np.maximum(n - 2, 0), mu)
+
+    nm = n * mu
+    p_mid = p_k - p_h
+    ey_mid = nm * (q_k - q_h)                              # E[Y; h < Y <= k]
+    ey2_mid = n * (n - 1) * mu**2 * (r_k - r_h) + ey_mid   # E[Y^2; h < Y <= k]
+    es_low = nm * q_h - nm * p_h                           # E[S; Y <= h], S = Y - n mu
+    es_mid = ey_mid - nm * p_mid
+    es2_mid = ey2_mid - 2 * nm * ey_mid + nm**2 * p_mid
+    es_high = -(es_low + es_mid)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        e_psi = -c * p_h + c * (1 - p_k) + es_mid / s
+        e_psi2 = c**2 * (p_h + 1 - p_k) + es2_mid / s**2
+        e_psi_s = -c * es_low + c * es_high + es2_mid / s
+    return e_psi, e_psi2, e_psi_s
+
+
+def fit_robust_binomial(x, y, n, mask=None, start=None, c: float = HUBER_C,
+                        tol: float = ROBUST_TOL, max_iter: int = ROBUST_MAX_ITER) -> GLMFit:
+    """
+    Robust (Mallows quasi-likelihood, Huber psi, no x-weights) logistic
+    regressions y ~ 1 + x with binomial sizes n, fitted together. `start`
+    defaults to the ordinary binomial fit, as in glmrob.
+    """
+    if binom is None:
+        raise ImportError("fit_robust_binomial needs scipy (pip install scipy).")
+    if start is None:
+        start = fit_quasibinomial(x, y, n, mask).coef
+    x, y, n, ok = _prepare(x, y, n, mask)
+    nobs = ok.sum(axis=1)
+
+    def parts(theta):
+        mu = _expit(theta[:, :1] + theta[:, 1:] * x)
+        var = mu * (1 - mu)
+        e_psi, e_psi2, e_psi_s = _huber_moments(mu, n, c)
+        # d/dtheta of the estimating function: sqrt(n / V) * dmu/deta = sqrt(n V)
+        a = np.where(ok, np.sqrt(n * var), 0.0)
+        b = np.where(ok, a * e_psi_s, 0.0)
+        return mu, var, a, b, np.where(ok, e_psi, 0.0), np.where(ok, e_psi2, 0.0)
+
+    theta = np.array(start, dtype=float)
+    converged = np.zeros(len(x), dtype=bool)
+    for _ in range(max_iter):
+        mu, var, a, b, e_psi, _ = parts(theta)
+        resid = np.where(ok, (y - mu) * np.sqrt(n) / np.sqrt(var), 0.0)
+        psi = np.clip(resid, -c, c) - e_psi
+        # Newton step: (X' B X) step = X' (psi * a); the 1/nobs factors cancel
+        step = np.einsum("fij,fj->fi", _gram_inverse(x, b), _xt(x, psi * a))
+        step = np.where(converged[:, None], 0.0, step)
+        done = np.sqrt((step**2).sum(axis=1) / np.maximum(1e-20, (theta**2).sum(axis=1))) <= tol
+        theta = theta + step
+        converged |= done
+        if converged.all():
+            break
+
+    # Sandwich covariance M^-1 Q M^-1 / nobs
+    mu, var, a, b, e_psi, e_psi2 = parts(theta)
+    m_inv = _gram_inverse(x, b / nobs[:, None])
+    xs = np.stack([np.ones_like(x), x], axis=2)                           # (fits, rows, 2)
+    q = np.einsum("fr,fri,frj->fij", e_psi2 * a**2, xs, xs) / nobs[:, None, None]
+    mean_a = np.einsum("fr,fri->fi", e_psi * a, xs) / nobs[:, None]
+    q -= mean_a[:, :, None] * mean_a[:, None, :]
+    cov = m_inv @ q @ m_inv / nobs[:, None, None]
+    se = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    return GLMFit(theta, se, np.ones(len(x)), converged)
+
+
+def wald_p(estimate, se, ref=0.0):
+    """Two-sided normal-theory p-value for estimate == ref."""
+    z = np.abs((np.asarray(estimate, dtype=float) - ref) / np.asarray(se, dtype=float))
+    return np.vectorize(math.erfc, otypes=[float])(z / math.sqrt(2))
+
+
+def bh_adjust(p, axis: int = -1):
+    """Benjamini-Hochberg adjusted p-values along `axis` (NaNs are left out)."""
+    p = np.moveaxis(np.asarray(p, dtype=float), axis, -1)
+    out = np.full(p.shape, np.nan)
+    flat_p, flat_out = p.reshape(-1, p.shape[-1]), out.reshape(-1, p.shape[-1])
+    for row, dest in zip(flat_p, flat_out):
+        ok = np.isfinite(row)
+        m = ok.sum()
+        if m == 0:
+            continue
+        vals = row[ok]
+        order = np.argsort(vals)[::-1]
+        adj = np.minimum.accumulate(vals[order] * m / np.arange(m, 0, -1))
+        res = np.empty(m)
+        res[order] = np.minimum(adj, 1.0)
+        dest[ok] = res
+    return np.moveaxis(out, -1, axis)
@@ -0,0 +1,106 @@
+"""
+Confidence intervals for the reported percentages, computed from counts.
+
+Every reported cell (model x occupation x category) is a proportion k / n, so
+intervals never need the profile rows themselves:
+
+- `wilson_interval`          Wilson score interval (closed form, vectorized)
+- `clopper_pearson_interval` exact binomial interval (needs scipy)
+- `bootstrap_proportions`    count-level multinomial bootstrap: each replicate
+                             redraws a file's 2 x 16 (female?, race mask)
+                             histogram with `Generator.multinomial`, for all
+                             cells at once, instead of resampling rows
+
+Categories follow the results tables: women, white, black, asian, hispanic
+(races are multi-label, so a row can count toward several).
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+from .demographics import N_CELLS, N_MASKS, RACE_BITS, RACES
+
+try:
+    from scipy.stats import beta
+except ImportError:  # optional: only Clopper-Pearson needs it
+    beta = None
+
+CATEGORIES = ["women"] + RACES
+ALPHA = 0.05
+N_BOOT = 10_000
+BOOT_BATCH = 500  # replicates drawn per batch (bounds memory)
+
+
+def _category_matrix() -> np.ndarray:
+    """(N_CELLS, 5) 0/1 matrix mapping joint-histogram bins to categories."""
+    female = np.repeat([0, 1], N_MASKS)
+    masks = np.tile(np.arange(N_MASKS), 2)
+    cols = [female == 1] + [(masks & RACE_BITS[r]) > 0 for r in RACES]
+    return np.stack(cols, axis=1).astype(np.int64)
+
+
+CATEGORY_MATRIX = _category_matrix()
+
+
+def category_counts(joint) -> np.ndarray:
+    """Counts per category for joint histograms of shape (..., 2, 16)."""
+    joint = np.asarray(joint)
+    return joint.reshape(*joint.shape[:-2], N_CELLS) @ CATEGORY_MATRIX
+
+
+def wilson_interval(k, n, alpha: float = ALPHA):
+    """Wilson score interval for k successes out of n (arrays broadcast)."""
+    k = np.asarray(k, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = k / n
+        denom = 1 + z**2 / n
+        center = (p + z**2 / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    return center - half, center + half
+
+
+def clopper_pearson_interval(k, n, alpha: float = ALPHA):
+    """Exact (Clopper-Pearson) binomial interval for k successes out of n."""
+    if beta is None:
+        raise ImportError("clopper_pearson_interval needs scipy (pip install scipy).")
+    k = np.asarray(k, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid="ignore"):
+        low = np.where(k > 0, beta.ppf(alpha / 2, k, n - k + 1), 0.0)
+        high = np.where(k < n, beta.ppf(1 - alpha / 2, k + 1, n - k), 1.0)
+    return low, high
+
+
+def bootstrap_proportions(joint, n_boot: int = N_BOOT, seed=0, batch: int = BOOT_BATCH) -> np.ndarray:
+    """
+    Multinomial bootstrap of category proportions.
+
+    joint: (cells, 2, 16) joint histograms, one per file
+    returns (n_boot, cells, 5) resampled proportions (NaN for empty cells)
+    """
+    joint = np.asarray(joint, dtype=np.int64)
+    flat = joint.reshape(len(joint), N_CELLS)
+    n = flat.sum(axis=1)
+    ok = n > 0
+    pvals = np.zeros(flat.shape, dtype=float)
+    pvals[ok] = flat[ok] / n[ok, None]
+    pvals[~ok, 0] = 1.0  # placeholder; masked out below
+
+    rng = np.random.default_rng(seed)
+    out = np.empty((n_boot, len(joint), len(CATEGORIES)), dtype=float)
+    for start in range(0, n_boot, batch):
+        b = min(batch, n_boot - start)
+        draws = rng.multinomial(n, pvals, size=(b, len(joint)))   # (b, cells, 32)
+        out[start:start + b] = draws @ CATEGORY_MATRIX
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out /= n[None, :, None]
+    out[:, ~ok, :] = np.nan
+    return out
+
+
+def percentile_interval(replicates, alpha: float = ALPHA, axis: int = 0):
+    """Percentile interval of bootstrap replicates along `axis`."""
+    low, high = np.nanquantile(replicates, [alpha / 2, 1 - alpha / 2], axis=axis)
+    return low, high
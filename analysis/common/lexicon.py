@@ -0,0 +1,153 @@
+"""
+Lexicon scoring for the free-text columns (motivations, biography).
+
+A lexicon is a named list of terms; a term ending in "*" matches any word
+starting with it ("ambitio*" -> ambition, ambitious), other terms match whole
+words or phrases. `LexiconMatcher` compiles every term of every lexicon into
+one trie-shaped regular expression, so each text is scanned once by the C
+regex engine walking a single automaton (no loop over terms), and each match
+is mapped back to the lexicons that contain it:
+
+    matcher = LexiconMatcher({"agentic": ["ambitio*", "lead*"], "family": ["mother", "kids"]})
+    matcher.count_matrix(["An ambitious leader and mother"])    # [[2, 1]]
+
+`count_file` scores one profile CSV, working on its distinct strings only,
+and sums hits per (female?, race mask) cell of the 2 x 16 layout used by
+`demographics` into a mergeable `LexiconCounts`.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .demographics import N_CELLS, cell_codes
+from .parallel import group_by_model, map_profile_files, raise_failures
+from .profile_reader import DEMOGRAPHIC_COLS, MODELS, PROFILES_DIR
+
+TEXT_COLS = ["motivations", "biography"]
+_WILD = "*"
+_END = ""
+
+
+# ----------------------------
+# Matcher
+# ----------------------------
+def _normalize(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def _trie_regex(node: dict) -> str:
+    """Regex for a character trie; longer continuations are tried before a term ends."""
+    alts = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch not in (_END, _WILD)]
+    if _WILD in node:
+        alts.append(r"\w*")
+    if _END in node:
+        alts.append(r"\b")
+    if len(alts) == 1:
+        return alts[0]
+    return "(?:" + "|".join(alts) + ")"
+
+
+class LexiconMatcher:
+    """All lexicon terms compiled into one automaton."""
+
+    def __init__(self, lexicons: dict):
+        self.names = list(lexicons)
+        self.exact, self.stems = {}, {}       # term -> bit set of lexicon indices
+        trie = {}
+        for i, name in enumerate(self.names):
+            for raw in lexicons[name]:
+                term = _normalize(raw)
+                wild = term.endswith(_WILD)
+                term = term.rstrip(_WILD)
+                if not term:
+                    continue
+                table = self.stems if wild else self.exact
+                table[term] = table.get(term, 0) | (1 << i)
+                node = trie
+                for ch in term:
+                    node = node.setdefault(ch, {})
+                node[_WILD if wild else _END] = {}
+        self.pattern = re.compile(r"\b" + _trie_regex(trie)) if trie else None
+        self._bits = {}
+
+    def _match_bits(self, match: str) -> int:
+        bits = self._bits.get(match)
+        if bits is None:
+            bits = self.exact.get(match, 0)
+            for k in range(len(match), 0, -1):
+                bits |= self.stems.get(match[:k], 0)
+            self._bits[match] = bits
+        return bits
+
+    def count_matrix(self, texts) -> np.ndarray:
+        """(len(texts), lexicons) hit counts; missing texts score 0."""
+        out = np.zeros((len(texts), len(self.names)), dtype=np.int32)
+        if self.pattern is None:
+            return out
+        lex = np.arange(len(self.names))
+        for row, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            for match in self.pattern.findall(" ".join(text.lower().split())):
+                bits = self._match_bits(match)
+                out[row] += (bits >> lex) & 1
+        return out
+
+
+# ----------------------------
+# Mergeable counts
+# ----------------------------
+class LexiconCounts:
+    """
+    Per (text column, female?-race-mask cell): profiles, words, and per
+    lexicon the profiles with at least one hit and the total hits.
+    """
+
+    def __init__(self, lexicons, cols=TEXT_COLS):
+        self.lexicons = list(lexicons)
+        self.cols = list(cols)
+        shape = (len(self.cols), N_CELLS)
+        self.n = np.zeros(shape, dtype=np.int64)
+        self.words = np.zeros(shape, dtype=np.int64)
+        self.docs = np.zeros(shape + (len(self.lexicons),), dtype=np.int64)
+        self.hits = np.zeros(shape + (len(self.lexicons),), dtype=np.int64)
+
+    def update(self, df: pd.DataFrame, matcher: LexiconMatcher):
+        cells = cell_codes(df)
+        for j, col in enumerate(self.cols):
+            # Score each distinct string once and broadcast through the codes
+            codes, uniques = pd.factorize(df[col])
+            ok = codes >= 0
+            counts = matcher.count_matrix(list(uniques))
+            words = pd.Series(uniques, dtype=object).str.count(r"\S+").to_numpy(dtype=np.int64)
+            c, rows = cells[ok], codes[ok]
+            self.n[j] += np.bincount(c, minlength=N_CELLS)
+            self.words[j] += np.bincount(c, weights=words[rows], minlength=N_CELLS).astype(np.int64)
+            for k in range(len(self.lexicons)):
+                hits = counts[rows, k]
+                self.docs[j, :, k] += np.bincount(c, weights=hits > 0, minlength=N_CELLS).astype(np.int64)
+                self.hits[j, :, k] += np.bincount(c, weights=hits, minlength=N_CELLS).astype(np.int64)
+        return self
+
+    def merge(self, other: "LexiconCounts"):
+        for name in ("n", "words", "docs", "hits"):
+            getattr(self, name)[...] += getattr(other, name)
+        return self
+
+
+def count_file(path, lexicons: dict, cols=TEXT_COLS, memory_mb: float = MEMORY_LIMIT_MB) -> LexiconCounts:
+    matcher = LexiconMatcher(lexicons)
+    counts = LexiconCounts(lexicons, cols)
+    for df in iter_profile_chunks(path, usecols=DEMOGRAPHIC_COLS + list(cols), memory_mb=memory_mb):
+        counts.update(df, matcher)
+    return counts
+
+
+def count_model_lexicons(lexicons: dict, models=MODELS, profiles_dir=PROFILES_DIR, cols=TEXT_COLS,
+                         memory_mb: float = MEMORY_LIMIT_MB, workers=None) -> dict:
+    """{model: [(occupation, LexiconCounts), ...]} in `profile_files` order (see count_model_files)."""
+    results = raise_failures(map_profile_files(
+        count_file, models, profiles_dir, workers=workers, lexicons=lexicons, cols=cols, memory_mb=memory_mb))
+    return group_by_model(results, models)
@@ -0,0 +1,252 @@
+"""
+Incremental counts for result files that are still being written.
+
+`LiveCounts` tails profile CSVs (e.g. the DeepSeek driver appending to
+profiles/deepseek/<career>_deepseek.csv) and batch-result JSONL files
+(OpenAI / Mistral `custom_id` + `response.body`, Vertex `instance_id` +
+`response` / `predictions`) from a saved byte offset. Each `poll()` reads only
+what was appended since the last one, stops at the last complete record (a
+half-written line is picked up next time) and folds the new rows into a
+2 x 16 (female?, race mask) histogram per (model, occupation), the same
+`DemographicCounts` the batch scripts use.
+
+    live = LiveCounts.load()
+    live.poll(["profiles/deepseek/*.csv"])
+    live.poll(["downloads/batch_123.jsonl"], model="openai")
+    live.save()
+    live.table()          # n, parse errors, shares and differences vs BLS
+
+Offsets and counts are kept per file, so a file that was truncated or
+rewritten is recounted from the start without double counting. State lives
+in analysis/.cache/live/state.json.
+"""
+import csv
+import glob
+import io
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .demographics import N_MASKS, DemographicCounts
+from .intervals import CATEGORIES, category_counts
+from .profile_reader import CACHE_DIR, MODELS, PROFILE_COLS, canonicalize_occupation
+
+LIVE_STATE = CACHE_DIR / "live" / "state.json"
+READ_BLOCK = 1 << 24   # bytes read per file per poll (the rest waits for the next one)
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+# ----------------------------
+# Record parsing
+# ----------------------------
+def complete_csv_records(data: bytes) -> int:
+    """
+    Length of the prefix of `data` made of complete CSV records: it must end
+    in a newline that is not inside a quoted field.
+    """
+    end = last = 0
+    in_quotes = False
+    for line in data.split(b"\n")[:-1]:
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        end += len(line) + 1
+        if not in_quotes:
+            last = end
+    return last
+
+
+def occupation_from_id(request_id: str) -> str:
+    """'computerprogrammer_profile_42' / 'nurse17' -> 'computerprogrammer' / 'nurse'."""
+    return canonicalize_occupation("".join(ch for ch in request_id if ch.isalpha()), "")
+
+
+def _response_text(obj: dict) -> str:
+    """Message text of one batch-result line (OpenAI/Mistral or Vertex shape)."""
+    body = (obj.get("response") or {}).get("body")
+    if isinstance(body, dict):
+        return body["choices"][0]["message"]["content"]
+    response = obj.get("response") or obj.get("predictions")
+    if isinstance(response, list):
+        response = response[0]
+    return response["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def parse_result_line(line: str):
+    """(occupation, gender, ethnicity) from one JSONL result line; raises on a bad line."""
+    obj = json.loads(line)
+    request_id = obj.get("custom_id") or obj.get("instance_id") or ""
+    profile = json.loads(_FENCE_RE.sub("", _response_text(obj).strip()))
+    ethnicity = profile.get("ethnicity", "")
+    if isinstance(ethnicity, list):
+        ethnicity = ", ".join(ethnicity)
+    return occupation_from_id(request_id), profile["gender"], ethnicity
+
+
+# ----------------------------
+# Tailing state
+# ----------------------------
+class _FileState:
+    """Offset and counts contributed by one tailed file."""
+
+    def __init__(self, model, offset=0, header=None, counts=None, errors=None):
+        self.model = model
+        self.offset = offset
+        self.header = header
+        self.counts = {occ: np.asarray(c, dtype=np.int64).reshape(2, N_MASKS) for occ, c in (counts or {}).items()}
+        self.errors = dict(errors or {})
+
+    def add(self, occupation, df):
+        c = DemographicCounts()
+        c.update(df)
+        self.counts[occupation] = self.counts.get(occupation, 0) + c.joint
+
+    def to_json(self):
+        return {"model": self.model, "offset": self.offset, "header": self.header,
+                "counts": {occ: c.ravel().tolist() for occ, c in self.counts.items()},
+                "errors": self.errors}
+
+
+def _expand(paths):
+    files = []
+    for p in paths:
+        p = str(p)
+        if os.path.isdir(p):
+            files += sorted(glob.glob(os.path.join(p, "*.csv")) + glob.glob(os.path.join(p, "*.jsonl")))
+        else:
+            files += sorted(glob.glob(p)) or [p]
+    return [Path(f).resolve() for f in files]
+
+
+def _guess_model(path: Path) -> str:
+    for part in reversed(path.parts[:-1]):
+        if part in MODELS:
+            return part
+    return next((m for m in MODELS if m in path.stem.lower()), "unknown")
+
+
+class LiveCounts:
+    """Running (model, occupation) counts over a set of growing files."""
+
+    def __init__(self, files=None, state_file: Path = LIVE_STATE):
+        self.files = files or {}
+        self.state_file = Path(state_file)
+
+    @classmethod
+    def load(cls, state_file: Path = LIVE_STATE):
+        try:
+            with open(state_file, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            raw = {}
+        return cls({path: _FileState(**s) for path, s in raw.items()}, state_file)
+
+    def save(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({path: s.to_json() for path, s in self.files.items()}, f)
+        os.replace(tmp, self.state_file)
+
+    # ---- reading ----
+    def poll(self, paths, model=None) -> int:
+        """Read whatever was appended to `paths` (files, dirs or globs); returns new records."""
+        new = 0
+        for path in _expand(paths):
+            if not path.exists():
+                continue
+            state = self.files.get(str(path))
+            size = path.stat().st_size
+            if state is None or size < state.offset:   # new, or truncated/rewritten
+                state = self.files[str(path)] = _FileState(model or _guess_model(path))
+            if size == state.offset:
+                continue
+            with open(path, "rb") as f:
+                f.seek(state.offset)
+                data = f.read(READ_BLOCK)
+            if path.suffix.lower() == ".jsonl":
+                new += self._read_jsonl(state, data)
+            else:
+                new += self._read_csv(state, data, canonicalize_occupation(path.name, state.model))
+        return new
+
+    def _read_csv(self, state, data, occupation) -> int:
+        end = complete_csv_records(data)
+        if end == 0:
+            return 0
+        rows = list(csv.reader(io.StringIO(data[:end].decode("utf-8", errors="replace"))))
+        if state.header is None and rows:
+            # Files written by the generation scripts may or may not start with a header
+            state.header = PROFILE_COLS
+            if [c.strip().lower() for c in rows[0]] == PROFILE_COLS:
+                rows = rows[1:]
+        width = len(state.header)
+        good = [r for r in rows if len(r) == width]
+        if len(good) < len(rows):
+            state.errors[occupation] = state.errors.get(occupation, 0) + len(rows) - len(good)
+        if good:
+            state.add(occupation, pd.DataFrame(good, columns=state.header)[["gender", "ethnicity"]])
+        state.offset += end
+        return len(rows)
+
+    def _read_jsonl(self, state, data) -> int:
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        parsed, lines = [], data[:end].decode("utf-8", errors="replace").splitlines()
+        for line in filter(str.strip, lines):
+            try:
+                parsed.append(parse_result_line(line))
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                # Unparseable response: counted against the occupation if we can tell which
+                try:
+                    obj = json.loads(line)
+                    occ = occupation_from_id(obj.get("custom_id") or obj.get("instance_id") or "")
+                except ValueError:
+                    occ = ""
+                state.errors[occ or "unknown"] = state.errors.get(occ or "unknown", 0) + 1
+        if parsed:
+            df = pd.DataFrame(parsed, columns=["occupation", "gender", "ethnicity"])
+            for occ, group in df.groupby("occupation", sort=False):
+                state.add(occ, group)
+        state.offset += end
+        return sum(1 for line in lines if line.strip())
+
+    # ---- reporting ----
+    def totals(self):
+        """{(model, occupation): (2 x 16 joint histogram, parse errors)} over all files."""
+        out = {}
+        for s in self.files.values():
+            for occ in set(s.counts) | set(s.errors):
+                joint, errors = out.get((s.model, occ), (np.zeros((2, N_MASKS), dtype=np.int64), 0))
+                out[(s.model, occ)] = (joint + s.counts.get(occ, 0), errors + s.errors.get(occ, 0))
+        return out
+
+    def table(self, bls: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        One row per (model, occupation): records, parse errors, category
+        shares (%) and, given `bls` (results_vs_BLS.load_bls), differences
+        from BLS in percentage points.
+        """
+        totals = self.totals()
+        keys = sorted(totals)
+        if not keys:
+            return pd.DataFrame(columns=["model", "occupation", "n", "errors", "error_pct"])
+        joint = np.stack([totals[k][0] for k in keys])
+        n = joint.sum(axis=(1, 2))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = 100 * category_counts(joint) / n[:, None]
+        df = pd.DataFrame({"model": [m for m, _ in keys], "occupation": [o for _, o in keys], "n": n,
+                           "errors": [totals[k][1] for k in keys]})
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df["error_pct"] = (100 * df["errors"] / (df["n"] + df["errors"])).round(1)
+        for i, c in enumerate(CATEGORIES):
+            df[f"p_{c}"] = shares[:, i].round(1)
+        if bls is not None:
+            base = bls.set_index("occupation").reindex(df["occupation"])
+            for c in CATEGORIES:
+                df[f"diff_p_{c}"] = (df[f"p_{c}"] - base[f"bls_p_{c}"].to_numpy()).round(1)
+        return df
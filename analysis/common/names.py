@@ -0,0 +1,267 @@
+"""
+Streaming name statistics with mergeable sketches.
+
+Names are cleaned once per distinct value (honorifics such as "Dr." or
+"Mrs" stripped, first / last token split off), each chunk is reduced to its
+own value counts, and those counts feed three fixed-size sketches:
+
+- `SpaceSaving`     top-k names with a per-name overcount bound
+- `CountMinSketch`  frequency of any name (never underestimates)
+- `HyperLogLog`     number of distinct names (~0.8% standard error at p=14)
+
+All three merge exactly (sum / max of their arrays, Space-Saving by the
+mergeable-summaries rule), so per-file sketches combine into per-model,
+per-occupation or overall figures without another pass over the profiles:
+
+    sketches = count_model_names(["gemini", "openai"])     # {model: [(occupation, NameSketch)]}
+    total = NameSketch.combine(s for files in sketches.values() for _, s in files)
+    total.top["first"].result(10)                          # name, count, error
+    total.distinct["full"].estimate()
+"""
+import math
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .parallel import group_by_model, map_profile_files, raise_failures
+from .profile_reader import MODELS, PROFILES_DIR
+
+TOP_CAPACITY = 1000      # names tracked per Space-Saving summary
+HLL_PRECISION = 14       # 2**14 registers (16 KB) per HyperLogLog
+CM_WIDTH = 1 << 12
+CM_DEPTH = 4
+HONORIFIC_RE = r"^(?:\s*(?:dr|mr|mrs|ms|mx|miss|prof|rev)(?:\.\s*|\s+))+"
+FIELDS = ["full", "first", "last"]
+
+_HLL_KEY = "hyperloglog-name"   # hash_array keys must be 16 characters
+
+
+def _hash(values, key: str) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object), hash_key=key, categorize=False)
+
+
+# ----------------------------
+# Name cleaning
+# ----------------------------
+def split_names(names: pd.Series) -> pd.DataFrame:
+    """
+    full / first / last name per row, honorifics stripped. Work is done on the
+    distinct names only and broadcast back through their codes. `last` is the
+    final token and is missing for one-word names.
+    """
+    codes, uniques = pd.factorize(names)
+    full = (pd.Series(uniques, dtype=object).astype(str)
+            .str.replace(HONORIFIC_RE, "", case=False, regex=True)
+            .str.split().str.join(" "))
+    full = full.where(full != "")
+    first = full.str.split(n=1).str[0]
+    last = full.str.rsplit(n=1).str[-1].where(full.str.contains(" ", na=False))
+    table = pd.DataFrame({"full": full, "first": first, "last": last})
+    # The extra trailing row catches code -1 (missing names)
+    table = pd.concat([table, pd.DataFrame({c: [np.nan] for c in FIELDS})], ignore_index=True)
+    return table.iloc[codes].reset_index(drop=True)
+
+
+def _value_counts(values: pd.Series) -> pd.Series:
+    vc = values.value_counts()
+    vc.index = vc.index.astype(object)
+    return vc.astype(np.int64)
+
+
+# ----------------------------
+# Sketches
+# ----------------------------
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary of at most `capacity` names. `counts` may
+    overestimate a name by up to its `errors` entry; any name not kept has a
+    true count of at most `floor`. capacity=None keeps every name (exact
+    counts, floor 0).
+    """
+
+    def __init__(self, capacity: Optional[int] = TOP_CAPACITY):
+        self.capacity = capacity
+        self.n = 0
+        self.counts = pd.Series(dtype="int64")
+        self.errors = pd.Series(dtype="int64")
+
+    @property
+    def floor(self) -> int:
+        if self.capacity is None or len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def update_counts(self, counts: pd.Series):
+        """Add exact counts (e.g. one chunk's `value_counts`)."""
+        exact = SpaceSaving(capacity=None)
+        exact.n, exact.counts = int(counts.sum()), counts.astype(np.int64)
+        exact.errors = pd.Series(0, index=counts.index, dtype="int64")
+        return self.merge(exact)
+
+    def update(self, values):
+        return self.update_counts(_value_counts(pd.Series(values)))
+
+    def merge(self, other: "SpaceSaving"):
+        index = self.counts.index.union(other.counts.index)
+        fa, fb = self.floor, other.floor
+        counts = (self.counts.reindex(index, fill_value=fa) + other.counts.reindex(index, fill_value=fb))
+        errors = (self.errors.reindex(index, fill_value=fa) + other.errors.reindex(index, fill_value=fb))
+        keep = counts.sort_index(kind="stable").sort_values(ascending=False, kind="stable").index[:self.capacity]
+        self.counts, self.errors = counts[keep].astype(np.int64), errors[keep].astype(np.int64)
+        self.n += other.n
+        return self
+
+    def result(self, k: int = None) -> pd.DataFrame:
+        """Top `k` names: count (upper bound), error and share of all names seen."""
+        out = pd.DataFrame({"name": self.counts.index, "count": self.counts.to_numpy(),
+                            "error": self.errors.to_numpy()})
+        out["share"] = out["count"] / self.n if self.n else np.nan
+        return out.head(k).reset_index(drop=True) if k else out
+
+
+class CountMinSketch:
+    """Count-Min sketch; `query` overestimates by at most ~e * n / width (w.p. 1 - e^-depth)."""
+
+    def __init__(self, width: int = CM_WIDTH, depth: int = CM_DEPTH):
+        self.width, self.depth = width, depth
+        self.n = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, values) -> np.ndarray:
+        return np.stack([_hash(values, f"countminrow{d:05d}") % np.uint64(self.width)
+                         for d in range(self.depth)]).astype(np.intp)
+
+    def update_counts(self, counts: pd.Series):
+        if len(counts):
+            weights = counts.to_numpy(dtype=np.int64)
+            for d, cols in enumerate(self._columns(counts.index)):
+                self.table[d] += np.bincount(cols, weights=weights, minlength=self.width).astype(np.int64)
+            self.n += int(weights.sum())
+        return self
+
+    def query(self, names) -> np.ndarray:
+        names = list(names)
+        if not names:
+            return np.zeros(0, dtype=np.int64)
+        cols = self._columns(names)
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+    def merge(self, other: "CountMinSketch"):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches of different shapes cannot be merged.")
+        self.table += other.table
+        self.n += other.n
+        return self
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes (p >= 11)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 11 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 11 and 18.")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        values = pd.unique(pd.Series(values, dtype=object).dropna())
+        if len(values) == 0:
+            return self
+        h = _hash(values, _HLL_KEY)
+        bits = 64 - self.precision
+        index = (h >> np.uint64(bits)).astype(np.intp)
+        rest = (h & np.uint64((1 << bits) - 1)).astype(np.float64)   # < 2**53: exact in a float
+        # rank = position of the leftmost 1 bit in the remaining `bits` bits
+        rank = (bits + 1 - np.frexp(rest)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLogs of different precision cannot be merged.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)   # small-range (linear counting) correction
+        return float(raw)
+
+
+# ----------------------------
+# Per-file bundle
+# ----------------------------
+class NameSketch:
+    """
+    Mergeable name statistics for one file (or several): Space-Saving top
+    names for full / first / last names and for every name part (the word
+    clouds), Count-Min frequencies for first and last names, and HyperLogLog
+    distinct counts for full / first / last names.
+    """
+
+    def __init__(self, capacity: int = TOP_CAPACITY, precision: int = HLL_PRECISION):
+        self.n = 0
+        self.top = {f: SpaceSaving(capacity) for f in FIELDS + ["part"]}
+        self.freq = {f: CountMinSketch() for f in ["first", "last"]}
+        self.distinct = {f: HyperLogLog(precision) for f in FIELDS}
+
+    def update(self, names: pd.Series):
+        self.n += len(names)
+        parts = split_names(names)
+        for f in FIELDS:
+            counts = _value_counts(parts[f])
+            self.top[f].update_counts(counts)
+            if f in self.freq:
+                self.freq[f].update_counts(counts)
+            self.distinct[f].update(counts.index)
+        self.top["part"].update_counts(_value_counts(parts["full"].str.split().explode()))
+        return self
+
+    def merge(self, other: "NameSketch"):
+        self.n += other.n
+        for group in ("top", "freq", "distinct"):
+            mine, theirs = getattr(self, group), getattr(other, group)
+            for f in mine:
+                mine[f].merge(theirs[f])
+        return self
+
+    @classmethod
+    def combine(cls, sketches):
+        out = cls()
+        for s in sketches:
+            out.merge(s)
+        return out
+
+    def summary(self) -> dict:
+        return {"n": self.n, **{f"distinct_{f}": round(self.distinct[f].estimate()) for f in FIELDS}}
+
+
+def count_names(path, memory_mb: float = MEMORY_LIMIT_MB) -> NameSketch:
+    sketch = NameSketch()
+    for df in iter_profile_chunks(path, usecols=["name"], memory_mb=memory_mb):
+        sketch.update(df["name"])
+    return sketch
+
+
+def count_model_names(models=MODELS, profiles_dir=PROFILES_DIR, memory_mb: float = MEMORY_LIMIT_MB,
+                      workers=None) -> dict:
+    """{model: [(occupation, NameSketch), ...]} in `profile_files` order (see count_model_files)."""
+    results = raise_failures(map_profile_files(
+        count_names, models, profiles_dir, workers=workers, memory_mb=memory_mb))
+    return group_by_model(results, models)
+
+
+if __name__ == "__main__":
+    # python -m common.names [model ...]  (from analysis/): distinct names and top first names
+    models = sys.argv[1:] or MODELS
+    for model, files in count_model_names(models).items():
+        total = NameSketch.combine(s for _, s in files)
+        print(f"{model}: {total.summary()}")
+        print(total.top["first"].result(5).to_string(index=False))
@@ -0,0 +1,246 @@
+"""
+Near-duplicate profiles across models and occupations (MinHash + LSH).
+
+Each profile's document is its motivations + biography, lowercased and
+tokenized, with the row's own name tokens replaced by one placeholder, so
+profiles that differ only in the name are identical. Per file (one worker
+each, streamed in chunks under the memory ceiling) documents are deduplicated
+exactly by a polynomial hash of their token sequence, and every distinct
+document gets a MinHash signature over its word `SHINGLE_N`-grams (hashed as
+in common/diversity.py; NUM_PERM 32-bit multiply-shift hashes).
+
+Signatures of all files are then banded (LSH): documents sharing a band land
+in the same bucket, each bucket member is checked against the bucket's first
+document (estimated Jaccard >= threshold), and connected components of the
+verified pairs are the duplicate clusters. Bucket-star checks keep the work
+linear even for the huge buckets the templated models produce; pairs missed
+in one band are usually linked through another.
+
+    dups = find_near_duplicates(threshold=0.8)
+    dups.cell_rates()     # per (model, occupation): exact and near-duplicate %
+    dups.clusters()       # one row per cluster with >= 2 profiles
+"""
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .diversity import HASH_MIX, TEXT_COLS, TOKEN_RE, ngram_hashes
+from .parallel import map_profile_files, raise_failures
+from .profile_reader import MODELS, PROFILES_DIR
+
+THRESHOLD = 0.8
+NUM_PERM = 64
+SHINGLE_N = 3
+SEED = 0
+BLOCK = 1 << 16          # shingles per MinHash block (x NUM_PERM values in memory)
+
+_TOKEN_KEY = "neardup-tokens00"   # hash_array keys must be 16 characters
+_NAME_TOKEN = np.uint64(0x4E414D45)
+_EMPTY = np.iinfo(np.uint32).max
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM):
+    """(bands, rows) with bands * rows = num_perm and the largest (1/b)^(1/r) <= threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1])) if below else options[-1]
+
+
+def _perm_params(num_perm: int, seed: int = SEED):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)   # odd
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _token_hashes(tokens: pd.Series):
+    """(uint64 hash per token, row per token) for a Series of token lists."""
+    lengths = tokens.str.len().fillna(0).to_numpy(dtype=np.intp)
+    flat = tokens.explode().dropna().to_numpy(dtype=object)
+    h = pd.util.hash_array(flat, hash_key=_TOKEN_KEY, categorize=False) if len(flat) else np.zeros(0, np.uint64)
+    return h, np.repeat(np.arange(len(lengths)), lengths), lengths
+
+
+# ----------------------------
+# Per-file signatures
+# ----------------------------
+def minhash(shingles, docs, n_docs: int, num_perm: int = NUM_PERM) -> np.ndarray:
+    """(n_docs, num_perm) uint32 signatures; `docs` (sorted) gives each shingle's document."""
+    a, b = _perm_params(num_perm)
+    sig = np.full((n_docs, num_perm), _EMPTY, dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(shingles), BLOCK):
+            h, d = shingles[start:start + BLOCK], docs[start:start + BLOCK]
+            values = ((h[:, None] * a + b) >> np.uint64(32)).astype(np.uint32)
+            first = np.flatnonzero(np.r_[True, d[1:] != d[:-1]])
+            rows = d[first]
+            sig[rows] = np.minimum(sig[rows], np.minimum.reduceat(values, first, axis=0))
+    return sig
+
+
+def _chunk_documents(df, cols):
+    """(masked token hashes, row per token, order-sensitive key per row) for one chunk."""
+    text = df[cols[0]].fillna("").astype(str)
+    for c in cols[1:]:
+        text = text + " " + df[c].fillna("").astype(str)
+    th, rows, lengths = _token_hashes(text.str.lower().str.findall(TOKEN_RE))
+    nh, nrows, _ = _token_hashes(df["name"].fillna("").astype(str).str.lower().str.findall(TOKEN_RE))
+
+    with np.errstate(over="ignore"):
+        # Mask each row's own name tokens
+        th = np.where(np.isin(th * HASH_MIX + rows.astype(np.uint64), nh * HASH_MIX + nrows.astype(np.uint64)),
+                      _NAME_TOKEN, th)
+        # Order-sensitive key per row: sum of token hash * P**position (mod 2**64)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        pos = np.arange(len(th)) - starts[rows]
+        powers = np.cumprod(np.full(max(int(lengths.max(initial=0)), 1), HASH_MIX))
+        keys = np.zeros(len(df), dtype=np.uint64)
+        nonempty = lengths > 0
+        if nonempty.any():
+            keys[nonempty] = np.add.reduceat(th * powers[pos], starts[nonempty])
+    return th, rows, keys
+
+
+def file_signatures(path, cols=TEXT_COLS, num_perm: int = NUM_PERM, shingle_n: int = SHINGLE_N,
+                    memory_mb: float = MEMORY_LIMIT_MB) -> dict:
+    """
+    Distinct documents of one profile CSV: their content keys, MinHash
+    signatures, how many rows each covers and the first row holding it.
+    Only a chunk's documents not seen in earlier chunks are shingled.
+    """
+    row_keys, doc_keys, sigs = [], [np.zeros(0, dtype=np.uint64)], []
+    for df in iter_profile_chunks(path, usecols=["name"] + list(cols), memory_mb=memory_mb, categorical=False):
+        th, rows, keys = _chunk_documents(df, list(cols))
+        row_keys.append(keys)
+        new, first = np.unique(keys, return_index=True)
+        fresh = ~np.isin(new, np.concatenate(doc_keys))
+        new, first = new[fresh], first[fresh]
+
+        # Shingles of the new distinct documents only
+        doc_of_row = np.full(len(df), -1)
+        doc_of_row[first] = np.arange(len(new))
+        keep = doc_of_row[rows] >= 0
+        h, hd = ngram_hashes(th[keep], doc_of_row[rows[keep]], shingle_n)
+        order = np.argsort(hd, kind="stable")
+        sigs.append(minhash(h[order], hd[order], len(new), num_perm))
+        doc_keys.append(new)
+
+    doc_keys = np.concatenate(doc_keys)
+    sig = np.concatenate(sigs) if sigs else np.zeros((0, num_perm), dtype=np.uint32)
+    keys, first_row, inverse, counts = np.unique(np.concatenate(row_keys) if row_keys else doc_keys,
+                                                 return_index=True, return_inverse=True, return_counts=True)
+    # np.unique sorts the keys; put the signatures in the same order
+    return {"keys": keys, "sig": sig[np.argsort(doc_keys)], "counts": counts, "first_row": first_row,
+            "row_doc": inverse}
+
+
+# ----------------------------
+# Clustering
+# ----------------------------
+def _components(n: int, u, v) -> np.ndarray:
+    """Connected-component label (smallest member) per node, by min-label propagation."""
+    labels = np.arange(n)
+    while len(u):
+        old = labels.copy()
+        low = np.minimum(labels[u], labels[v])
+        np.minimum.at(labels, u, low)
+        np.minimum.at(labels, v, low)
+        labels = labels[labels]           # pointer jumping
+        if np.array_equal(labels, old):
+            break
+    return labels
+
+
+def lsh_pairs(sig, threshold: float, bands: int, rows: int, chunk: int = 1 << 18):
+    """Verified (u, v) pairs: every bucket member against the bucket's first document."""
+    valid = sig[:, 0] != _EMPTY
+    coef = _perm_params(rows, seed=SEED + 1)[0]
+    us, vs = [], []
+    with np.errstate(over="ignore"):
+        for band in range(bands):
+            key = (sig[:, band * rows:(band + 1) * rows].astype(np.uint64) * coef).sum(axis=1)
+            idx = np.flatnonzero(valid)
+            idx = idx[np.argsort(key[idx], kind="stable")]
+            k = key[idx]
+            new = np.r_[True, k[1:] != k[:-1]]
+            head = idx[np.maximum.accumulate(np.where(new, np.arange(len(idx)), 0))]
+            u, v = head[~new], idx[~new]
+            for s in range(0, len(u), chunk):
+                cu, cv = u[s:s + chunk], v[s:s + chunk]
+                ok = (sig[cu] == sig[cv]).mean(axis=1) >= threshold
+                us.append(cu[ok])
+                vs.append(cv[ok])
+    if not us:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    return np.concatenate(us), np.concatenate(vs)
+
+
+class NearDuplicates:
+    """Cluster label for every distinct document, with per-file row counts."""
+
+    def __init__(self, files, per_file, labels):
+        self.files = files                    # [(model, occupation)]
+        self.per_file = per_file              # [{"doc": global doc ids, "counts": rows, "first_row": ...}]
+        self.labels = labels                  # cluster per global doc
+
+    def cell_rates(self) -> pd.DataFrame:
+        records = []
+        for (model, occ), f in zip(self.files, self.per_file):
+            n = int(f["counts"].sum())
+            clusters = self.labels[f["doc"]]
+            records.append({"model": model, "occupation": occ, "n": n,
+                            "exact_dup_pct": 100 * (1 - len(f["doc"]) / n) if n else np.nan,
+                            "near_dup_pct": 100 * (1 - len(np.unique(clusters)) / n) if n else np.nan})
+        df = pd.DataFrame(records)
+        # Rows whose cluster also occurs in another (model, occupation)
+        cluster_cells = pd.DataFrame({"cell": np.repeat(np.arange(len(self.files)),
+                                                        [len(f["doc"]) for f in self.per_file]),
+                                      "cluster": np.concatenate([self.labels[f["doc"]] for f in self.per_file]),
+                                      "rows": np.concatenate([f["counts"] for f in self.per_file])})
+        spread = cluster_cells.groupby("cluster")["cell"].nunique()
+        cluster_cells["shared"] = cluster_cells["cluster"].map(spread).to_numpy() > 1
+        shared = cluster_cells[cluster_cells["shared"]].groupby("cell")["rows"].sum()
+        df["cross_cell_pct"] = 100 * shared.reindex(range(len(df)), fill_value=0).to_numpy() / df["n"]
+        return df
+
+    def clusters(self, min_rows: int = 2) -> pd.DataFrame:
+        """One row per cluster covering >= min_rows profiles, largest first, with a representative row."""
+        parts = []
+        for i, f in enumerate(self.per_file):
+            parts.append(pd.DataFrame({"file": i, "cluster": self.labels[f["doc"]], "doc": f["doc"],
+                                       "rows": f["counts"], "first_row": f["first_row"]}))
+        df = pd.concat(parts, ignore_index=True)
+        df["model"] = [self.files[i][0] for i in df["file"]]
+        df["occupation"] = [self.files[i][1] for i in df["file"]]
+        grouped = df.groupby("cluster")
+        out = pd.DataFrame({
+            "rows": grouped["rows"].sum(),
+            "distinct_docs": grouped["doc"].nunique(),
+            "cells": grouped["file"].nunique(),
+            "models": grouped["model"].agg(lambda s: ",".join(sorted(set(s)))),
+            "occupations": grouped["occupation"].agg(lambda s: ",".join(sorted(set(s)))),
+        })
+        rep = df.sort_values("rows", ascending=False, kind="stable").drop_duplicates("cluster").set_index("cluster")
+        out["example_file"] = [self.files[i] for i in rep.loc[out.index, "file"]]
+        out["example_row"] = rep.loc[out.index, "first_row"].to_numpy()
+        out = out[out["rows"] >= min_rows].sort_values("rows", ascending=False, kind="stable")
+        return out.reset_index(drop=True).rename_axis("cluster").reset_index()
+
+
+def find_near_duplicates(models=MODELS, profiles_dir=PROFILES_DIR, threshold: float = THRESHOLD,
+                         num_perm: int = NUM_PERM, shingle_n: int = SHINGLE_N, memory_mb: float = MEMORY_LIMIT_MB,
+                         workers=None) -> NearDuplicates:
+    results = raise_failures(map_profile_files(
+        file_signatures, models, profiles_dir, workers=workers, num_perm=num_perm, shingle_n=shingle_n,
+        memory_mb=memory_mb))
+    files = [r.key for r in results]
+    # Exact duplicates across files share a key and become one global document
+    keys, inverse = np.unique(np.concatenate([r.value["keys"] for r in results]), return_inverse=True)
+    sig = np.empty((len(keys), num_perm), dtype=np.uint32)
+    sig[inverse] = np.concatenate([r.value["sig"] for r in results])
+    bounds = np.cumsum([0] + [len(r.value["keys"]) for r in results])
+    per_file = [{"doc": inverse[bounds[i]:bounds[i + 1]], "counts": r.value["counts"],
+                 "first_row": r.value["first_row"]} for i, r in enumerate(results)]
+    bands, rows = lsh_bands(threshold, num_perm)
+    u, v = lsh_pairs(sig, threshold, bands, rows)
+    return NearDuplicates(files, per_file, _components(len(keys), u, v))
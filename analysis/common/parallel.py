@@ -0,0 +1,114 @@
+"""
+Process-pool map for the per-file analysis loops.
+
+    results = map_profile_files(process_file, ["openai", "mistral"])
+    for r in results:            # same order as profile_files(), per model
+        if r.ok:
+            use(r.key, r.value)   # key = (model, occupation)
+    report_failures(results)
+
+- `fn` runs in worker processes, so it must be a module-level function (and
+  scripts calling this need an `if __name__ == "__main__":` guard).
+- Results always come back in input order, whatever order workers finish in.
+- An exception in one file is captured (with its traceback) in that file's
+  `TaskResult` instead of stopping the run or being swallowed.
+- The worker count defaults to `WORKERS` (env: ANALYSIS_WORKERS, else the
+  number of CPUs); 1 runs everything in-process, which is easier to debug.
+"""
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from .profile_reader import MODELS, PROFILES_DIR, profile_files
+
+WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0")) or os.cpu_count() or 1
+
+
+@dataclass
+class TaskResult:
+    key: Any
+    value: Any = None
+    error: str = None      # formatted traceback if the task raised
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FileErrors(RuntimeError):
+    """Raised by `raise_failures` with every failed task attached."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        keys = ", ".join(str(f.key) for f in failures)
+        super().__init__(f"{len(failures)} file(s) failed: {keys}\n\n" + "\n".join(f.error for f in failures))
+
+
+def _call(fn, item, kwargs):
+    try:
+        return fn(item, **kwargs), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def parallel_map(fn, items, workers=None, keys=None, **kwargs):
+    """
+    [TaskResult] for `fn(item, **kwargs)` over `items`, in input order.
+    `keys` (default: the items themselves) label each result.
+    """
+    items = list(items)
+    keys = items if keys is None else list(keys)
+    workers = max(1, min(workers or WORKERS, len(items)))
+
+    if workers == 1:
+        outcomes = [_call(fn, item, kwargs) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_call, fn, item, kwargs) for item in items]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception:
+                    # The task never ran to completion (worker died, unpicklable result, ...)
+                    outcomes.append((None, traceback.format_exc()))
+
+    return [TaskResult(key, value, error) for key, (value, error) in zip(keys, outcomes)]
+
+
+def map_profile_files(fn, models=MODELS, profiles_dir=PROFILES_DIR, workers=None, **kwargs):
+    """
+    Run `fn(path, **kwargs)` for every profile CSV of `models`. Each result is
+    keyed by (model, occupation), ordered by model and then `profile_files`.
+    """
+    tasks = [((model, occupation), path) for model in models
+             for occupation, path in profile_files(model, profiles_dir)]
+    return parallel_map(fn, [path for _, path in tasks], workers=workers,
+                        keys=[key for key, _ in tasks], **kwargs)
+
+
+def group_by_model(results, models) -> dict:
+    """{model: [(occupation, value), ...]} from `map_profile_files` results, in the same order."""
+    out = {model: [] for model in models}
+    for r in results:
+        model, occupation = r.key
+        out[model].append((occupation, r.value))
+    return out
+
+
+def report_failures(results) -> int:
+    """Print the error of every failed task; returns how many failed."""
+    failures = [r for r in results if not r.ok]
+    for r in failures:
+        print(f"Error with {r.key}:\n{r.error}")
+    return len(failures)
+
+
+def raise_failures(results):
+    """Raise `FileErrors` if any task failed."""
+    failures = [r for r in results if not r.ok]
+    if failures:
+        raise FileErrors(failures)
+    return results
@@ -0,0 +1,214 @@
+"""
+Byte-offset row index for the profile CSVs.
+
+Each profile CSV holds ~10,000 rows whose motivations/biography fields are
+quoted and may contain newlines, so a row cannot be found by counting lines.
+`build_row_index` scans the memory-mapped bytes once, SCAN_BLOCK bytes at a
+time (vectorized with NumPy, carrying the quote parity from block to block),
+keeps only the newlines that fall outside quotes, and records the byte span of
+every row.
+The spans are cached in a sidecar file next to the CSV
+(`<name>.csv.rowidx.npz`) and rebuilt automatically whenever the CSV's size or
+mtime changes.
+
+With the index we can:
+- read any row (or set of rows) without parsing the rows before it
+- split one CSV into byte ranges that start/end on row boundaries, so the
+  ranges can be parsed independently (in parallel)
+- sample k rows uniformly without a reservoir pass over the file
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INDEX_SUFFIX = ".rowidx.npz"
+INDEX_VERSION = 1
+SCAN_BLOCK = 16 << 20   # bytes scanned at a time by build_row_index
+
+_QUOTE = ord('"')
+_NEWLINE = ord("\n")
+_CR = ord("\r")
+
+
+def index_path_for(csv_path) -> Path:
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + INDEX_SUFFIX)
+
+
+def _file_stamp(csv_path) -> np.ndarray:
+    st = os.stat(csv_path)
+    return np.array([INDEX_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _record_ends(block: np.ndarray, offset: int, in_quotes: int):
+    """
+    Offsets just past every newline in `block` (which starts at byte `offset`)
+    that ends a record, plus the quote parity after the block. A newline ends a
+    record only when an even number of quote characters precede it ("" escapes
+    count twice, so they cancel out); `in_quotes` carries the parity over from
+    the blocks before.
+    """
+    quotes = np.flatnonzero(block == _QUOTE)
+    newlines = np.flatnonzero(block == _NEWLINE)
+    quotes_before = np.searchsorted(quotes, newlines) + in_quotes
+    return newlines[(quotes_before & 1) == 0] + offset + 1, (in_quotes + len(quotes)) & 1
+
+
+def _scan_row_spans(buf: np.ndarray, block_size: int = SCAN_BLOCK):
+    """
+    Return (starts, ends) byte offsets for every non-blank record in `buf`,
+    header included. `buf` is scanned `block_size` bytes at a time, so a
+    memory-mapped file never has more than one block's temporaries in memory.
+    """
+    size = len(buf)
+    parts, in_quotes = [], 0
+    for offset in range(0, size, block_size):
+        ends, in_quotes = _record_ends(buf[offset:offset + block_size], offset, in_quotes)
+        parts.append(ends.astype(np.int64))
+    ends = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    # The last record may not be newline-terminated
+    if len(ends) == 0 or ends[-1] != size:
+        ends = np.append(ends, size)
+    starts = np.concatenate(([0], ends[:-1]))
+
+    # Drop blank records ("\n" or "\r\n" on their own); only records of <= 2 bytes can be
+    lengths = ends - starts
+    short = np.flatnonzero(lengths <= 2)
+    first = np.asarray(buf[np.minimum(starts[short], size - 1)])
+    blank = np.zeros(len(ends), dtype=bool)
+    blank[short] = ((lengths[short] == 0) | ((lengths[short] == 1) & (first == _NEWLINE))
+                    | ((lengths[short] == 2) & (first == _CR)))
+    return starts[~blank].astype(np.int64), ends[~blank].astype(np.int64)
+
+
+def build_row_index(csv_path):
+    """Scan `csv_path` (memory-mapped, block by block) and write its sidecar index. Returns (starts, ends)."""
+    if os.path.getsize(csv_path) == 0:
+        starts = ends = np.zeros(0, dtype=np.int64)
+    else:
+        starts, ends = _scan_row_spans(np.memmap(csv_path, dtype=np.uint8, mode="r"))
+    np.savez(index_path_for(csv_path), starts=starts, ends=ends, stamp=_file_stamp(csv_path))
+    return starts, ends
+
+
+def _load_cached(csv_path):
+    idx_path = index_path_for(csv_path)
+    if not idx_path.exists():
+        return None
+    try:
+        with np.load(idx_path) as data:
+            if not np.array_equal(data["stamp"], _file_stamp(csv_path)):
+                return None
+            return data["starts"], data["ends"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class RowIndex:
+    """
+    Row spans of one profile CSV. Row numbers are 0-based and exclude the
+    header, so `index.read_rows([0])` is the first profile in the file.
+    """
+
+    def __init__(self, csv_path, starts, ends):
+        self.path = Path(csv_path)
+        if len(starts) == 0:
+            raise ValueError(f"{csv_path} is empty; nothing to index.")
+        self.header_span = (int(starts[0]), int(ends[0]))
+        self.starts = starts[1:]
+        self.ends = ends[1:]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _header_bytes(self, f) -> bytes:
+        f.seek(self.header_span[0])
+        header = f.read(self.header_span[1] - self.header_span[0])
+        return header if header.endswith(b"\n") else header + b"\n"
+
+    def _parse(self, header: bytes, body: bytes, **read_csv_kwargs) -> pd.DataFrame:
+        return pd.read_csv(io.BytesIO(header + body), **read_csv_kwargs)
+
+    def read_rows(self, rows, **read_csv_kwargs) -> pd.DataFrame:
+        """
+        Parse just the given rows (in the given order). Extra keyword
+        arguments are passed through to `pd.read_csv` (encoding, usecols, ...).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) and (rows.min() < 0 or rows.max() >= len(self)):
+            raise IndexError(f"Row numbers must be in [0, {len(self)}) for {self.path}")
+        chunks = []
+        with open(self.path, "rb") as f:
+            header = self._header_bytes(f)
+            for r in rows:
+                f.seek(self.starts[r])
+                chunk = f.read(self.ends[r] - self.starts[r])
+                chunks.append(chunk if chunk.endswith(b"\n") else chunk + b"\n")
+        df = self._parse(header, b"".join(chunks), **read_csv_kwargs)
+        df.index = rows[: len(df)]
+        return df
+
+    def byte_ranges(self, n_parts: int):
+        """
+        Split the data rows into at most `n_parts` contiguous (start, end) byte
+        ranges of roughly equal size. Every range begins and ends on a row
+        boundary, so each one can be handed to `read_range` independently.
+        """
+        if len(self) == 0:
+            return []
+        n_parts = max(1, min(int(n_parts), len(self)))
+        first, last = int(self.starts[0]), int(self.ends[-1])
+        targets = first + (last - first) * np.arange(1, n_parts) / n_parts
+        cuts = np.unique(np.searchsorted(self.ends, targets, side="left"))
+        cuts = cuts[cuts < len(self) - 1]
+        bounds = [first] + [int(self.ends[c]) for c in cuts] + [last]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def read_range(self, start: int, end: int, **read_csv_kwargs) -> pd.DataFrame:
+        """Parse the rows stored in bytes [start, end) (see `byte_ranges`)."""
+        with open(self.path, "rb") as f:
+            header = self._header_bytes(f)
+            f.seek(start)
+            body = f.read(end - start)
+        return self._parse(header, body, **read_csv_kwargs)
+
+    def read_parallel(self, n_parts: int = 4, max_workers=None, **read_csv_kwargs) -> pd.DataFrame:
+        """Parse the whole file as `n_parts` byte ranges on a thread pool."""
+        ranges = self.byte_ranges(n_parts)
+        with ThreadPoolExecutor(max_workers=max_workers or len(ranges) or 1) as pool:
+            parts = list(pool.map(lambda r: self.read_range(*r, **read_csv_kwargs), ranges))
+        return pd.concat(parts, ignore_index=True)
+
+    def sample(self, k: int, seed=None, **read_csv_kwargs) -> pd.DataFrame:
+        """Uniformly sample `k` rows without replacement (sorted for locality)."""
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(self), size=min(k, len(self)), replace=False))
+        return self.read_rows(rows, **read_csv_kwargs)
+
+
+def load_row_index(csv_path, rebuild: bool = False) -> RowIndex:
+    """
+    Return the `RowIndex` for `csv_path`, building (and caching) it on first use
+    or whenever the CSV's size/mtime no longer matches the cached sidecar.
+    """
+    spans = None if rebuild else _load_cached(csv_path)
+    if spans is None:
+        spans = build_row_index(csv_path)
+    return RowIndex(csv_path, *spans)
+
+
+def main():
+    # Build/refresh the sidecar index for every profile CSV
+    profiles_dir = Path(__file__).resolve().parents[2] / "profiles"
+    for csv_path in sorted(profiles_dir.glob("*/*.csv")):
+        index = load_row_index(csv_path)
+        print(f"{csv_path.relative_to(profiles_dir)}: {len(index)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+One reader for the raw profile CSVs, shared by every analysis script.
+
+- `read_profiles` loads a single profile CSV with optional column pruning
+  (`usecols`), categorical dtypes for the low-cardinality demographic columns,
+  a selectable parser engine ("c" or "pyarrow") and chunked iteration.
+- The file encoding is detected from a small sample of the file (not the whole
+  file) and cached on disk, keyed by a hash of that sample, so each file is
+  only probed once. If the sample guessed wrong, the read falls back to the
+  next candidate encoding and the cache is corrected.
+- Parsed files are cached as Parquet under analysis/.cache/profiles/ (when
+  pyarrow is installed), keyed by the CSV's size/mtime. Later reads of any
+  column subset then only touch those columns, which makes loading just the
+  demographics for every file a fraction of a full CSV parse.
+- `profile_files` / `iter_profiles` walk `profiles/<model>/` and give every
+  file a canonical occupation key that matches `bls-baselines.csv`;
+  `profiles_stamp` fingerprints a set of files for the derived caches.
+"""
+import codecs
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import chardet
+except ImportError:  # optional: only used when a sample is not valid UTF-8
+    chardet = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: without it every read parses the CSV
+    pq = None
+
+ANALYSIS_DIR = Path(__file__).resolve().parents[1]
+PROFILES_DIR = ANALYSIS_DIR.parent / "profiles"
+BLS_FILE = PROFILES_DIR / "bls-baselines.csv"
+CACHE_DIR = ANALYSIS_DIR / ".cache"
+ENCODING_CACHE = CACHE_DIR / "encodings.json"
+COLUMN_CACHE_DIR = CACHE_DIR / "profiles"
+
+MODELS = ["openai", "gemini", "mistral", "deepseek"]
+PROFILE_COLS = ["name", "age", "gender", "ethnicity", "salary", "motivations", "biography"]
+DEMOGRAPHIC_COLS = ["gender", "ethnicity"]
+CATEGORICAL_COLS = ["gender", "ethnicity"]
+
+# Encodings tried (in order) when a read fails with the detected one
+FALLBACK_ENCODINGS = ["utf-8", "cp1252"]
+
+# File names that don't match the BLS `genai_bias_search_term` spelling
+OCCUPATION_ALIASES = {
+    "nursepracticioner": "nursepractitioner",
+}
+
+SAMPLE_BLOCK = 1 << 16
+SAMPLE_BLOCKS = 8
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+# ----------------------------
+# File discovery
+# ----------------------------
+def canonicalize_occupation(filename: str, model: str) -> str:
+    """
+    'buildinginspectorprofile_mistral.csv' → 'buildinginspector'
+    'authorprofiles_openai.csv'            → 'author'
+    'nursepracticioner_gemini.csv'         → 'nursepractitioner'
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    stem = re.sub(rf"(?:profiles?)?[_\-]*{re.escape(model)}$", "", stem)
+    stem = re.sub(r"[_\-]+$", "", stem).strip().lower()
+    return OCCUPATION_ALIASES.get(stem, stem)
+
+
+def profile_files(model: str, profiles_dir=PROFILES_DIR):
+    """Sorted list of (occupation, path) for every CSV in profiles/<model>/."""
+    model_dir = Path(profiles_dir) / model
+    files = []
+    for entry in sorted(os.listdir(model_dir)):
+        if entry.startswith(".") or not entry.lower().endswith(".csv"):
+            continue
+        files.append((canonicalize_occupation(entry, model), model_dir / entry))
+    return files
+
+
+def all_profile_files(models=MODELS, profiles_dir=PROFILES_DIR):
+    """[(model, occupation, path)] for every profile CSV of `models`, in `profile_files` order."""
+    return [(m, occ, path) for m in models for occ, path in profile_files(m, profiles_dir)]
+
+
+def profiles_stamp(files) -> str:
+    """Hash of every file's (model, occupation, size, mtime); changes when any CSV is touched."""
+    h = hashlib.blake2b(digest_size=16)
+    for model, occupation, path in files:
+        st = os.stat(path)
+        h.update(f"{model}|{occupation}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+# ----------------------------
+# Encoding detection
+# ----------------------------
+def _sample_bytes(path) -> list:
+    """Head of the file plus evenly spaced blocks, trimmed to whole UTF-8 characters."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size <= SAMPLE_BLOCK * SAMPLE_BLOCKS:
+            return [f.read()]
+        blocks = []
+        for offset in range(0, size, size // SAMPLE_BLOCKS):
+            f.seek(offset)
+            block = f.read(SAMPLE_BLOCK)
+            blocks.append(block if offset == 0 else block.lstrip(_UTF8_CONTINUATION))
+    return blocks
+
+
+def _is_utf8(block: bytes) -> bool:
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(block, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _file_key(path, blocks) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(os.path.getsize(path)).encode())
+    for block in blocks:
+        h.update(block)
+    return h.hexdigest()
+
+
+def _load_encoding_cache() -> dict:
+    try:
+        with open(ENCODING_CACHE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_encoding(key: str, encoding: str):
+    cache = _load_encoding_cache()
+    if cache.get(key) == encoding:
+        return
+    cache[key] = encoding
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Pool workers save concurrently: each writes its own temp file and swaps it
+    # in, so a reader never sees a half-written cache (a lost entry is re-detected)
+    tmp = ENCODING_CACHE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, ENCODING_CACHE)
+
+
+def detect_encoding(path) -> str:
+    """
+    Guess the encoding of `path` from a sample of the file. Results are cached
+    per file hash in analysis/.cache/encodings.json.
+    """
+    blocks = _sample_bytes(path)
+    key = _file_key(path, blocks)
+    cached = _load_encoding_cache().get(key)
+    if cached:
+        return cached
+
+    if all(_is_utf8(b) for b in blocks):
+        encoding = "utf-8"
+    else:
+        encoding = "cp1252"
+        if chardet is not None:
+            guess = chardet.detect(b"".join(blocks)).get("encoding")
+            # cp1252 is a superset of latin-1 for printable text, so keep it
+            # unless chardet finds something else entirely
+            if guess and guess.lower() not in ("ascii", "utf-8", "iso-8859-1", "windows-1252"):
+                encoding = guess
+    _save_encoding(key, encoding)
+    return encoding
+
+
+def _remember_fallback(path, encoding: str):
+    _save_encoding(_file_key(path, _sample_bytes(path)), encoding)
+
+
+def _candidate_encodings(first: str):
+    return [first] + [e for e in FALLBACK_ENCODINGS if e.lower() != first.lower()]
+
+
+# ----------------------------
+# Readers
+# ----------------------------
+def _apply_dtypes(df, categorical, dtype):
+    dtypes = {}
+    for c in CATEGORICAL_COLS:
+        if c not in df.columns:
+            continue
+        if categorical and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            dtypes[c] = "category"
+        elif not categorical and isinstance(df[c].dtype, pd.CategoricalDtype):
+            dtypes[c] = df[c].cat.categories.dtype
+    dtypes.update({c: t for c, t in (dtype or {}).items() if c in df.columns})
+    return df.astype(dtypes) if dtypes else df
+
+
+def _parse_csv(path, encodings, **kwargs):
+    for i, enc in enumerate(encodings):
+        try:
+            df = pd.read_csv(path, encoding=enc, **kwargs)
+        except UnicodeDecodeError:
+            if i == len(encodings) - 1:
+                raise
+            continue
+        if i:
+            _remember_fallback(path, enc)
+        return df
+
+
+def _parse(path, encodings, usecols, engine):
+    if engine == "pyarrow":
+        try:
+            return _parse_csv(path, encodings, usecols=usecols, engine="pyarrow")
+        except pd.errors.ParserError:
+            # pyarrow rejects short/ragged rows that the C parser pads with NaN
+            pass
+    return _parse_csv(path, encodings, usecols=usecols, engine="c")
+
+
+def _column_cache_path(path) -> Path:
+    path = Path(path)
+    st = os.stat(path)
+    stamp = hashlib.blake2b(f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}".encode(), digest_size=8)
+    return COLUMN_CACHE_DIR / f"{path.parent.name}__{path.stem}__{stamp.hexdigest()}.parquet"
+
+
+def _write_column_cache(df, cache_path: Path):
+    COLUMN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    prefix = cache_path.name.rsplit("__", 1)[0]
+    for stale in COLUMN_CACHE_DIR.glob(f"{prefix}__*.parquet"):
+        stale.unlink()
+    out = df.copy()
+    for c in out.columns:
+        # Parquet needs one type per column; mixed object columns become strings
+        if out[c].dtype == object:
+            out[c] = out[c].where(out[c].isna(), out[c].astype(str))
+    # Stored dictionary-encoded, so they load back as categoricals for free
+    out = out.astype({c: "category" for c in CATEGORICAL_COLS if c in out.columns})
+    tmp = cache_path.with_suffix(".tmp")
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, cache_path)
+
+
+def _iter_chunks(path, encodings, chunksize, kwargs):
+    done = 0
+    for i, encoding in enumerate(encodings):
+        try:
+            skip = done
+            with pd.read_csv(path, encoding=encoding, chunksize=chunksize, **kwargs) as reader:
+                for chunk in reader:
+                    # After a fallback, skip the rows we already handed out
+                    if skip:
+                        drop = min(skip, len(chunk))
+                        chunk, skip = chunk.iloc[drop:], skip - drop
+                        if chunk.empty:
+                            continue
+                    done += len(chunk)
+                    yield chunk
+            if i:
+                _remember_fallback(path, encoding)
+            return
+        except UnicodeDecodeError:
+            if i == len(encodings) - 1:
+                raise
+
+
+def read_profiles(path, usecols=None, categorical: bool = True, engine: str = "c",
+                  chunksize=None, encoding=None, dtype=None, cache: bool = True):
+    """
+    Read one profile CSV.
+
+    usecols:     column names to load (e.g. DEMOGRAPHIC_COLS); None loads all
+    categorical: store gender/ethnicity as pandas categoricals
+    engine:      "c" (default) or "pyarrow" (faster; falls back to "c" on
+                 rows pyarrow can't parse; no chunking)
+    chunksize:   if set, return an iterator of DataFrames of this many rows
+                 (always parses the CSV; the column cache is not used)
+    encoding:    skip detection and use this encoding first
+    dtype:       extra {column: dtype} overrides
+    cache:       use/populate the Parquet column cache (needs pyarrow)
+    """
+    if engine == "pyarrow" and chunksize:
+        raise ValueError("The pyarrow engine does not support chunksize; use engine='c'.")
+    if chunksize:
+        dtypes = {c: "category" for c in CATEGORICAL_COLS
+                  if categorical and (usecols is None or c in usecols)}
+        dtypes.update(dtype or {})
+        kwargs = {"usecols": usecols, "engine": "c", "dtype": dtypes or None}
+        return _iter_chunks(path, _candidate_encodings(encoding or detect_encoding(path)), chunksize, kwargs)
+
+    if cache and pq is not None:
+        cache_path = _column_cache_path(path)
+        if cache_path.exists():
+            df = pd.read_parquet(cache_path, columns=list(usecols) if usecols is not None else None)
+        else:
+            df = _parse(path, _candidate_encodings(encoding or detect_encoding(path)), None, engine)
+            _write_column_cache(df, cache_path)
+            if usecols is not None:
+                df = df[[c for c in df.columns if c in usecols]]
+    else:
+        df = _parse(path, _candidate_encodings(encoding or detect_encoding(path)), usecols, engine)
+    return _apply_dtypes(df, categorical, dtype)
+
+
+def iter_profiles(model: str, profiles_dir=PROFILES_DIR, **read_kwargs):
+    """Yield (occupation, DataFrame) for every profile CSV of `model`."""
+    for occupation, path in profile_files(model, profiles_dir):
+        yield occupation, read_profiles(path, **read_kwargs)
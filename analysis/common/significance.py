@@ -0,0 +1,127 @@
+"""
+Significance tests for the reported percentages, as array operations.
+
+Inputs are count tensors: k[..., category] successes out of n[...] profiles
+(e.g. model x occupation x category from `intervals.category_counts`), and
+BLS shares p0 in [0, 1] broadcasting against k. Every function returns
+p-values shaped like k, so a whole table is tested in one call:
+
+- `binomial_test`        exact two-sided binomial test of k ~ Bin(n, p0), same
+                         rule as R's `binom.test` (needs scipy)
+- `chisquare_test`       Pearson goodness-of-fit chi-square (1 df per cell)
+- `mean_share_test`      normal test of the occupation-averaged share vs the
+                         averaged BLS share (the dotplots' "Average" rows)
+- `two_proportion_test`  pooled two-proportion z-test between two models
+- `mean_share_difference_test`  the same for two models' averaged shares
+
+Races are multi-label, so a file's race shares are not one multinomial and
+each (occupation, category) cell is tested on its own; `bh_adjust` (from
+common.glm) turns the p-values of a whole table into q-values.
+"""
+import math
+
+import numpy as np
+
+from .glm import bh_adjust, wald_p
+
+try:
+    from scipy.stats import binom
+except ImportError:  # optional: only the exact binomial test needs it
+    binom = None
+
+_RELATIVE_ERROR = 1 + 1e-7   # binom.test's tolerance when comparing densities
+_BISECT_STEPS = 64
+
+
+def _count_at_or_below(lo, hi, n, p, limit, decreasing):
+    """
+    How many j in [lo, hi] have logpmf(j) <= limit, when the pmf is monotone
+    on that range (falling if `decreasing`). Vectorized bisection.
+    """
+    a, b = lo - 1, hi + 1     # sentinels just outside the range
+    for _ in range(_BISECT_STEPS):
+        active = b - a > 1
+        if not active.any():
+            break
+        mid = np.floor((a + b) / 2)
+        below = binom.logpmf(np.clip(mid, lo, hi), n, p) <= limit
+        if decreasing:        # find the first j that is below
+            b, a = np.where(active & below, mid, b), np.where(active & ~below, mid, a)
+        else:                 # find the last j that is below
+            a, b = np.where(active & below, mid, a), np.where(active & ~below, mid, b)
+    return hi - b + 1 if decreasing else a - lo + 1
+
+
+def binomial_test(k, n, p0):
+    """Exact two-sided binomial test p-values (method of R's binom.test)."""
+    if binom is None:
+        raise ImportError("binomial_test needs scipy (pip install scipy).")
+    k, n, p0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k, n, p0)))
+    ok = np.isfinite(k) & np.isfinite(n) & np.isfinite(p0) & (n > 0)
+    k, n, p = np.where(ok, k, 0), np.where(ok, n, 1), np.where(ok, p0, 0.5)
+
+    expected = n * p
+    limit = binom.logpmf(k, n, p) + math.log(_RELATIVE_ERROR)
+    with np.errstate(invalid="ignore"):
+        # k below the mean: add the upper tail with densities <= that of k
+        y_up = _count_at_or_below(np.ceil(expected), n, n, p, limit, decreasing=True)
+        low_side = binom.cdf(k, n, p) + binom.sf(n - y_up, n, p)
+        # k above the mean: add the lower tail with densities <= that of k
+        y_down = _count_at_or_below(np.zeros_like(n), np.floor(expected), n, p, limit, decreasing=False)
+        high_side = binom.cdf(y_down - 1, n, p) + binom.sf(k - 1, n, p)
+
+    pval = np.where(k < expected, low_side, np.where(k > expected, high_side, 1.0))
+    pval = np.where(p == 0, (k == 0).astype(float), pval)
+    pval = np.where(p == 1, (k == n).astype(float), pval)
+    return np.where(ok, np.minimum(pval, 1.0), np.nan)
+
+
+def chisquare_test(k, n, p0):
+    """Pearson chi-square goodness of fit of (k, n - k) to (p0, 1 - p0); returns (chi2, p)."""
+    k, n, p0 = (np.asarray(v, dtype=float) for v in (k, n, p0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        chi2 = (k - n * p0) ** 2 / (n * p0 * (1 - p0))
+    chi2 = np.where(n > 0, chi2, np.nan)
+    # 1 df: P(chi2 > x) = erfc(sqrt(x / 2)), i.e. the two-sided normal p of sqrt(x)
+    return chi2, wald_p(np.sqrt(chi2), 1.0)
+
+
+def mean_share_test(k, n, p0, axis: int = -2):
+    """
+    Test that the mean over `axis` (occupations) of k / n equals the mean of
+    p0, with the binomial variance under p0. Returns (mean difference, p).
+    """
+    k, n, p0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k, n, p0)))
+    ok = np.isfinite(k) & np.isfinite(p0) & (n > 0)
+    m = ok.sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diff = np.where(ok, k / np.where(ok, n, 1) - p0, 0).sum(axis=axis) / m
+        var = np.where(ok, p0 * (1 - p0) / np.where(ok, n, 1), 0).sum(axis=axis) / m**2
+    return diff, wald_p(diff, np.sqrt(var))
+
+
+def two_proportion_test(k1, n1, k2, n2):
+    """Pooled two-sided z-test of k1/n1 == k2/n2; returns (difference, p)."""
+    k1, n1, k2, n2 = (np.asarray(v, dtype=float) for v in (k1, n1, k2, n2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p1, p2 = k1 / n1, k2 / n2
+        pooled = (k1 + k2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        pval = np.where(se > 0, wald_p(p1 - p2, se), np.where(p1 == p2, 1.0, 0.0))
+    return p1 - p2, np.where(np.isfinite(p1) & np.isfinite(p2), pval, np.nan)
+
+
+def mean_share_difference_test(k1, n1, k2, n2, axis: int = -2):
+    """Two models' occupation-averaged shares compared (unpooled variance); returns (difference, p)."""
+    k1, n1, k2, n2 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k1, n1, k2, n2)))
+    ok = (n1 > 0) & (n2 > 0)
+    m = ok.sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p1 = np.where(ok, k1 / np.where(ok, n1, 1), 0)
+        p2 = np.where(ok, k2 / np.where(ok, n2, 1), 0)
+        diff = (p1 - p2).sum(axis=axis) / m
+        var = (np.where(ok, p1 * (1 - p1) / np.where(ok, n1, 1) + p2 * (1 - p2) / np.where(ok, n2, 1), 0)
+               .sum(axis=axis) / m**2)
+        pval = np.where(var > 0, wald_p(diff, np.sqrt(var)), np.where(diff == 0, 1.0, 0.0))
+    return diff, pval
+
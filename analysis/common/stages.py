@@ -0,0 +1,313 @@
+"""
+Incremental stage runner for the analysis.
+
+A `Stage` declares its input files (paths or globs), the code it depends on
+and the files it writes. The runner derives the stage graph from those
+declarations (a stage depends on whichever stages write its inputs), walks it
+in dependency order and only runs a stage when the content hash of its inputs
+plus its code changed, or when its outputs are missing or were edited since the
+last run:
+
+    stages = [
+        Stage("percentages:gemini", inputs=["profiles/gemini/*.csv"], code=[...],
+              outputs=["percent-results/results_across_40/gemini_....csv"], action=fn),
+        ...
+    ]
+    run_stages(stages)
+
+- Content hashes are cached per file by (size, mtime), so unchanged files are
+  not re-read just to be hashed.
+- Outputs are also kept in a content-addressed store keyed by the stage hash, so
+  going back to an earlier input state restores outputs without recomputing.
+- Because downstream hashes cover the upstream *outputs*, a stage that reruns
+  but writes identical files does not trigger anything after it.
+
+State lives in analysis/.cache/stages/.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .profile_reader import CACHE_DIR
+
+STAGE_CACHE_DIR = CACHE_DIR / "stages"
+STATE_FILE = STAGE_CACHE_DIR / "state.json"
+FILE_HASHES = STAGE_CACHE_DIR / "file_hashes.json"
+OUTPUT_STORE = STAGE_CACHE_DIR / "outputs"
+KEEP_VERSIONS = 3      # cached output versions kept per stage
+_HASH_BLOCK = 1 << 20
+
+
+class Stage:
+    """
+    One step of the analysis.
+
+    name:    unique id, e.g. "bls_diffs:gemini"
+    inputs:  files or glob patterns read by the stage (relative to `root`)
+    outputs: files written by the stage (relative to `root`)
+    code:    source files whose edits should invalidate the stage
+    action:  a callable (run in-process) or a command list (run with `cwd`)
+    params:  extra values folded into the hash (config that isn't in a file)
+    """
+
+    def __init__(self, name, inputs, outputs, action, code=(), cwd=None, params=None):
+        self.name = name
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.action = action
+        self.code = list(code)
+        self.cwd = cwd
+        self.params = params or {}
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+# ----------------------------
+# Hashing
+# ----------------------------
+class FileHasher:
+    """blake2b of file contents, memoized on disk by (path, size, mtime_ns)."""
+
+    def __init__(self, cache_file: Path = FILE_HASHES):
+        self.cache_file = cache_file
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+        self.dirty = False
+
+    def __call__(self, path: Path) -> str:
+        st = os.stat(path)
+        key = str(Path(path).resolve())
+        stamp = [st.st_size, st.st_mtime_ns]
+        hit = self.cache.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        self.cache[key] = [stamp, h.hexdigest()]
+        self.dirty = True
+        return h.hexdigest()
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp, self.cache_file)
+        self.dirty = False
+
+
+def _expand(root: Path, patterns):
+    files = []
+    for pattern in patterns:
+        if any(ch in str(pattern) for ch in "*?["):
+            files.extend(sorted(p for p in root.glob(str(pattern)) if p.is_file()))
+        else:
+            files.append(root / pattern)
+    return files
+
+
+def stage_key(stage: Stage, root: Path, hasher: FileHasher) -> str:
+    """Hash of the stage's inputs, code, params and declared outputs."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(stage.name.encode())
+    for kind, patterns in (("in", stage.inputs), ("code", stage.code)):
+        for path in _expand(root, patterns):
+            digest = hasher(path) if path.exists() else "missing"
+            h.update(f"{kind}|{path.relative_to(root)}|{digest}\n".encode())
+    for out in stage.outputs:
+        h.update(f"out|{out}\n".encode())
+    h.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+# ----------------------------
+# Graph
+# ----------------------------
+def _dependencies(stages, root: Path):
+    """{stage name: set of upstream stage names}, from outputs matching inputs."""
+    writers = {}
+    for s in stages:
+        for out in s.outputs:
+            writers[(root / out).resolve()] = s.name
+    deps = {}
+    for s in stages:
+        upstream = set()
+        for pattern in s.inputs:
+            if any(ch in str(pattern) for ch in "*?["):
+                upstream.update(name for path, name in writers.items()
+                                if path.match(str((root / pattern).resolve())))
+            elif (root / pattern).resolve() in writers:
+                upstream.add(writers[(root / pattern).resolve()])
+        upstream.discard(s.name)
+        deps[s.name] = upstream
+    return deps
+
+
+def topological_order(stages, root: Path):
+    """Stages sorted so every stage comes after the stages it reads from."""
+    by_name = {s.name: s for s in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Stage names must be unique.")
+    deps = _dependencies(stages, root)
+    order, done, visiting = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage graph has a cycle through {name!r}.")
+        visiting.add(name)
+        for up in sorted(deps[name]):
+            visit(up)
+        visiting.discard(name)
+        done.add(name)
+        order.append(by_name[name])
+
+    for s in stages:
+        visit(s.name)
+    return order, deps
+
+
+def _with_upstream(names, deps):
+    selected, todo = set(), list(names)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(deps[name])
+    return selected
+
+
+# ----------------------------
+# Output store
+# ----------------------------
+def _store_dir(stage: Stage, key: str) -> Path:
+    return OUTPUT_STORE / stage.name.replace(":", "__").replace("/", "_") / key
+
+
+def _store_outputs(stage: Stage, key: str, root: Path):
+    target = _store_dir(stage, key)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for i, out in enumerate(stage.outputs):
+        shutil.copy2(root / out, tmp / f"{i}__{Path(out).name}")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+    versions = sorted(target.parent.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in versions[KEEP_VERSIONS:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _restore_outputs(stage: Stage, key: str, root: Path) -> bool:
+    source = _store_dir(stage, key)
+    cached = [source / f"{i}__{Path(out).name}" for i, out in enumerate(stage.outputs)]
+    if not all(p.exists() for p in cached):
+        return False
+    for p, out in zip(cached, stage.outputs):
+        (root / out).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(p, root / out)
+    os.utime(source)  # mark as recently used
+    return True
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+def _load_state() -> dict:
+    try:
+        with open(STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state: dict):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+def _execute(stage: Stage, root: Path):
+    if callable(stage.action):
+        stage.action()
+        return
+    cwd = root / stage.cwd if stage.cwd else root
+    cmd = [sys.executable if part == "python" else str(part) for part in stage.action]
+    subprocess.run(cmd, cwd=cwd, check=True)
+
+
+def run_stages(stages, root, targets=None, force=False, dry_run=False, verbose=True):
+    """
+    Bring the outputs of `stages` (or just `targets` and what they depend on)
+    up to date. Returns {stage name: "ran" | "restored" | "fresh" | "stale"}
+    ("stale" only with dry_run).
+    """
+    root = Path(root).resolve()
+    order, deps = topological_order(stages, root)
+    if targets:
+        unknown = set(targets) - set(deps)
+        if unknown:
+            raise KeyError(f"Unknown stage(s): {sorted(unknown)}")
+        selected = _with_upstream(targets, deps)
+        order = [s for s in order if s.name in selected]
+
+    state = _load_state()
+    hasher = FileHasher()
+    status = {}
+    try:
+        for stage in order:
+            key = stage_key(stage, root, hasher)
+            prev = state.get(stage.name, {})
+            outputs_ok = all((root / o).exists() for o in stage.outputs) and all(
+                hasher(root / o) == prev.get("outputs", {}).get(o) for o in stage.outputs)
+
+            upstream_stale = any(status.get(up) == "stale" for up in deps[stage.name])
+            if not force and prev.get("key") == key and outputs_ok and not upstream_stale:
+                status[stage.name] = "fresh"
+                continue
+            if dry_run:
+                status[stage.name] = "stale"
+                if verbose:
+                    print(f"[stale] {stage.name}")
+                continue
+
+            started = time.perf_counter()
+            if not force and _restore_outputs(stage, key, root):
+                status[stage.name] = "restored"
+            else:
+                _execute(stage, root)
+                missing = [o for o in stage.outputs if not (root / o).exists()]
+                if missing:
+                    raise FileNotFoundError(f"Stage {stage.name} did not write {missing}")
+                _store_outputs(stage, key, root)
+                status[stage.name] = "ran"
+
+            state[stage.name] = {"key": key, "outputs": {o: hasher(root / o) for o in stage.outputs}}
+            _save_state(state)
+            if verbose:
+                print(f"[{status[stage.name]}] {stage.name} ({time.perf_counter() - started:.1f}s)")
+    finally:
+        hasher.save()
+
+    if verbose:
+        n_fresh = sum(v == "fresh" for v in status.values())
+        verb = "would be updated" if dry_run else "updated"
+        print(f"{len(status) - n_fresh} stage(s) {verb}, {n_fresh} already up to date.")
+    return status
@@ -0,0 +1,283 @@
+"""
+Interned (dictionary-encoded) store for the free-text profile columns.
+
+The `motivations` and `biography` strings repeat heavily: the same sentence
+shows up thousands of times within an occupation and across models. Instead of
+holding every copy, the store keeps each distinct string once and an int32 id
+per row:
+
+    store = load_text_store()
+    ids = store.ids("mistral", "pilot", "motivations")   # int32, -1 = missing
+    store.decode(ids[:5])                                # the strings
+    store.counts("motivations")                          # occurrences per id
+
+Text analyses can then work on the (far fewer) unique strings and weight or
+broadcast the results back through the ids. The per-id occurrence counts are a
+ready-made repetition/diversity signal.
+
+It is built file by file under the memory ceiling, like the other text
+analyses, and then merged:
+
+1. per file  each CSV is streamed in chunks (on the process pool); its distinct
+             strings go to the file's shard (UTF-8 blob + offsets, plus a
+             64-bit hash of each) and every row gets an int32 local id
+2. merge     the shards' hashes are unioned into one sorted table, whose
+             positions are the global ids; local ids map to global ones with one
+             `searchsorted` per file
+
+The merged store holds only hashes and ids. The strings stay in the shards and
+`decode` reads them from the shard that first holds each id, so memory follows
+the row count, not the amount of text. Shards live in
+analysis/.cache/text_store/files/ and are rebuilt only for CSVs whose size or
+mtime changed; the merged index is cached next to them.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .chunked import MEMORY_LIMIT_MB, iter_profile_chunks
+from .parallel import map_profile_files, raise_failures
+from .profile_reader import CACHE_DIR, MODELS, PROFILES_DIR, all_profile_files, profiles_stamp
+
+TEXT_COLS = ["motivations", "biography"]
+STORE_DIR = CACHE_DIR / "text_store"
+SHARD_DIR = STORE_DIR / "files"
+MISSING_ID = -1
+STORE_VERSION = 2
+_HASH_KEY = "text-store-hash0"               # hash_array keys must be 16 characters
+
+
+# ----------------------------
+# Per-file shards
+# ----------------------------
+def shard_path(csv_path) -> Path:
+    csv_path = Path(csv_path)
+    return SHARD_DIR / f"{csv_path.parent.name}__{csv_path.stem}.npz"
+
+
+def _shard_stamp(csv_path, cols) -> str:
+    st = os.stat(csv_path)
+    return f"{STORE_VERSION}|{st.st_size}|{st.st_mtime_ns}|{','.join(cols)}"
+
+
+def _encode_strings(strings):
+    """(UTF-8 blob as uint8, offsets of len(strings) + 1)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def build_shard(csv_path, cols=TEXT_COLS, memory_mb: float = MEMORY_LIMIT_MB, rebuild: bool = False) -> int:
+    """
+    Intern `cols` of one profile CSV into its shard, unless an up-to-date shard
+    exists. Returns the file's row count.
+    """
+    cols = list(cols)
+    path, stamp = shard_path(csv_path), _shard_stamp(csv_path, cols)
+    if not rebuild and path.exists():
+        try:
+            with np.load(path) as data:
+                if str(data["stamp"]) == stamp:
+                    return len(data[f"ids__{cols[0]}"])
+        except (OSError, KeyError, ValueError):
+            pass
+
+    table = {}                                # string -> local id (dict order == id order)
+    id_parts = {c: [] for c in cols}
+    for df in iter_profile_chunks(csv_path, usecols=cols, memory_mb=memory_mb, categorical=False):
+        for c in cols:
+            # Factorize first, so the dict lookup runs once per distinct value of the chunk
+            codes, uniques = pd.factorize(df[c])
+            local = np.fromiter((table.setdefault(str(u), len(table)) for u in uniques),
+                                dtype=np.int32, count=len(uniques))
+            ids = np.full(len(codes), MISSING_ID, dtype=np.int32)
+            ok = codes >= 0
+            ids[ok] = local[codes[ok]]
+            id_parts[c].append(ids)
+
+    strings = np.array(list(table), dtype=object)
+    blob, str_offsets = _encode_strings(strings)
+    hashes = pd.util.hash_array(strings, hash_key=_HASH_KEY) if len(strings) else np.zeros(0, dtype=np.uint64)
+    ids = {c: np.concatenate(p) if p else np.zeros(0, dtype=np.int32) for c, p in id_parts.items()}
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, stamp=np.array(stamp), hashes=hashes, blob=blob, str_offsets=str_offsets,
+             **{f"ids__{c}": v for c, v in ids.items()})
+    os.replace(tmp, path)
+    return len(ids[cols[0]])
+
+
+# ----------------------------
+# Merged store
+# ----------------------------
+class TextStore:
+    """Global string ids per row, with the strings themselves left in the per-file shards."""
+
+    def __init__(self, cols, keys, offsets, id_arrays, hashes, owner, owner_local, shards):
+        self.cols = list(cols)
+        self.keys = list(keys)                 # [(model, occupation), ...]
+        self._slot = {k: i for i, k in enumerate(self.keys)}
+        self._offsets = offsets                # row offsets of each file in id_arrays
+        self._id_arrays = id_arrays            # {col: int32 array over all files}
+        self.hashes = hashes                   # sorted uint64 hash per global id
+        self._owner = owner                    # shard holding each id ...
+        self._owner_local = owner_local        # ... and its position in that shard
+        self._shards = [Path(s) for s in shards]
+
+    def __len__(self):
+        """Number of distinct strings in the table."""
+        return len(self.hashes)
+
+    def ids(self, model: str, occupation: str, col: str) -> np.ndarray:
+        """Row-aligned string ids for one file's column (MISSING_ID for NaN)."""
+        i = self._slot[(model, occupation)]
+        return self._id_arrays[col][self._offsets[i]:self._offsets[i + 1]]
+
+    def model_ids(self, model: str, col: str) -> np.ndarray:
+        """Ids for every row of `model`, files concatenated in `profile_files` order."""
+        parts = [self.ids(m, occ, col) for m, occ in self.keys if m == model]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+
+    def decode(self, ids) -> np.ndarray:
+        """Map ids back to strings (None for MISSING_ID), reading one owning shard at a time."""
+        ids = np.asarray(ids)
+        out = np.full(len(ids), None, dtype=object)
+        rows = np.flatnonzero(ids != MISSING_ID)
+        owners = self._owner[ids[rows]]
+        for s in np.unique(owners):
+            sel = rows[owners == s]
+            with np.load(self._shards[s]) as data:
+                blob, offs = data["blob"], data["str_offsets"]
+            out[sel] = [blob[offs[j]:offs[j + 1]].tobytes().decode("utf-8") for j in self._owner_local[ids[sel]]]
+        return out
+
+    def column(self, model: str, occupation: str, col: str) -> pd.Series:
+        """One file's column as a Series of strings (NaN for missing)."""
+        return pd.Series(self.decode(self.ids(model, occupation, col)), name=col)
+
+    def counts(self, col: str, model=None) -> np.ndarray:
+        """Occurrences of every string id in `col` (optionally for one model)."""
+        ids = self._id_arrays[col] if model is None else self.model_ids(model, col)
+        return np.bincount(ids[ids != MISSING_ID], minlength=len(self))
+
+    def repetition(self) -> pd.DataFrame:
+        """Rows, distinct strings and duplicate share per model and column."""
+        records = []
+        for model in dict.fromkeys(m for m, _ in self.keys):
+            for col in self.cols:
+                ids = self.model_ids(model, col)
+                ids = ids[ids != MISSING_ID]
+                n_unique = len(np.unique(ids))
+                records.append({
+                    "model": model,
+                    "column": col,
+                    "rows": len(ids),
+                    "unique": n_unique,
+                    "duplicate_share": 1 - n_unique / len(ids) if len(ids) else np.nan,
+                })
+        return pd.DataFrame(records)
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def save(self, store_dir: Path, stamp: str):
+        store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = store_dir / f"store.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            stamp=np.array(stamp),
+            cols=np.array(self.cols),
+            models=np.array([m for m, _ in self.keys]),
+            occupations=np.array([o for _, o in self.keys]),
+            offsets=self._offsets,
+            hashes=self.hashes,
+            owner=self._owner,
+            owner_local=self._owner_local,
+            shards=np.array([str(s) for s in self._shards]),
+            **{f"ids__{c}": self._id_arrays[c] for c in self.cols},
+        )
+        os.replace(tmp, store_dir / "store.npz")
+
+    @classmethod
+    def load(cls, store_dir: Path, stamp: str):
+        path = store_dir / "store.npz"
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["stamp"]) != stamp:
+                    return None
+                cols = [str(c) for c in data["cols"]]
+                keys = list(zip(map(str, data["models"]), map(str, data["occupations"])))
+                shards = [str(s) for s in data["shards"]]
+                if not all(Path(s).exists() for s in shards):
+                    return None
+                return cls(cols, keys, data["offsets"], {c: data[f"ids__{c}"] for c in cols}, data["hashes"],
+                           data["owner"], data["owner_local"], shards)
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def merge_shards(keys, shards, cols=TEXT_COLS) -> TextStore:
+    """Union the shards' string tables into global ids (see the module docstring)."""
+    cols = list(cols)
+    hashes = []
+    for path in shards:
+        with np.load(path) as data:
+            hashes.append(data["hashes"])
+    shard_offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+    np.cumsum([len(h) for h in hashes], out=shard_offsets[1:])
+    table, first = np.unique(np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64),
+                             return_index=True)
+    owner = (np.searchsorted(shard_offsets, first, side="right") - 1).astype(np.int32)
+    owner_local = (first - shard_offsets[owner]).astype(np.int32)
+
+    lengths, id_parts = [], {c: [] for c in cols}
+    for path, h in zip(shards, hashes):
+        to_global = np.searchsorted(table, h).astype(np.int32)
+        with np.load(path) as data:
+            for c in cols:
+                local = data[f"ids__{c}"]
+                ids = np.full(len(local), MISSING_ID, dtype=np.int32)
+                ok = local != MISSING_ID
+                ids[ok] = to_global[local[ok]]
+                id_parts[c].append(ids)
+        lengths.append(len(local))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    id_arrays = {c: (np.concatenate(p) if p else np.zeros(0, dtype=np.int32)) for c, p in id_parts.items()}
+    return TextStore(cols, keys, offsets, id_arrays, table, owner, owner_local, shards)
+
+
+def load_text_store(models=MODELS, profiles_dir=PROFILES_DIR, cols=TEXT_COLS, memory_mb: float = MEMORY_LIMIT_MB,
+                    workers=None, rebuild: bool = False) -> TextStore:
+    """
+    Return the cached TextStore for `models`, building the shards of new or
+    changed CSVs (on the process pool) and re-merging when any CSV changed.
+    """
+    cols = list(cols)
+    files = all_profile_files(models, profiles_dir)
+    stamp = hashlib.blake2b(f"{STORE_VERSION}|{profiles_stamp(files)}|{','.join(cols)}".encode(),
+                            digest_size=16).hexdigest()
+    store_dir = STORE_DIR / "_".join(models)
+    store = None if rebuild else TextStore.load(store_dir, stamp)
+    if store is None:
+        raise_failures(map_profile_files(build_shard, models, profiles_dir, workers=workers, cols=cols,
+                                         memory_mb=memory_mb, rebuild=rebuild))
+        store = merge_shards([(m, occ) for m, occ, _ in files], [shard_path(p) for _, _, p in files], cols)
+        store.save(store_dir, stamp)
+    return store
+
+
+def main():
+    store = load_text_store()
+    print(f"{len(store)} distinct strings")
+    print(store.repetition().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
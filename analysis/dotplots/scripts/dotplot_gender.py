@@ -2,8 +2,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.profile_reader import OCCUPATION_ALIASES
+
 # ----------------------------
 # CONFIG: paths to your CSVs
 # ----------------------------
@@ -14,6 +18,22 @@ MODEL_FILES = {
     "Mistral":  "percent-results/results_vs_BLS/mistral_differences_vs_bls.csv",
 }
 
+# Confidence intervals from percent-results/confidence_intervals.py (optional:
+# models without a file are drawn without error bars)
+INTERVAL_FILES = {
+    "ChatGPT":  "percent-results/confidence_intervals/openai_intervals.csv",
+    "Gemini":   "percent-results/confidence_intervals/gemini_intervals.csv",
+    "DeepSeek": "percent-results/confidence_intervals/deepseek_intervals.csv",
+    "Mistral":  "percent-results/confidence_intervals/mistral_intervals.csv",
+}
+CI_METHOD = "boot"  # "boot", "wilson" or "cp" (Average rows only have "boot")
+
+# q-values from percent-results/significance_tests.py (optional); points whose
+# difference from BLS is not significant (q >= Q_THRESHOLD) are drawn hollow
+SIGNIFICANCE_FILE = "percent-results/significance/vs_bls.csv"
+SIGNIFICANCE_MODELS = {"openai": "ChatGPT", "gemini": "Gemini", "deepseek": "DeepSeek", "mistral": "Mistral"}
+Q_THRESHOLD = 0.05  # None = draw every point filled
+
 # Desired display names and plotting order
 DISPLAY_NAMES = {
     "ChatGPT":  "GPT 4.0",
@@ -39,6 +59,11 @@ def nice_from_key(key: str) -> str:
     s = " ".join(s.split())
     return s.title()
 
+def occupation_key(name) -> str:
+    """Canonical occupation key (BLS genai_bias_search_term spelling) of a table's occupation cell."""
+    key = re.sub(r"[^a-z]", "", str(name).lower())
+    return OCCUPATION_ALIASES.get(key, key)
+
 # ----------------------------
 # Load, validate, reshape (Women only)
 # ----------------------------
@@ -50,7 +75,7 @@ for model_key, file_path in MODEL_FILES.items():
         raise ValueError(f"{file_path} missing columns: {missing}")
 
     subset = df[["occupation", "diff_p_women"]].copy()
-    subset["occ_key"] = subset["occupation"].astype(str).str.strip()
+    subset["occ_key"] = subset["occupation"].map(occupation_key)
     subset["model"] = model_key
 
     g_women = subset[["occ_key", "model", "diff_p_women"]].copy()
@@ -64,6 +89,33 @@ for model_key, file_path in MODEL_FILES.items():
 # Combine all models (women)
 gender_all = pd.concat(frames, ignore_index=True)
 
+# ----------------------------
+# Confidence intervals (difference-from-BLS scale)
+# ----------------------------
+# (model, occ_key or "__AVG__") -> (low, high)
+CI_LOOKUP = {}
+for model_key, file_path in INTERVAL_FILES.items():
+    if not Path(file_path).exists():
+        print(f"No intervals for {model_key} ({file_path}); plotting without error bars.")
+        continue
+    ci = pd.read_csv(file_path)
+    for row in ci[ci["category"] == "women"].itertuples(index=False):
+        key = "__AVG__" if row.occupation == "Average" else occupation_key(row.occupation)
+        low = round(getattr(row, f"{CI_METHOD}_low") - row.bls_pct, 2)
+        high = round(getattr(row, f"{CI_METHOD}_high") - row.bls_pct, 2)
+        CI_LOOKUP[(DISPLAY_NAMES[model_key], key)] = (low, high)
+
+# (model, occ_key or "__AVG__") -> q-value of the difference from BLS
+Q_LOOKUP = {}
+if Path(SIGNIFICANCE_FILE).exists():
+    sig = pd.read_csv(SIGNIFICANCE_FILE)
+    sig = sig[(sig["category"] == "women") & sig["model"].isin(SIGNIFICANCE_MODELS)]
+    for row in sig.itertuples(index=False):
+        key = "__AVG__" if row.occupation == "Average" else occupation_key(row.occupation)
+        Q_LOOKUP[(DISPLAY_NAMES[SIGNIFICANCE_MODELS[row.model]], key)] = row.q_value
+else:
+    print(f"No q-values ({SIGNIFICANCE_FILE}); drawing every point filled.")
+
 # ----------------------------
 # Occupation label mapping (alphabetized list you provided)
 # ----------------------------
@@ -111,11 +163,11 @@ OCCUPATION_LABELS = [
     "welder",
 ]
 
-# Build mapping from sorted occ_keys -> provided labels
-unique_keys = sorted(gender_all["occ_key"].unique())
-if len(unique_keys) != len(OCCUPATION_LABELS):
-    print(f"Warning: {len(unique_keys)} unique occ_keys vs {len(OCCUPATION_LABELS)} labels; zipping to the shorter length.")
-clean_label_map = {k: v.title() for k, v in zip(unique_keys, OCCUPATION_LABELS)}
+# Keyed by occupation_key, so the tables' spelling and row order can't shift labels
+clean_label_map = {occupation_key(label): label.title() for label in OCCUPATION_LABELS}
+unlabelled = sorted(set(gender_all["occ_key"]) - set(clean_label_map))
+if unlabelled:
+    print(f"Warning: no label for {unlabelled}; using the cleaned key.")
 
 # ----------------------------
 # Ordering by Women (overrepresented -> underrepresented)
@@ -202,6 +254,27 @@ colors  = {
     "Mistral-medium":  "#d62728",
 }
 
+def draw_ci(ax, model, key, val, y_pos):
+    """Horizontal error bar for one point (skipped if there is no interval)."""
+    low, high = CI_LOOKUP.get((model, key), (np.nan, np.nan))
+    if pd.notna(low) and pd.notna(high):
+        ax.errorbar(
+            val, y_pos,
+            xerr=[[max(val - low, 0.0)], [max(high - val, 0.0)]],
+            fmt="none",
+            ecolor=colors[model],
+            elinewidth=0.9,
+            capsize=2,
+            zorder=2,
+        )
+
+def point_style(model, key):
+    """Filled marker, or hollow (model-coloured edge) when not significant vs BLS."""
+    q = Q_LOOKUP.get((model, key), np.nan)
+    if Q_THRESHOLD is not None and pd.notna(q) and q >= Q_THRESHOLD:
+        return {"facecolors": "none", "edgecolors": colors[model], "linewidths": 1.0}
+    return {"color": colors[model], "edgecolor": "black"}
+
 def plot_matrix_women(by_women, title, outfile, xlab="Difference from BLS (percentage-point difference)"):
     # Make it wide: increase width substantially
     fig, ax = plt.subplots(1, 1, figsize=(12, 18))  # wider plot
@@ -230,13 +303,12 @@ def plot_matrix_women(by_women, title, outfile, xlab="Difference from BLS (perce
         offsets = smart_offsets(row_vals, tol=3.0, base_jitter=0.18)
         for m in DISPLAY_ORDER:
             if pd.isna(row_vals[m]): continue
+            draw_ci(ax, m, key, row_vals[m], yi + offsets[m])
             ax.scatter(
                 row_vals[m], yi + offsets[m],
                 marker=markers[m],
                 s=55 if key == "__AVG__" else 42,
-                color=colors[m],
-                edgecolor="black",
-                linewidths=0.4,
+                **{"linewidths": 0.4, **point_style(m, key)},
                 zorder=3,
                 label=m if key == "__AVG__" else None
             )
@@ -275,13 +347,12 @@ def plot_averages_only_women(by_women, title, outfile, xlab="Difference from BLS
     for m in DISPLAY_ORDER:
         val = row[m]
         if pd.isna(val): continue
+        draw_ci(ax, m, "__AVG__", float(val), 0)
         ax.scatter(
             val, 0,
             marker=markers[m],
             s=70,
-            color=colors[m],
-            edgecolor="black",
-            linewidths=0.5,
+            **{"linewidths": 0.5, **point_style(m, "__AVG__")},
             zorder=3,
             label=m
         )
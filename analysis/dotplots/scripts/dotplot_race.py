@@ -2,8 +2,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.profile_reader import OCCUPATION_ALIASES
+
 # ----------------------------
 # CONFIG: paths to your CSVs
 # ----------------------------
@@ -14,6 +18,22 @@ MODEL_FILES = {
     "Mistral":  "percent-results/results_vs_BLS/mistral_differences_vs_bls.csv",
 }
 
+# Confidence intervals from percent-results/confidence_intervals.py (optional:
+# models without a file are drawn without error bars)
+INTERVAL_FILES = {
+    "ChatGPT":  "percent-results/confidence_intervals/openai_intervals.csv",
+    "Gemini":   "percent-results/confidence_intervals/gemini_intervals.csv",
+    "DeepSeek": "percent-results/confidence_intervals/deepseek_intervals.csv",
+    "Mistral":  "percent-results/confidence_intervals/mistral_intervals.csv",
+}
+CI_METHOD = "boot"  # "boot", "wilson" or "cp" (Average rows only have "boot")
+
+# q-values from percent-results/significance_tests.py (optional); points whose
+# difference from BLS is not significant (q >= Q_THRESHOLD) are drawn hollow
+SIGNIFICANCE_FILE = "percent-results/significance/vs_bls.csv"
+SIGNIFICANCE_MODELS = {"openai": "ChatGPT", "gemini": "Gemini", "deepseek": "DeepSeek", "mistral": "Mistral"}
+Q_THRESHOLD = 0.05  # None = draw every point filled
+
 # BLS baselines (used only to map clean occupation labels)
 # Must include columns: "Occupation", "genai_bias_search_term"
 BLS_BASELINES = "../profiles/bls-baselines.csv"  # <-- update this if needed
@@ -51,6 +71,11 @@ def nice_from_key(key: str) -> str:
     s = " ".join(s.split())
     return s.title()
 
+def occupation_key(name) -> str:
+    """Canonical occupation key (BLS genai_bias_search_term spelling) of a table's occupation cell."""
+    key = re.sub(r"[^a-z]", "", str(name).lower())
+    return OCCUPATION_ALIASES.get(key, key)
+
 # ----------------------------
 # Load BLS label map
 # ----------------------------
@@ -70,7 +95,7 @@ for model_key, file_path in MODEL_FILES.items():
         raise ValueError(f"{file_path} missing columns: {missing}")
 
     subset = df[["occupation", "diff_p_white", "diff_p_black", "diff_p_asian", "diff_p_hispanic"]].copy()
-    subset["occ_key"] = subset["occupation"].astype(str).str.strip()
+    subset["occ_key"] = subset["occupation"].map(occupation_key)
     subset["model"] = model_key
 
     long = subset.melt(
@@ -95,6 +120,56 @@ for model_key, file_path in MODEL_FILES.items():
 all_long = pd.concat(frames, ignore_index=True)
 all_long = all_long[all_long["race"].isin(RACES)].copy()
 
+# ----------------------------
+# Confidence intervals (difference-from-BLS scale)
+# ----------------------------
+# (model, race, occ_key or "__AVG__") -> (low, high)
+CI_LOOKUP = {}
+for model_key, file_path in INTERVAL_FILES.items():
+    if not Path(file_path).exists():
+        print(f"No intervals for {model_key} ({file_path}); plotting without error bars.")
+        continue
+    ci = pd.read_csv(file_path)
+    ci = ci[ci["category"].isin([r.lower() for r in RACES])]
+    for row in ci.itertuples(index=False):
+        key = "__AVG__" if row.occupation == "Average" else occupation_key(row.occupation)
+        low = round(getattr(row, f"{CI_METHOD}_low") - row.bls_pct, 2)
+        high = round(getattr(row, f"{CI_METHOD}_high") - row.bls_pct, 2)
+        CI_LOOKUP[(DISPLAY_NAMES[model_key], row.category.title(), key)] = (low, high)
+
+# (model, race, occ_key or "__AVG__") -> q-value of the difference from BLS
+Q_LOOKUP = {}
+if Path(SIGNIFICANCE_FILE).exists():
+    sig = pd.read_csv(SIGNIFICANCE_FILE)
+    sig = sig[sig["category"].isin([r.lower() for r in RACES]) & sig["model"].isin(SIGNIFICANCE_MODELS)]
+    for row in sig.itertuples(index=False):
+        key = "__AVG__" if row.occupation == "Average" else occupation_key(row.occupation)
+        Q_LOOKUP[(DISPLAY_NAMES[SIGNIFICANCE_MODELS[row.model]], row.category.title(), key)] = row.q_value
+else:
+    print(f"No q-values ({SIGNIFICANCE_FILE}); drawing every point filled.")
+
+def draw_ci(ax, model, race, key, val, y_pos):
+    """Horizontal error bar for one point; returns (low, high) or (nan, nan)."""
+    low, high = CI_LOOKUP.get((model, race, key), (np.nan, np.nan))
+    if pd.notna(low) and pd.notna(high):
+        ax.errorbar(
+            val, y_pos,
+            xerr=[[max(val - low, 0.0)], [max(high - val, 0.0)]],
+            fmt="none",
+            ecolor=colors[model],
+            elinewidth=0.9,
+            capsize=2,
+            zorder=2,
+        )
+    return low, high
+
+def point_style(model, race, key):
+    """Filled marker, or hollow (model-coloured edge) when not significant vs BLS."""
+    q = Q_LOOKUP.get((model, race, key), np.nan)
+    if Q_THRESHOLD is not None and pd.notna(q) and q >= Q_THRESHOLD:
+        return {"facecolors": "none", "edgecolors": colors[model], "linewidths": 1.0}, q
+    return {"color": colors[model], "edgecolor": "black"}, q
+
 # ----------------------------
 # Occupation label mapping
 # ----------------------------
@@ -142,9 +217,8 @@ OCCUPATION_LABELS = [
     "welder",
 ]
 
-clean_label_map = {}
-for key, nice in zip(sorted(all_long["occ_key"].unique()), OCCUPATION_LABELS):
-    clean_label_map[key] = nice.title()
+# Keyed by occupation_key, so the tables' spelling and row order can't shift labels
+clean_label_map = {occupation_key(label): label.title() for label in OCCUPATION_LABELS}
 
 # Ordering: by White average across models, using occ_key
 white_only = all_long[all_long["race"] == "White"]
@@ -228,7 +302,7 @@ full_points_rows = []
 for ax, race in zip(axes, RACES):
     wide = by_race[race]  # index: ["__AVG__", *occ_keys]
     ykeys   = ["__AVG__"] + [k for k in wide.index if k != "__AVG__"]
-    ylabels = ["Average"] + [clean_label_map[k] for k in ordered_occ_keys]
+    ylabels = ["Average"] + [clean_label_map.get(k, nice_from_key(k)) for k in ordered_occ_keys]
 
     # Ensure data aligned to keys
     wide = wide.reindex(ykeys)
@@ -254,15 +328,15 @@ for ax, race in zip(axes, RACES):
             y_off = offsets[m]
             y_pos = yi + y_off
 
-            # Draw the point
+            # Draw the point (+ its confidence interval)
+            ci_low, ci_high = draw_ci(ax, m, race, key, val, y_pos)
+            style, q_value = point_style(m, race, key)
             ax.scatter(
                 val,
                 y_pos,
                 marker=markers[m],
                 s=55 if key == "__AVG__" else 42,
-                color=colors[m],
-                edgecolor="black",
-                linewidths=0.4,
+                **{"linewidths": 0.4, **style},
                 zorder=3,
                 label=m if (race == "White" and key == "__AVG__") else None
             )
@@ -279,7 +353,10 @@ for ax, race in zip(axes, RACES):
                 "diff": val,                     # x on the plot
                 "jitter_offset": y_off,          # vertical jitter applied
                 "x": val,                        # alias for clarity
-                "y": y_pos                       # final plotted y position
+                "y": y_pos,                      # final plotted y position
+                "ci_low": ci_low,                # CI_METHOD interval (diff scale)
+                "ci_high": ci_high,
+                "q_value": q_value,              # BH-adjusted, vs BLS
             })
 
     ax.axhline(0.5, color="gray", linestyle="--", linewidth=0.8, alpha=0.55)
@@ -322,14 +399,14 @@ for ax, race in zip(axes2, RACES):
         if pd.isna(val):
             continue
 
-        # Plot point
+        # Plot point (+ its confidence interval)
+        ci_low, ci_high = draw_ci(ax, m, race, "__AVG__", float(val), 0)
+        style, q_value = point_style(m, race, "__AVG__")
         ax.scatter(
             val, 0,
             marker=markers[m],
             s=70,
-            color=colors[m],
-            edgecolor="black",
-            linewidths=0.5,
+            **{"linewidths": 0.5, **style},
             zorder=3,
             label=m if race == "White" else None
         )
@@ -342,7 +419,10 @@ for ax, race in zip(axes2, RACES):
             "diff": float(val),
             "x": float(val),
             "y": 0.0,
-            "y_label": "Average"
+            "y_label": "Average",
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            "q_value": q_value,
         })
 
     ax.grid(axis="x", linestyle=":", linewidth=0.8, alpha=0.7)
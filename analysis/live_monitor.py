@@ -0,0 +1,97 @@
+"""
+Watch result files while a generation run is still writing them.
+
+    python live_monitor.py ../profiles/deepseek                    # one snapshot
+    python live_monitor.py ../profiles/deepseek --follow 30        # refresh every 30 s
+    python live_monitor.py downloads/*.jsonl --model openai --json
+    python live_monitor.py ../profiles/deepseek --reset            # forget saved offsets
+
+Each run reads only the bytes appended since the previous one (offsets and
+counts are saved in .cache/live/state.json, see common/live.py) and prints,
+per (model, occupation), the profiles so far, unparseable records, shares
+and their difference from BLS. Rows with a high error rate or a share far
+from BLS are flagged, so a skewed occupation or a broken prompt shows up
+after a few hundred responses.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ANALYSIS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ANALYSIS_DIR))
+sys.path.insert(0, str(ANALYSIS_DIR / "percent-results"))
+
+from common.live import LIVE_STATE, LiveCounts
+from common.intervals import CATEGORIES
+from common.profile_reader import BLS_FILE
+
+from results_vs_BLS import load_bls
+
+# ======== CONFIGURE THIS ========
+MIN_N = 50           # occupations with fewer profiles are not flagged yet
+FLAG_DIFF_PP = 25    # |share - BLS| (percentage points) that gets a row flagged
+FLAG_ERROR_PCT = 5   # parse error rate (%) that gets a row flagged
+# =================================
+
+
+def flag_rows(df: pd.DataFrame) -> pd.Series:
+    """Comma-separated reasons per row ('' if nothing stands out)."""
+    hits = {"errors": df["error_pct"] >= FLAG_ERROR_PCT}
+    for c in CATEGORIES:
+        if f"diff_p_{c}" in df:
+            hits[c] = (df["n"] >= MIN_N) & (df[f"diff_p_{c}"].abs() >= FLAG_DIFF_PP)
+    hits = pd.DataFrame(hits)
+    return pd.Series([",".join(hits.columns[row]) for row in hits.to_numpy()], index=df.index, dtype=object)
+
+
+def snapshot(live: LiveCounts, paths, model, bls) -> pd.DataFrame:
+    live.poll(paths, model=model)
+    live.save()
+    df = live.table(bls)
+    df["flag"] = flag_rows(df)
+    return df
+
+
+def render(df: pd.DataFrame) -> str:
+    if df.empty:
+        return "No records yet."
+    shown = df.drop(columns=[c for c in df if c.startswith("p_") and f"diff_{c}" in df])
+    summary = df.groupby("model")[["n", "errors"]].sum()
+    lines = [time.strftime("%H:%M:%S"),
+             shown.to_string(index=False, na_rep="-"),
+             "",
+             "Totals: " + ", ".join(f"{m} {r.n} profiles / {r.errors} errors" for m, r in summary.iterrows())]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="profile CSVs, batch-result JSONL files, folders or globs")
+    parser.add_argument("--model", help="model name for the files (default: guessed from the path)")
+    parser.add_argument("--follow", type=float, metavar="SECONDS", help="keep polling at this interval")
+    parser.add_argument("--json", action="store_true", help="print JSON records instead of a table")
+    parser.add_argument("--reset", action="store_true", help="drop saved offsets and count from the start")
+    parser.add_argument("--state", type=Path, default=LIVE_STATE, help="state file (default: %(default)s)")
+    args = parser.parse_args()
+
+    live = LiveCounts(state_file=args.state) if args.reset else LiveCounts.load(args.state)
+    bls = load_bls(BLS_FILE)
+    while True:
+        df = snapshot(live, args.paths, args.model, bls)
+        if args.json:
+            print(df.to_json(orient="records"), flush=True)
+        else:
+            print(render(df), flush=True)
+        if not args.follow:
+            break
+        try:
+            time.sleep(args.follow)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,15 @@
-import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.chunked import GroupedFirst, GroupedMean, iter_csv_chunks, MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+
 # ----------------------------
 # CONFIG
 # ----------------------------
 DATA_DIR = Path("results/csvs")  # update this to your directory
 OUTPUT_FILE = "averaged_logreg.csv"
-
-# ----------------------------
-# Load all CSVs
-# ----------------------------
-all_files = list(DATA_DIR.glob("*.csv"))
-dfs = [pd.read_csv(f) for f in all_files]
-
-# Concatenate all model outputs
-combined = pd.concat(dfs, ignore_index=True)
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # per-chunk budget when streaming the model CSVs (env: ANALYSIS_MEMORY_MB)
 
 # ----------------------------
 # Columns to average vs keep
@@ -27,27 +22,36 @@ avg_cols = [
     "genai_p_asian"
 ]
 
+# take first (same across models) for everything else
+first_cols = [
+    "genai_n",
+    "genai_women",
+    "genai_white",
+    "genai_black",
+    "genai_hispanic",
+    "genai_asian",
+    "n_employed",
+    "bls_p_women",
+    "bls_p_white",
+    "bls_p_black",
+    "bls_p_asian",
+    "bls_p_hispanic"
+]
+
+# ----------------------------
+# Stream all CSVs, keeping per-career partial aggregates
+# ----------------------------
+all_files = list(DATA_DIR.glob("*.csv"))
+
+means = GroupedMean("career", avg_cols)
+firsts = GroupedFirst("career", first_cols)
+for f in all_files:
+    for chunk in iter_csv_chunks(f, memory_mb=MEMORY_LIMIT_MB):
+        means.update(chunk)
+        firsts.update(chunk)
+
 # Group by career
-averaged = (
-    combined.groupby("career", as_index=False)
-    .agg({
-        # average these columns
-        **{col: "mean" for col in avg_cols},
-        # take first (same across models) for everything else
-        "genai_n": "first",
-        "genai_women": "first",
-        "genai_white": "first",
-        "genai_black": "first",
-        "genai_hispanic": "first",
-        "genai_asian": "first",
-        "n_employed": "first",
-        "bls_p_women": "first",
-        "bls_p_white": "first",
-        "bls_p_black": "first",
-        "bls_p_asian": "first",
-        "bls_p_hispanic": "first"
-    })
-)
+averaged = means.result().join(firsts.result()).reset_index()
 
 # Round averages to 3 decimal place
 averaged[avg_cols] = averaged[avg_cols].round(3)
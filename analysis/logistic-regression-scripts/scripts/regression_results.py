@@ -0,0 +1,184 @@
+"""
+Regression results tables without R.
+
+Python version of the tables from regression_results_all_models.R and
+regression_results_averaged.R (the plots stay in R): for every model and
+group, a quasibinomial GLM of the GenAI share on the median-centered BLS
+share, weighted by genai_n, in three variants (Raw, Trimmed5 = BLS share
+within its 5-95% quantiles, Robust = Mqle fit), with Wald tests of alpha = 0
+and beta = 1 and BH-adjusted p-values within each method. All fits of a
+table are solved together (see common/glm.py).
+
+Run from analysis/logistic-regression-scripts:
+    python scripts/regression_results.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.glm import binom, bh_adjust, fit_quasibinomial, fit_robust_binomial, wald_p
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+CSV_DIR = Path("results/preprocessed-csvs")
+MODEL_FILES = {
+    "ChatGPT": "openai_converted.csv",
+    "Gemini": "gemini_converted.csv",
+    "DeepSeek": "deepseek_converted.csv",
+    "Mistral": "mistral_converted.csv",
+}
+AVERAGED_FILE = "averaged_logreg.csv"
+OUTPUT_DIR = Path("results")
+ALL_MODELS_CSV = "regression_results_all_models_with_methods.csv"
+AVERAGED_CSV = "regression_results_averaged_with_methods.csv"
+
+GROUPS = {"white": "White", "black": "Black", "asian": "Asian", "hispanic": "Hispanic", "women": "Women"}
+TRIM = (0.05, 0.95)        # Trimmed5: BLS quantiles kept
+SLOPE_RANGE = (0.10, 0.90)  # BLS quantiles over which beta_dev is averaged
+
+COLUMNS = [
+    "group", "method", "center_at",
+    "alpha", "se_alpha", "p_alpha", "p_alpha_fdr", "alpha_fmt",
+    "alpha_effect_pp_pct", "alpha_code",
+    "beta", "se_beta", "p_beta", "p_beta_fdr", "beta_fmt",
+    "beta_dev_round", "beta_dev_fmt", "beta_code",
+]
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def normalize_to_prop(v: pd.Series) -> pd.Series:
+    """Proportions stay as-is, percents are divided by 100, anything else is treated as logits."""
+    if v.isna().all():
+        return v
+    lo, hi = v.min(), v.max()
+    if lo >= 0 and hi <= 1:
+        return v
+    if lo >= 0 and hi <= 100:
+        return v / 100
+    return 1 / (1 + np.exp(-v))
+
+
+def stars(p):
+    return np.select([p < 0.001, p < 0.01, p < 0.05], ["***", "**", "*"], "")
+
+
+def fmt_round(x, digits=3):
+    """round() as R prints it: no trailing zeros."""
+    s = f"{round(x, digits):.{digits}f}".rstrip("0").rstrip(".")
+    return "0" if s in ("-0", "") else s
+
+
+def code_signed(values, cuts):
+    """0 / +, ++, +++ / -, --, --- by |value| against three cut points."""
+    values = np.asarray(values, dtype=float)
+    level = np.searchsorted(cuts, np.abs(values), side="right")
+    return ["0" if lv == 0 else ("+" if v > 0 else "-") * lv for v, lv in zip(values, level)]
+
+
+# ----------------------------
+# Fits
+# ----------------------------
+def fit_table(frames, normalize=False):
+    """
+    One row per (model, group, method) for {model name: preprocessed table}.
+    All Raw and Trimmed5 fits are stacked into one IRLS run, the Robust fits
+    into a second one (or copied from Raw as Robust_FallbackToRaw without scipy).
+    """
+    keys, xs, ys, ns, centers = [], [], [], [], []
+    rows = max(len(df) for df in frames.values())
+    for model, df in frames.items():
+        for key, pretty in GROUPS.items():
+            bls, genai = df[f"bls_p_{key}"].astype(float), df[f"genai_p_{key}"].astype(float)
+            if normalize:
+                bls, genai = normalize_to_prop(bls), normalize_to_prop(genai)
+            pad = rows - len(df)
+            keys.append((model, pretty))
+            xs.append(np.pad(bls.to_numpy(), (0, pad), constant_values=np.nan))
+            ys.append(np.pad(genai.to_numpy(), (0, pad), constant_values=np.nan))
+            ns.append(np.pad(df["genai_n"].to_numpy(dtype=float), (0, pad), constant_values=np.nan))
+            centers.append(np.nanmedian(xs[-1]))
+
+    bls, y, n = np.array(xs), np.array(ys), np.array(ns)
+    center = np.array(centers)
+    x = bls - center[:, None]
+    ok = np.isfinite(bls) & np.isfinite(y)
+    q_lo, q_hi = np.nanquantile(np.where(ok, bls, np.nan), TRIM, axis=1)
+    trimmed = ok & (bls >= q_lo[:, None]) & (bls <= q_hi[:, None])
+
+    masks = {"Raw": ok, "Trimmed5": trimmed}
+    fits = fit_quasibinomial(np.concatenate([x, x]), np.concatenate([y, y]), np.concatenate([n, n]),
+                             mask=np.concatenate([ok, trimmed]))
+    k = len(keys)
+    results = {"Raw": (fits.coef[:k], fits.se[:k]), "Trimmed5": (fits.coef[k:], fits.se[k:])}
+    if binom is not None:
+        robust = fit_robust_binomial(x, y, n, mask=ok, start=results["Raw"][0])
+        results["Robust"] = (robust.coef, robust.se)
+        masks["Robust"] = ok
+    else:
+        results["Robust_FallbackToRaw"] = results["Raw"]
+        masks["Robust_FallbackToRaw"] = ok
+
+    out = []
+    for method, (coef, se) in results.items():
+        alpha, beta = coef[:, 0], coef[:, 1]
+        # Average response-scale slope minus 1 over the central BLS range of the fitted rows
+        lo, hi = np.nanquantile(np.where(masks[method], bls, np.nan), SLOPE_RANGE, axis=1)
+        grid = np.linspace(lo, hi, 101, axis=1) - center[:, None]
+        mu = 1 / (1 + np.exp(-(alpha[:, None] + beta[:, None] * grid)))
+        out.append(pd.DataFrame({
+            "model": [m for m, _ in keys],
+            "group": [g for _, g in keys],
+            "method": method,
+            "center_at": center,
+            "alpha": alpha, "se_alpha": se[:, 0], "p_alpha": wald_p(alpha, se[:, 0], 0.0),
+            "beta": beta, "se_beta": se[:, 1], "p_beta": wald_p(beta, se[:, 1], 1.0),
+            "alpha_effect_pp": 1 / (1 + np.exp(-alpha)) - center,
+            "beta_dev": (beta[:, None] * mu * (1 - mu) - 1).mean(axis=1),
+        }))
+    return pd.concat(out, ignore_index=True)
+
+
+def results_table(raw: pd.DataFrame) -> pd.DataFrame:
+    """BH within each method, then the formatted columns of the published CSVs."""
+    df = raw.copy()
+    for col in ["p_alpha", "p_beta"]:
+        df[f"{col}_fdr"] = df.groupby("method")[col].transform(lambda p: bh_adjust(p.to_numpy()))
+
+    df["alpha_effect_pp_pct"] = (df["alpha_effect_pp"] * 100).round(2)
+    df["beta_dev_round"] = df["beta_dev"].round(3)
+    df["alpha_fmt"] = [fmt_round(a) + s for a, s in zip(df["alpha"], stars(df["p_alpha_fdr"]))]
+    df["beta_fmt"] = [fmt_round(b) + s for b, s in zip(df["beta"], stars(df["p_beta_fdr"]))]
+    df["alpha_code"] = code_signed(df["alpha_effect_pp_pct"], [0.5, 3, 10])
+    df["beta_code"] = code_signed(df["beta_dev"], [0.1, 0.5, 1.5])
+    df["beta_dev_fmt"] = [("+" if d > 0 else "") + f"{d:.2f}" for d in df["beta_dev_round"]]
+
+    df = df.sort_values(["method", "model", "group"], ignore_index=True)
+    return df[["model"] + COLUMNS]
+
+
+def load_tables(csv_dir=CSV_DIR, files=MODEL_FILES):
+    return {model: pd.read_csv(Path(csv_dir) / name) for model, name in files.items()}
+
+
+def main():
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    table = results_table(fit_table(load_tables()))
+    table.to_csv(OUTPUT_DIR / ALL_MODELS_CSV, index=False)
+    print(f"Wrote {OUTPUT_DIR / ALL_MODELS_CSV} (rows: {len(table)})")
+
+    averaged = pd.read_csv(CSV_DIR / AVERAGED_FILE)
+    table = results_table(fit_table({"Average": averaged}, normalize=True))[COLUMNS]
+    table.to_csv(OUTPUT_DIR / AVERAGED_CSV, index=False)
+    print(f"Wrote {OUTPUT_DIR / AVERAGED_CSV} (rows: {len(table)})")
+    print(f"Robust available: {binom is not None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Age and salary distributions of the generated profiles.
+
+    age_salary/quantiles.csv  n, mean, std, min, p10/p25/p50/p75/p90, max of age
+                              and salary per (model, occupation, group), where
+                              group is All, Women, Men (every non-female
+                              profile) or a race (multi-label); occupation
+                              "All" pools a model's careers
+    age_salary/gaps.csv       per (model, occupation): women vs men and each
+                              race vs the rest (mean and median difference,
+                              Kolmogorov-Smirnov distance)
+
+Everything comes from the cached per-file sketches in common/distributions.py,
+so rerunning after a profile CSV changes only rereads that file's model.
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import RACES
+from common.distributions import NUMERIC_COLS, ProfileDistributions, ks_distance, load_distributions
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "age_salary"
+QUANTILES = [0.10, 0.25, 0.50, 0.75, 0.90]
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file sketches; None = all CPUs
+# =================================
+
+QUANTILES_CSV = "quantiles.csv"
+GAPS_CSV = "gaps.csv"
+
+GROUPS = {"All": {}, "Women": {"female": True}, "Men": {"female": False},
+          **{r.title(): {"race": r} for r in RACES}}
+COMPARISONS = {"Women vs Men": ({"female": True}, {"female": False}),
+               **{f"{r.title()} vs Rest": ({"race": r}, {"race": r, "has_race": False}) for r in RACES}}
+
+
+def distribution_levels(dists, models=MODEL_LIST):
+    """[(model, occupation, ProfileDistributions)] per file plus a pooled "All" row per model."""
+    levels = []
+    for model in models:
+        files = [(occ, d) for (m, occ), d in dists.items() if m == model]
+        levels += [(model, occ.title(), d) for occ, d in files]
+        levels.append((model, "All", ProfileDistributions.combine(d for _, d in files)))
+    return levels
+
+
+def quantile_table(levels, quantiles=QUANTILES):
+    records = []
+    for model, occ, d in levels:
+        for col in NUMERIC_COLS:
+            for group, where in GROUPS.items():
+                sketch, moments = d.select(col, **where)
+                stats = moments.result()
+                if not stats["n"]:
+                    continue
+                records.append({"model": model, "occupation": occ, "variable": col, "group": group,
+                                "n": stats["n"], "mean": stats["mean"], "std": stats["std"], "min": stats["min"],
+                                **{f"p{round(100 * q)}": v for q, v in zip(quantiles, sketch.quantile(quantiles))},
+                                "max": stats["max"]})
+    df = pd.DataFrame(records)
+    df[["mean", "std"]] = df[["mean", "std"]].round(2)
+    return df
+
+
+def gap_table(levels):
+    records = []
+    for model, occ, d in levels:
+        for col in NUMERIC_COLS:
+            for name, (a, b) in COMPARISONS.items():
+                (sa, ma), (sb, mb) = d.select(col, **a), d.select(col, **b)
+                if not ma.n or not mb.n:
+                    continue
+                records.append({"model": model, "occupation": occ, "variable": col, "comparison": name,
+                                "n_a": ma.n, "n_b": mb.n,
+                                "mean_diff": ma.mean - mb.mean,
+                                "median_diff": float(sa.quantile(0.5) - sb.quantile(0.5)),
+                                "ks": ks_distance(sa, sb)})
+    df = pd.DataFrame(records)
+    df[["mean_diff", "ks"]] = df[["mean_diff", "ks"]].round(3)
+    return df
+
+
+def write_tables(dists, out_dir=OUTPUT_DIR, models=MODEL_LIST):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    levels = distribution_levels(dists, models)
+    for name, df in [(QUANTILES_CSV, quantile_table(levels)), (GAPS_CSV, gap_table(levels))]:
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    dists = load_distributions(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_tables(dists)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,50 @@
-import pandas as pd
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.chunked import GroupedMean, iter_csv_chunks, MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+
 # ----------------------------
 # CONFIG
 # ----------------------------
 DATA_DIR = Path("results_across_40")  # update this to your directory
 OUTPUT_FILE = "results_across_40/averaged_differences_vs_BLS.csv"
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # per-chunk budget when streaming the model CSVs (env: ANALYSIS_MEMORY_MB)
+DEMO_COLS = ["p_women", "p_white", "p_black", "p_asian", "p_hispanic"]
 
-# ----------------------------
-# Load all CSVs
-# ----------------------------
-all_files = list(DATA_DIR.glob("*.csv"))
 
-dfs = []
-for f in all_files:
-    df = pd.read_csv(f)
-    dfs.append(df)
+def average_across_models(frames):
+    """Per-occupation mean of DEMO_COLS over any number of model tables/chunks."""
+    means = GroupedMean("occupation", DEMO_COLS)
+    for df in frames:
+        means.update(df)
 
-# Concatenate all 4 model outputs
-combined = pd.concat(dfs, ignore_index=True)
+    # ----------------------------
+    # Group by occupation and average
+    # ----------------------------
+    return (
+        means.result()
+        .round(1)   # round to 1 decimal place
+        .reset_index()
+    )
 
-# ----------------------------
-# Group by occupation and average
-# ----------------------------
-averaged = (
-    combined.groupby("occupation")[["p_women", "p_white", "p_black", "p_asian", "p_hispanic"]]
-    .mean()
-    .round(1)   # round to 1 decimal place
-    .reset_index()
-)
 
-# ----------------------------
-# Save result
-# ----------------------------
-averaged.to_csv(OUTPUT_FILE, index=False)
+def main():
+    # ----------------------------
+    # Stream all CSVs, keeping per-occupation sums/counts
+    # ----------------------------
+    all_files = sorted(f for f in DATA_DIR.glob("*.csv") if f.name != Path(OUTPUT_FILE).name)
+    averaged = average_across_models(
+        chunk for f in all_files for chunk in iter_csv_chunks(f, memory_mb=MEMORY_LIMIT_MB)
+    )
+
+    # ----------------------------
+    # Save result
+    # ----------------------------
+    averaged.to_csv(OUTPUT_FILE, index=False)
+
+    print(f"✅ Saved averaged results to {OUTPUT_FILE}")
 
-print(f"✅ Saved averaged results to {OUTPUT_FILE}")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Biography "archetypes" per occupation and who each model assigns to them.
+
+The biographies of each occupation (all models pooled) are clustered into
+N_CLUSTERS groups with a hashing vectorizer + mini-batch k-means
+(common/biography_clusters.py; needs scikit-learn). Writes
+
+    biography_clusters/clusters.csv     occupation, cluster, profiles, the
+                                        words most typical of the cluster and
+                                        the biographies nearest its center
+    biography_clusters/composition.csv  per occupation, cluster and model:
+                                        profiles, % of the model's profiles in
+                                        that cluster, and % women / each race
+                                        within it
+
+and each profile's cluster id (in file row order) to
+analysis/.cache/biography_clusters/labels.parquet.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import CACHE_DIR, MODELS, PROFILES_DIR, profile_files
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import RACES, race_counts_from_histogram
+from common.parallel import parallel_map, raise_failures
+from common.biography_clusters import N_CLUSTERS, N_EXAMPLES, cluster_occupation
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "biography_clusters"
+CLUSTERS = N_CLUSTERS          # archetypes per occupation
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-occupation fits; None = all CPUs
+# =================================
+
+CLUSTERS_CSV = "clusters.csv"
+COMPOSITION_CSV = "composition.csv"
+LABELS_FILE = CACHE_DIR / "biography_clusters" / "labels.parquet"
+EXAMPLE_CHARS = 300
+
+
+def all_occupations(models=MODEL_LIST, profiles_dir=PROFILES_DIR):
+    return sorted({occ for m in models for occ, _ in profile_files(m, profiles_dir)})
+
+
+def cluster_all(models=MODEL_LIST, profiles_dir=PROFILES_DIR, n_clusters=CLUSTERS, workers=WORKERS):
+    occupations = all_occupations(models, profiles_dir)
+    results = raise_failures(parallel_map(cluster_occupation, occupations, workers=workers, models=models,
+                                          profiles_dir=profiles_dir, n_clusters=n_clusters,
+                                          memory_mb=MEMORY_LIMIT_MB))
+    return [r.value for r in results]
+
+
+def clusters_table(results):
+    records = []
+    for r in results:
+        sizes = r["counts"].sum(axis=(0, 2, 3))
+        for c, size in enumerate(sizes):
+            examples = [e[:EXAMPLE_CHARS] for e in r["examples"][c]] + [""] * N_EXAMPLES
+            records.append({"occupation": r["occupation"].title(), "cluster": c, "profiles": int(size),
+                            "top_terms": " ".join(r["terms"][c]),
+                            **{f"example_{i + 1}": examples[i] for i in range(N_EXAMPLES)}})
+    return pd.DataFrame(records)
+
+
+def composition_table(results):
+    records = []
+    for r in results:
+        counts = r["counts"]                                  # (models, clusters, 2, 16)
+        per_model = counts.sum(axis=(1, 2, 3))
+        for mi, model in enumerate(r["models"]):
+            for c in range(counts.shape[1]):
+                joint = counts[mi, c]
+                n = int(joint.sum())
+                if not n:
+                    continue
+                races = race_counts_from_histogram(joint.sum(axis=0))
+                records.append({"occupation": r["occupation"].title(), "cluster": c, "model": model, "n": n,
+                                "pct_of_model": round(100 * n / per_model[mi], 2),
+                                "p_women": round(100 * joint[1].sum() / n, 2),
+                                **{f"p_{race}": round(100 * races[race] / n, 2) for race in RACES}})
+    return pd.DataFrame(records)
+
+
+def labels_frame(results):
+    parts = []
+    for r in results:
+        for model, labels in r["row_labels"].items():
+            parts.append(pd.DataFrame({"model": model, "occupation": r["occupation"],
+                                       "row": np.arange(len(labels), dtype=np.int32), "cluster": labels}))
+    df = pd.concat(parts, ignore_index=True)
+    df[["model", "occupation"]] = df[["model", "occupation"]].astype("category")
+    return df
+
+
+def write_tables(results, out_dir=OUTPUT_DIR, labels_file=LABELS_FILE):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    for name, df in [(CLUSTERS_CSV, clusters_table(results)), (COMPOSITION_CSV, composition_table(results))]:
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+    labels_file.parent.mkdir(parents=True, exist_ok=True)
+    labels = labels_frame(results)
+    try:
+        labels.to_parquet(labels_file, index=False)
+    except ImportError:   # no pyarrow: fall back to a compressed CSV
+        labels_file = labels_file.with_suffix(".csv.gz")
+        labels.to_csv(labels_file, index=False)
+    print(f"Wrote {len(labels)} row labels to {labels_file}")
+
+
+def main():
+    write_tables(cluster_all())
+
+
+if __name__ == "__main__":
+    main()
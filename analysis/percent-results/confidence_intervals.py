@@ -0,0 +1,113 @@
+"""
+Confidence intervals for every percentage in results_across_40 / results_vs_BLS.
+
+For each model, occupation and category (women, white, black, asian, hispanic)
+this writes confidence_intervals/<model>_intervals.csv with the count, the
+percentage, the BLS baseline, the difference and three 95% intervals (in
+percentage points): Wilson, Clopper-Pearson and a count-level multinomial
+bootstrap. An "Average" row per category gives the bootstrap interval of the
+mean over occupations (what the dotplots show on top).
+
+Subtract `bls_pct` from any interval to get it on the difference-from-BLS
+scale used by results_vs_BLS and the dotplots.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import count_model_files
+from common.intervals import (ALPHA, CATEGORIES, N_BOOT, bootstrap_proportions, category_counts,
+                              clopper_pearson_interval, percentile_interval, wilson_interval, beta)
+
+from results_vs_BLS import load_bls
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "confidence_intervals"
+N_REPLICATES = N_BOOT
+SEED = 0
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file counts; None = all CPUs
+# =================================
+
+INTERVAL_COLS = ["wilson_low", "wilson_high", "cp_low", "cp_high", "boot_low", "boot_high"]
+
+
+def interval_table(file_counts, bls, n_boot=N_REPLICATES, seed=SEED, alpha=ALPHA):
+    """
+    Long table of intervals for one model.
+    file_counts: [(occupation, DemographicCounts)] from count_model_files
+    bls:         output of results_vs_BLS.load_bls
+    """
+    occupations = [occ for occ, _ in file_counts]
+    joint = np.stack([c.joint for _, c in file_counts])
+    n = joint.sum(axis=(1, 2))
+    k = category_counts(joint)                                    # (occ, 5)
+
+    wilson = wilson_interval(k, n[:, None], alpha)
+    if beta is not None:
+        exact = clopper_pearson_interval(k, n[:, None], alpha)
+    else:
+        exact = (np.full(k.shape, np.nan), np.full(k.shape, np.nan))
+    reps = bootstrap_proportions(joint, n_boot, seed)             # (B, occ, 5)
+    boot = percentile_interval(reps, alpha)
+
+    bls = bls.set_index("occupation")
+    bls_pct = bls.reindex(occupations)[[f"bls_p_{c}" for c in CATEGORIES]].to_numpy(dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100.0 * k / n[:, None]
+    cells = {
+        "n": np.repeat(n[:, None], len(CATEGORIES), axis=1),
+        "count": k,
+        "pct": pct,
+        "bls_pct": bls_pct,
+        "diff": pct - bls_pct,
+        "wilson_low": 100 * wilson[0], "wilson_high": 100 * wilson[1],
+        "cp_low": 100 * exact[0], "cp_high": 100 * exact[1],
+        "boot_low": 100 * boot[0], "boot_high": 100 * boot[1],
+    }
+    df = pd.DataFrame({name: values.ravel() for name, values in cells.items()})
+    df.insert(0, "category", np.tile(CATEGORIES, len(occupations)))
+    df.insert(0, "occupation", np.repeat(occupations, len(CATEGORIES)))
+
+    # Average over occupations: bootstrap the mean of the per-occupation percentages
+    mean_low, mean_high = percentile_interval(np.nanmean(reps, axis=1), alpha)   # (5,)
+    avg = pd.DataFrame({
+        "occupation": "Average",
+        "category": CATEGORIES,
+        "n": n.sum(),
+        "count": k.sum(axis=0),
+        "pct": np.nanmean(pct, axis=0),
+        "bls_pct": np.nanmean(bls_pct, axis=0),
+        "diff": np.nanmean(pct - bls_pct, axis=0),
+        "boot_low": 100 * mean_low,
+        "boot_high": 100 * mean_high,
+    })
+    df = pd.concat([avg, df], ignore_index=True)
+
+    # Same occupation spelling as results_vs_BLS (and so the dotplots)
+    df["occupation"] = df["occupation"].str.title()
+    float_cols = ["pct", "bls_pct", "diff"] + INTERVAL_COLS
+    df[float_cols] = df[float_cols].round(2)
+    return df[["occupation", "category", "n", "count"] + float_cols]
+
+
+def main():
+    bls = load_bls(BLS_FILE)
+    counts = count_model_files(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    Path(OUTPUT_DIR).mkdir(exist_ok=True)
+    for model, file_counts in counts.items():
+        df = interval_table(file_counts, bls)
+        output_csv = f"{OUTPUT_DIR}/{model}_intervals.csv"
+        df.to_csv(output_csv, index=False)
+        print(f"Wrote {len(df)} rows to {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Sample-size convergence: how many profiles each (model, occupation) needed
+before its percentages settled, to size future generation runs.
+
+    convergence/stable_n.csv  per model, occupation and category: profiles
+                              generated, final %, stable_n (from here on the
+                              running % stays within TOLERANCE_PP of the final %)
+                              and ci_n (from here on the 95% Wilson half-width
+                              is <= TOLERANCE_PP; n + 1 = never); category
+                              "any" is the max over categories
+    convergence/curves.csv    running % and half-width at checkpoints of n
+    convergence/budget.csv    per model: median / 90th percentile / max over
+                              occupations of the "any" stable_n and ci_n
+
+Rows are read in file order, i.e. in the order they were generated
+(common/convergence.py).
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.convergence import TOLERANCE_PP, convergence, file_convergence
+from common.intervals import CATEGORIES
+from common.parallel import map_profile_files, raise_failures
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "convergence"
+TOLERANCE = TOLERANCE_PP    # percentage points
+DECIMALS = 2
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file curves; None = all CPUs
+# =================================
+
+STABLE_CSV = "stable_n.csv"
+CURVES_CSV = "curves.csv"
+BUDGET_CSV = "budget.csv"
+
+
+def compute(models=MODEL_LIST, profiles_dir=PROFILES_DIR, tolerance=TOLERANCE, workers=WORKERS) -> list:
+    """[((model, occupation), convergence dict)] in profile_files order."""
+    results = raise_failures(map_profile_files(file_convergence, models, profiles_dir, workers=workers,
+                                               tolerance=tolerance, memory_mb=MEMORY_LIMIT_MB))
+    return [(r.key, r.value) for r in results]
+
+
+def compute_from_codes(codes, models=MODEL_LIST, tolerance=TOLERANCE) -> list:
+    """`compute` from already scanned per-file codes (common.crosstab.profile_codes / load_codes)."""
+    return [(key, convergence(c, tolerance)) for key, c in codes if key[0] in models]
+
+
+def stable_table(results) -> pd.DataFrame:
+    records = []
+    for (model, occupation), c in results:
+        base = {"model": model, "occupation": occupation.title(), "n": c["n"]}
+        records += [{**base, "category": cat, "final_pct": c["final"][i], "stable_n": int(c["stable_n"][i]),
+                     "ci_n": int(c["ci_n"][i])} for i, cat in enumerate(CATEGORIES)]
+        records.append({**base, "category": "any", "final_pct": np.nan,
+                        "stable_n": int(c["stable_n"].max(initial=0)), "ci_n": int(c["ci_n"].max(initial=0))})
+    return pd.DataFrame(records)
+
+
+def curves_table(results) -> pd.DataFrame:
+    frames = []
+    for (model, occupation), c in results:
+        k = len(c["curve_n"])
+        frames.append(pd.DataFrame({
+            "model": model,
+            "occupation": occupation.title(),
+            "category": np.tile(CATEGORIES, k),
+            "n": np.repeat(c["curve_n"], len(CATEGORIES)),
+            "pct": c["curve_p"].ravel(),
+            "half_width": c["curve_half"].ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def budget_table(stable) -> pd.DataFrame:
+    any_cat = stable[stable["category"] == "any"]
+    out = any_cat.groupby("model", sort=False).agg(
+        occupations=("occupation", "size"),
+        generated_median=("n", "median"),
+        stable_n_median=("stable_n", "median"),
+        stable_n_p90=("stable_n", lambda s: s.quantile(0.9)),
+        stable_n_max=("stable_n", "max"),
+        ci_n_median=("ci_n", "median"),
+        ci_n_p90=("ci_n", lambda s: s.quantile(0.9)),
+        ci_n_max=("ci_n", "max"),
+        # ci_n = n + 1: the file ended before the interval got that narrow
+        ci_not_reached=("ci_n", lambda s: int((s > any_cat.loc[s.index, "n"]).sum())),
+    )
+    return out.reset_index()
+
+
+def write_tables(results, out_dir=OUTPUT_DIR, decimals: int = DECIMALS):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    stable = stable_table(results)
+    for name, df in [(STABLE_CSV, stable), (CURVES_CSV, curves_table(results)), (BUDGET_CSV, budget_table(stable))]:
+        df.round(decimals).to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    write_tables(compute())
+
+
+if __name__ == "__main__":
+    main()
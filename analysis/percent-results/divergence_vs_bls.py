@@ -0,0 +1,126 @@
+"""
+How far each model's gender and race distributions are from BLS, as single
+scores per (model, occupation) that can be ranked.
+
+    divergence/divergence.csv     per model, occupation and dimension (gender /
+                                  race): total variation, Jensen-Shannon, KL
+                                  and Hellinger vs BLS
+    divergence/by_model.csv       mean over occupations, ranked (1 = farthest
+                                  from BLS by Jensen-Shannon)
+    divergence/by_occupation.csv  mean over models, ranked the same way
+    divergence/divergence.pdf     Jensen-Shannon heatmaps (models x occupations),
+                                  when matplotlib is installed
+
+The metrics are computed on the whole (model, occupation, category) tensor at
+once (common/divergence.py); race shares are renormalized over race mentions
+because both BLS and the models count multiracial people toward several races.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:  # optional: the tables are written either way
+    plt = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.crosstab import crosstab_tensor
+from common.divergence import METRICS, divergences, gender_distribution, race_distribution
+from common.intervals import CATEGORIES, category_counts
+
+from results_vs_BLS import load_bls
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "divergence"
+RANK_BY = "js"
+DECIMALS = 4
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file counts; None = all CPUs
+# =================================
+
+DIVERGENCE_CSV = "divergence.csv"
+BY_MODEL_CSV = "by_model.csv"
+BY_OCCUPATION_CSV = "by_occupation.csv"
+HEATMAP_PDF = "divergence.pdf"
+DIMENSIONS = ["gender", "race"]
+
+
+def divergence_table(models, occupations, joint, bls) -> pd.DataFrame:
+    """Long format: one row per (model, occupation, dimension) with every metric."""
+    n = joint.sum(axis=(2, 3)).astype(float)                                  # (models, occ)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100 * category_counts(joint) / n[..., None]                     # (models, occ, 5)
+    bls_pct = (bls.set_index("occupation").reindex(occupations)[[f"bls_p_{c}" for c in CATEGORIES]]
+               .to_numpy(dtype=float))[None]                                  # (1, occ, 5)
+    scores = {
+        "gender": divergences(gender_distribution(pct[..., 0]), gender_distribution(bls_pct[..., 0])),
+        "race": divergences(race_distribution(pct[..., 1:]), race_distribution(bls_pct[..., 1:])),
+    }
+    m, o, d = np.meshgrid(np.arange(len(models)), np.arange(len(occupations)), np.arange(len(DIMENSIONS)),
+                          indexing="ij")
+    df = pd.DataFrame({
+        "model": np.asarray(models)[m.ravel()],
+        "occupation": np.asarray(occupations)[o.ravel()],
+        "dimension": np.asarray(DIMENSIONS)[d.ravel()],
+        "n": np.repeat(n.ravel(), len(DIMENSIONS)).astype(np.int64),
+        **{name: np.stack([scores[dim][name] for dim in DIMENSIONS], axis=-1).ravel() for name in METRICS},
+    })
+    return df[(df["n"] > 0) & df[METRICS].notna().all(axis=1)].reset_index(drop=True)
+
+
+def ranked(df, by) -> pd.DataFrame:
+    """Mean of each metric per `by` and dimension, ranked within the dimension."""
+    out = df.groupby([by, "dimension"], as_index=False).agg(cells=("n", "size"), **{m: (m, "mean") for m in METRICS})
+    out["rank"] = out.groupby("dimension")[RANK_BY].rank(ascending=False, method="min").astype(int)
+    return out.sort_values(["dimension", "rank"]).reset_index(drop=True)
+
+
+def plot_heatmaps(df, path):
+    fig, axes = plt.subplots(len(DIMENSIONS), 1, figsize=(14, 3 + 1.2 * df["model"].nunique() * len(DIMENSIONS)))
+    for ax, dim in zip(np.atleast_1d(axes), DIMENSIONS):
+        grid = df[df["dimension"] == dim].pivot(index="model", columns="occupation", values=RANK_BY)
+        grid = grid[grid.mean().sort_values(ascending=False).index]           # worst occupations first
+        im = ax.imshow(grid.to_numpy(), aspect="auto", cmap="Reds", vmin=0)
+        ax.set_yticks(range(len(grid.index)), grid.index)
+        ax.set_xticks(range(len(grid.columns)), grid.columns.str.title(), rotation=90, fontsize=8)
+        ax.set_title(f"{dim.title()}: Jensen-Shannon divergence vs BLS (bits)")
+        fig.colorbar(im, ax=ax)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def write_tables(df, out_dir=OUTPUT_DIR, decimals: int = DECIMALS):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    tables = [(DIVERGENCE_CSV, df), (BY_MODEL_CSV, ranked(df, "model")),
+              (BY_OCCUPATION_CSV, ranked(df, "occupation"))]
+    for name, table in tables:
+        table = table.round(decimals)
+        if "occupation" in table:
+            table["occupation"] = table["occupation"].str.title()
+        table.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(table)} rows to {out_dir / name}")
+    if plt is None:
+        print("matplotlib is not installed; skipping the heatmaps")
+        return
+    plot_heatmaps(df, out_dir / HEATMAP_PDF)
+    print(f"Wrote {out_dir / HEATMAP_PDF}")
+
+
+def main():
+    models, occupations, joint = crosstab_tensor(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB,
+                                                 workers=WORKERS)
+    write_tables(divergence_table(models, occupations, joint, load_bls(BLS_FILE)))
+
+
+if __name__ == "__main__":
+    main()
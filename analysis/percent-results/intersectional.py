@@ -0,0 +1,76 @@
+"""
+Gender x race cross-tabs per model and occupation, and how the intersections
+compare with BLS.
+
+    intersectional/crosstab.csv           every (gender, race combination) cell:
+                                          count, % of the occupation's profiles
+                                          and % within the gender
+    intersectional/conditional_rates.csv  per race (multi-label): profiles naming
+                                          it, % women among them vs BLS p_women,
+                                          % of women / of men naming it vs BLS
+                                          p_<race>, and % of them that are mixed race
+
+BLS only publishes marginals, so the BLS columns are what the intersections
+would be if gender and race were independent within the occupation: e.g.
+diff_female for Black nurses is (% women among the model's Black nurses) -
+(% women among all nurses per BLS).
+
+All files are counted into one (model, occupation, gender, race mask) tensor
+with a single bincount (common/crosstab.py).
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.crosstab import crosstab_table, crosstab_tensor, rates_table
+
+from results_vs_BLS import load_bls
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "intersectional"
+DECIMALS = 2
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file codes; None = all CPUs
+# =================================
+
+CROSSTAB_CSV = "crosstab.csv"
+RATES_CSV = "conditional_rates.csv"
+
+
+def with_bls(rates, bls):
+    """Add the BLS marginals each conditional rate is compared against."""
+    p_race = (bls.drop(columns="bls_p_women")
+                 .melt(id_vars="occupation", var_name="race", value_name="bls_p_race"))
+    p_race["race"] = p_race["race"].str.removeprefix("bls_p_")
+    rates = (rates.merge(bls[["occupation", "bls_p_women"]], on="occupation", how="left")
+                  .merge(p_race, on=["occupation", "race"], how="left"))
+    rates["diff_female"] = rates["pct_female"] - rates["bls_p_women"]
+    rates["diff_of_women"] = rates["pct_of_women"] - rates["bls_p_race"]
+    rates["diff_of_men"] = rates["pct_of_men"] - rates["bls_p_race"]
+    return rates[["model", "occupation", "race", "n_race", "pct_female", "bls_p_women", "diff_female",
+                  "pct_of_women", "pct_of_men", "bls_p_race", "diff_of_women", "diff_of_men", "pct_mixed"]]
+
+
+def write_tables(models, occupations, joint, bls, out_dir=OUTPUT_DIR, decimals: int = DECIMALS):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    tables = [(CROSSTAB_CSV, crosstab_table(models, occupations, joint)),
+              (RATES_CSV, with_bls(rates_table(models, occupations, joint), bls))]
+    for name, df in tables:
+        df = df.round(decimals)
+        df["occupation"] = df["occupation"].str.title()
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    models, occupations, joint = crosstab_tensor(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB,
+                                                 workers=WORKERS)
+    write_tables(models, occupations, joint, load_bls(BLS_FILE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+How often the motivations / biographies use stereotype-laden vocabulary.
+
+Every profile is scored against the LEXICONS below (or a JSON file of
+{lexicon: [terms]} given as LEXICON_FILE / the first argument); "*" ends a
+prefix term. For each model, occupation, text column, lexicon and group
+(gender All / Women / Men x race All / each race, multi-label) the table has
+
+    n              profiles
+    docs_pct       % of profiles using at least one term of the lexicon
+    per_1k_words   lexicon hits per 1,000 words
+
+in lexicon_rates/lexicon_rates.csv; occupation "All" pools a model's careers.
+Files are scanned in parallel, each distinct text once (common/lexicon.py).
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import N_MASKS, RACE_BITS, RACES
+from common.lexicon import TEXT_COLS, LexiconCounts, count_model_lexicons
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "lexicon_rates"
+LEXICON_FILE = None   # JSON {lexicon: [terms]}; None = LEXICONS below
+LEXICONS = {
+    "agentic": ["ambitio*", "assertive*", "confident*", "decisive*", "independen*", "determin*", "driven",
+                "lead*", "competitive*", "self-reliant", "self-confident", "dominan*", "achiev*", "succeed*",
+                "success*", "excel*", "master*", "bold*", "courage*", "daring", "fearless*", "outspoken",
+                "analytic*", "logical*", "risk-taking", "entrepreneur*", "authority", "power*"],
+    "communal": ["caring", "compassion*", "empath*", "kind", "kindness", "warm*", "nurtur*", "support*",
+                 "helpful", "helping", "help others", "gentle", "sensitiv*", "understanding", "collaborat*",
+                 "cooperat*", "together", "communit*", "giving", "patient", "patience", "sympath*", "tactful",
+                 "agreeable", "interpersonal", "listen*", "selfless*", "generous", "altruis*", "affection*"],
+    "family": ["family", "families", "mother*", "father*", "mom", "moms", "dad", "dads", "parent*", "child",
+               "children", "kids", "son", "sons", "daughter*", "husband*", "wife", "wives", "spouse*",
+               "sibling*", "brother*", "sister*", "grandmother*", "grandfather*", "grandparent*", "married",
+               "marriage", "aunt*", "uncle*", "niece*", "nephew*", "cousin*"],
+}
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file scans; None = all CPUs
+# =================================
+
+LEXICON_RATES_CSV = "lexicon_rates.csv"
+
+GENDERS = {"All": [0, 1], "Women": [1], "Men": [0]}
+
+
+def load_lexicons(path=LEXICON_FILE) -> dict:
+    if path is None:
+        return LEXICONS
+    with open(path, encoding="utf-8") as f:
+        return {name: list(terms) for name, terms in json.load(f).items()}
+
+
+def _group_matrix():
+    """(groups, 32) 0/1 matrix mapping (female?, race mask) cells to reported groups."""
+    masks = np.arange(N_MASKS)
+    races = {"All": np.ones(N_MASKS, dtype=bool), **{r: (masks & RACE_BITS[r]) > 0 for r in RACES}}
+    labels, rows = [], []
+    for g, females in GENDERS.items():
+        for r, in_race in races.items():
+            row = np.zeros((2, N_MASKS))
+            row[females] = in_race
+            labels.append((g, r.title()))
+            rows.append(row.ravel())
+    return labels, np.array(rows)
+
+
+def rates_table(counts) -> pd.DataFrame:
+    labels, groups = _group_matrix()
+    frames = []
+    for model, files in counts.items():
+        pooled = LexiconCounts(files[0][1].lexicons, files[0][1].cols)
+        for _, c in files:
+            pooled.merge(c)
+        for occ, c in [(occ.title(), c) for occ, c in files] + [("All", pooled)]:
+            n = c.n @ groups.T                                   # (cols, groups)
+            words = c.words @ groups.T
+            docs = np.einsum("jcl,gc->jgl", c.docs, groups)      # (cols, groups, lexicons)
+            hits = np.einsum("jcl,gc->jgl", c.hits, groups)
+            j, g, l = np.meshgrid(np.arange(len(c.cols)), np.arange(len(labels)), np.arange(len(c.lexicons)),
+                                  indexing="ij")
+            with np.errstate(invalid="ignore", divide="ignore"):
+                frames.append(pd.DataFrame({
+                    "model": model, "occupation": occ,
+                    "column": np.asarray(c.cols)[j.ravel()],
+                    "lexicon": np.asarray(c.lexicons)[l.ravel()],
+                    "gender": [labels[i][0] for i in g.ravel()],
+                    "race": [labels[i][1] for i in g.ravel()],
+                    "n": n[j, g].ravel().astype(np.int64),
+                    "docs_pct": (100 * docs / n[:, :, None]).ravel(),
+                    "per_1k_words": (1000 * hits / words[:, :, None]).ravel(),
+                }))
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df["n"] > 0].reset_index(drop=True)
+    df[["docs_pct", "per_1k_words"]] = df[["docs_pct", "per_1k_words"]].round(2)
+    return df
+
+
+def write_table(counts, out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    df = rates_table(counts)
+    df.to_csv(out_dir / LEXICON_RATES_CSV, index=False)
+    print(f"Wrote {len(df)} rows to {out_dir / LEXICON_RATES_CSV}")
+
+
+def main():
+    lexicons = load_lexicons(sys.argv[1] if len(sys.argv) > 1 else LEXICON_FILE)
+    counts = count_model_lexicons(lexicons, MODEL_LIST, PROFILES_DIR, cols=TEXT_COLS,
+                                  memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_table(counts)
+
+
+if __name__ == "__main__":
+    main()
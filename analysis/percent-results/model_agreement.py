@@ -0,0 +1,107 @@
+"""
+How much the models agree on their biases (differences from BLS), from every
+results_vs_BLS/*_differences_vs_bls.csv present, so a new model's file is
+picked up on the next run.
+
+    agreement/model_distances.csv      every pair of models: distance between
+                                       their bias vectors (pp) per occupation and
+                                       "All" (RMS over shared occupations, plus the
+                                       correlation of their biases)
+    agreement/occupation_clusters.csv  occupations grouped by how all models are
+                                       biased on them (Ward clustering), in
+                                       dendrogram order, with the mean bias per
+                                       category
+    agreement/model_outliers.csv       per model: mean distance from the other
+                                       models' consensus, z-score across models and
+                                       the occupation where it deviates most
+
+See common/agreement.py.
+"""
+import sys
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import OCCUPATION_ALIASES
+from common.agreement import (DIFF_COLS, N_OCCUPATION_CLUSTERS, aggregate_distances, diff_tensor,
+                              occupation_clusters, outlier_scores, pairwise_correlations, pairwise_distances)
+
+# ======== CONFIGURE THIS ========
+DIFFERENCES_DIR = "results_vs_BLS"
+OUTPUT_DIR = "agreement"
+OCCUPATION_CLUSTERS = N_OCCUPATION_CLUSTERS
+DECIMALS = 2
+# =================================
+
+SUFFIX = "_differences_vs_bls.csv"
+DISTANCES_CSV = "model_distances.csv"
+CLUSTERS_CSV = "occupation_clusters.csv"
+OUTLIERS_CSV = "model_outliers.csv"
+
+
+def load_differences(diff_dir=DIFFERENCES_DIR) -> dict:
+    frames = {}
+    for path in sorted(Path(diff_dir).glob(f"*{SUFFIX}")):
+        df = pd.read_csv(path)
+        # Older tables spell some occupations like their file names ("Nursepracticioner")
+        occ = df["occupation"].str.lower()
+        df["occupation"] = occ.map(lambda o: OCCUPATION_ALIASES.get(o, o)).str.title()
+        frames[path.name[:-len(SUFFIX)]] = df
+    return frames
+
+
+def distances_table(diff, models, occupations) -> pd.DataFrame:
+    dist = pairwise_distances(diff)
+    overall = aggregate_distances(dist)
+    corr = pairwise_correlations(diff)
+    records = []
+    for a, b in combinations(range(len(models)), 2):
+        records.append({"model_a": models[a], "model_b": models[b], "occupation": "All",
+                        "distance": overall[a, b], "correlation": corr[a, b]})
+        records += [{"model_a": models[a], "model_b": models[b], "occupation": occ, "distance": dist[a, b, o]}
+                    for o, occ in enumerate(occupations) if not np.isnan(dist[a, b, o])]
+    return pd.DataFrame(records, columns=["model_a", "model_b", "occupation", "distance", "correlation"])
+
+
+def clusters_table(diff, occupations, n_clusters=OCCUPATION_CLUSTERS) -> pd.DataFrame:
+    labels, order = occupation_clusters(diff, n_clusters)
+    with np.errstate(invalid="ignore"):
+        mean = np.nanmean(diff, axis=0)
+    df = pd.DataFrame(mean, columns=[f"mean_{c}" for c in DIFF_COLS])
+    df.insert(0, "occupation", occupations)
+    df.insert(1, "cluster", labels)
+    return df.iloc[order].reset_index(drop=True)
+
+
+def outliers_table(diff, models, occupations) -> pd.DataFrame:
+    out = outlier_scores(diff)
+    return pd.DataFrame({
+        "model": models,
+        "occupations": out["occupations"],
+        "outlier_score": out["score"],
+        "z": out["z"],
+        "most_outlying_occupation": [occupations[i] if i >= 0 else "" for i in out["worst"]],
+    }).sort_values("outlier_score", ascending=False, kind="stable")
+
+
+def write_tables(frames, out_dir=OUTPUT_DIR, decimals: int = DECIMALS):
+    diff, models, occupations = diff_tensor(frames)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    tables = [(DISTANCES_CSV, distances_table(diff, models, occupations)),
+              (CLUSTERS_CSV, clusters_table(diff, occupations)),
+              (OUTLIERS_CSV, outliers_table(diff, models, occupations))]
+    for name, df in tables:
+        df.round(decimals).to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    write_tables(load_differences())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Most frequent generated names and distinct-name counts, from one pass over
+every profile CSV.
+
+    name_frequencies/top_names.csv       top TOP_K full / first / last names per
+                                         (model, occupation), per model ("All")
+                                         and over all models ("All Models")
+    name_frequencies/distinct_names.csv  profiles and (HyperLogLog) distinct full /
+                                         first / last names at the same levels
+
+Per-file sketches are merged for the "All" rows (see common/names.py), so
+the profiles are read once.
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.names import FIELDS, NameSketch, count_model_names
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "name_frequencies"
+TOP_K = 10
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file sketches; None = all CPUs
+# =================================
+
+TOP_NAMES_CSV = "top_names.csv"
+DISTINCT_NAMES_CSV = "distinct_names.csv"
+
+
+def sketch_levels(sketches):
+    """[(model, occupation, NameSketch)] for every file plus the merged "All" levels."""
+    levels = []
+    for model, files in sketches.items():
+        levels += [(model, occ.title(), s) for occ, s in files]
+        levels.append((model, "All", NameSketch.combine(s for _, s in files)))
+    levels.append(("All Models", "All", NameSketch.combine(s for _, occ, s in levels if occ == "All")))
+    return levels
+
+
+def top_names_table(levels, k=TOP_K):
+    frames = []
+    for model, occ, sketch in levels:
+        for field in FIELDS:
+            top = sketch.top[field].result(k)
+            top.insert(0, "rank", range(1, len(top) + 1))
+            top.insert(0, "field", field)
+            top.insert(0, "occupation", occ)
+            top.insert(0, "model", model)
+            frames.append(top)
+    df = pd.concat(frames, ignore_index=True)
+    df["pct"] = (100 * df.pop("share")).round(2)
+    return df
+
+
+def distinct_names_table(levels):
+    return pd.DataFrame([{"model": model, "occupation": occ, **sketch.summary()} for model, occ, sketch in levels])
+
+
+def write_tables(sketches, out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    levels = sketch_levels(sketches)
+    for name, df in [(TOP_NAMES_CSV, top_names_table(levels)), (DISTINCT_NAMES_CSV, distinct_names_table(levels))]:
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    sketches = count_model_names(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_tables(sketches)
+
+
+if __name__ == "__main__":
+    main()
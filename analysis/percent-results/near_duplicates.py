@@ -0,0 +1,77 @@
+"""
+Near-duplicate profiles (same motivations + biography up to the name and a
+few words), across all models and occupations.
+
+    near_duplicates/cell_rates.csv  per (model, occupation): profiles, exact
+                                    duplicate %, near-duplicate % (profiles
+                                    beyond the first of their cluster) and %
+                                    of profiles whose cluster also appears in
+                                    another model/occupation
+    near_duplicates/clusters.csv    the TOP_CLUSTERS largest clusters: profiles,
+                                    distinct texts, models, occupations and an
+                                    example biography
+
+Clusters come from MinHash signatures + LSH banding at Jaccard >= THRESHOLD
+over word 3-grams (common/near_duplicates.py).
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR, detect_encoding, profile_files
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.profile_index import load_row_index
+from common.near_duplicates import NUM_PERM, THRESHOLD, find_near_duplicates
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "near_duplicates"
+JACCARD_THRESHOLD = THRESHOLD
+PERMUTATIONS = NUM_PERM
+TOP_CLUSTERS = 500
+EXAMPLE_CHARS = 200
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file signatures; None = all CPUs
+# =================================
+
+CELL_RATES_CSV = "cell_rates.csv"
+CLUSTERS_CSV = "clusters.csv"
+
+
+def add_examples(clusters, profiles_dir=PROFILES_DIR):
+    """Biography of each cluster's example row (only those rows are parsed, via the row index)."""
+    paths = {(m, occ): p for m in dict.fromkeys(m for m, _ in clusters["example_file"])
+             for occ, p in profile_files(m, profiles_dir)}
+    examples = {}
+    for key, rows in clusters.groupby("example_file")["example_row"]:
+        rows = sorted(set(rows))
+        bio = load_row_index(paths[key]).read_rows(rows, usecols=["biography"],
+                                                   encoding=detect_encoding(paths[key]))["biography"]
+        examples.update({(key, r): str(b)[:EXAMPLE_CHARS] for r, b in zip(rows, bio)})
+    clusters = clusters.copy()
+    clusters["example"] = [examples[(k, r)] for k, r in zip(clusters["example_file"], clusters["example_row"])]
+    clusters["example_model"] = [m for m, _ in clusters.pop("example_file")]
+    return clusters.drop(columns="example_row")
+
+
+def write_tables(dups, out_dir=OUTPUT_DIR, profiles_dir=PROFILES_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    rates = dups.cell_rates()
+    rates["occupation"] = rates["occupation"].str.title()
+    rates[["exact_dup_pct", "near_dup_pct", "cross_cell_pct"]] = \
+        rates[["exact_dup_pct", "near_dup_pct", "cross_cell_pct"]].round(2)
+    clusters = add_examples(dups.clusters().head(TOP_CLUSTERS), profiles_dir)
+    for name, df in [(CELL_RATES_CSV, rates), (CLUSTERS_CSV, clusters)]:
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    dups = find_near_duplicates(MODEL_LIST, PROFILES_DIR, threshold=JACCARD_THRESHOLD, num_perm=PERMUTATIONS,
+                                memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_tables(dups)
+
+
+if __name__ == "__main__":
+    main()
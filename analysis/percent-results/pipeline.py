@@ -0,0 +1,99 @@
+"""
+Run the whole percent-results pipeline in one go.
+
+Replaces running results_across_40_careers.py, results_vs_BLS.py (once per
+model), avg_diffs_vs_bls.py and average_percent_diffs_per_category.py by hand.
+Each model's profiles are read once; every later step works on the in-memory
+tables, and the same files are written:
+
+    results_across_40/<model>_percentages_across_40_careers.csv
+    results_vs_BLS/<model>_differences_vs_bls.csv
+    average_percent_diffs_per_category/<model>_averages.csv
+    results_across_40/averaged_differences_vs_BLS.csv
+    confidence_intervals/<model>_intervals.csv
+    significance/vs_bls.csv, significance/model_pairs.csv
+
+Run from this folder:  python pipeline.py
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import count_model_files, percentage_table
+
+from results_vs_BLS import differences_vs_bls, format_differences, load_bls
+from average_percent_diffs_per_category import average_differences
+from avg_diffs_vs_bls import average_across_models
+from confidence_intervals import interval_table
+from significance_tests import write_tables as write_significance_tables
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS  # models to recompute; others keep their existing tables
+OUT_DIR = Path(__file__).resolve().parent
+DECIMALS = 1
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # files bigger than this (once parsed) are streamed in chunks (env: ANALYSIS_MEMORY_MB)
+WORKERS = None  # processes for the per-file counts; None = all CPUs
+# =================================
+
+PERCENTAGES_CSV = "results_across_40/{model}_percentages_across_40_careers.csv"
+DIFFERENCES_CSV = "results_vs_BLS/{model}_differences_vs_bls.csv"
+CATEGORY_AVERAGES_CSV = "average_percent_diffs_per_category/{model}_averages.csv"
+CROSS_MODEL_CSV = "results_across_40/averaged_differences_vs_BLS.csv"
+INTERVALS_CSV = "confidence_intervals/{model}_intervals.csv"
+SIGNIFICANCE_DIR = "significance"
+
+
+def run(models=MODEL_LIST, out_dir=OUT_DIR, workers=WORKERS):
+    out_dir = Path(out_dir)
+    for sub in ["results_across_40", "results_vs_BLS", "average_percent_diffs_per_category",
+                "confidence_intervals"]:
+        (out_dir / sub).mkdir(parents=True, exist_ok=True)
+
+    bls = load_bls(BLS_FILE)
+
+    # 1) Per-model counts and percentages (the only step that touches the profiles)
+    counts = count_model_files(models, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=workers)
+    percentages = {model: percentage_table(c, DECIMALS) for model, c in counts.items()}
+
+    for model, df in percentages.items():
+        path = out_dir / PERCENTAGES_CSV.format(model=model)
+        df.to_csv(path, index=False, encoding="utf-8", lineterminator="\r\n")
+        print(f"Wrote {len(df)} rows to {path.relative_to(out_dir)}")
+
+        # 2) Differences vs BLS
+        diff = format_differences([differences_vs_bls(df, model, bls, source=model)])
+        path = out_dir / DIFFERENCES_CSV.format(model=model)
+        diff.to_csv(path, index=False)
+        print(f"Wrote {len(diff)} rows to {path.relative_to(out_dir)}")
+
+        # 3) Per-category averages of those differences
+        path = out_dir / CATEGORY_AVERAGES_CSV.format(model=model)
+        average_differences(diff).to_csv(path, index=False)
+        print(f"Averages saved to {path.relative_to(out_dir)}")
+
+        # 4) Confidence intervals from the same counts
+        path = out_dir / INTERVALS_CSV.format(model=model)
+        interval_table(counts[model], bls).to_csv(path, index=False)
+        print(f"Wrote intervals to {path.relative_to(out_dir)}")
+
+    # 5) Cross-model averages (models not rerun contribute their existing table)
+    tables = {}
+    for path in sorted((out_dir / "results_across_40").glob("*_percentages_across_40_careers.csv")):
+        tables[path.name] = pd.read_csv(path)
+    for model, df in percentages.items():
+        tables[Path(PERCENTAGES_CSV.format(model=model)).name] = df
+    averaged = average_across_models(tables[name] for name in sorted(tables))
+    path = out_dir / CROSS_MODEL_CSV
+    averaged.to_csv(path, index=False)
+    print(f"✅ Saved averaged results to {path.relative_to(out_dir)}")
+
+    # 6) Significance tests (all models together) from the same counts
+    write_significance_tables(counts, bls, out_dir / SIGNIFICANCE_DIR)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,76 @@
+"""
+Race percentages under every way of counting multi-race profiles, side by side.
+
+    race_policies/race_policies.csv   per model, occupation and policy: the
+                                      denominator n, p_white, p_black, p_asian,
+                                      p_hispanic, p_mixed and their total
+
+Policies (common/demographics.py):
+    any_mention     every race a profile names (results_across_40; can total > 100)
+    fractional      1/k toward each of a profile's k races
+    single_only     single-race profiles only, as a share of single-race profiles
+    mixed_category  single-race profiles by race, 2+ races as "mixed"
+
+All of them come from the same 16-bin race-mask histogram per (model,
+occupation), counted once.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.crosstab import crosstab_tensor
+from common.demographics import POLICIES, RACE_CATEGORIES, policy_counts
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "race_policies"
+DECIMALS = 2
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file counts; None = all CPUs
+# =================================
+
+POLICIES_CSV = "race_policies.csv"
+
+
+def policy_table(models, occupations, hist, decimals: int = DECIMALS) -> pd.DataFrame:
+    """hist of shape (models, occupations, 16) -> one row per (model, occupation, policy)."""
+    counts, n = policy_counts(hist)                                   # (M, O, P, 5), (M, O, P)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100 * counts / n[..., None]
+    m, o, p = np.meshgrid(np.arange(len(models)), np.arange(len(occupations)), np.arange(len(POLICIES)),
+                          indexing="ij")
+    df = pd.DataFrame({
+        "model": np.asarray(models)[m.ravel()],
+        "occupation": np.asarray(occupations)[o.ravel()],
+        "policy": np.asarray(POLICIES)[p.ravel()],
+        "n": n.ravel().round().astype(np.int64),
+        **{f"p_{c}": pct[..., i].ravel() for i, c in enumerate(RACE_CATEGORIES)},
+    })
+    df["total"] = df[[f"p_{c}" for c in RACE_CATEGORIES]].sum(axis=1)
+    present = np.repeat(hist.sum(axis=-1).ravel() > 0, len(POLICIES))
+    df = df[present].reset_index(drop=True)
+    df["occupation"] = df["occupation"].str.title()
+    return df.round(decimals)
+
+
+def write_table(models, occupations, joint, out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    df = policy_table(models, occupations, joint.sum(axis=2))
+    df.to_csv(out_dir / POLICIES_CSV, index=False)
+    print(f"Wrote {len(df)} rows to {out_dir / POLICIES_CSV}")
+
+
+def main():
+    models, occupations, joint = crosstab_tensor(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB,
+                                                 workers=WORKERS)
+    write_table(models, occupations, joint)
+
+
+if __name__ == "__main__":
+    main()
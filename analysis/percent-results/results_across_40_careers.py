@@ -1,86 +1,29 @@
-import os
-import csv
-import re
-import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import PROFILES_DIR, MODELS
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import count_models
 
 # ======== CONFIGURE THIS ========
-DIR_PATH = "../profiles/mistral"  # <-- change to your folder
-OUTPUT_CSV = "results_across_40/mistral_percentages_across_40_careers.csv"
+MODEL_LIST = MODELS  # e.g. ["mistral"] to redo a single model
+OUTPUT_DIR = "results_across_40"
 DECIMALS = 1
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # files bigger than this (once parsed) are streamed in chunks (env: ANALYSIS_MEMORY_MB)
+WORKERS = None  # processes for the per-file counts; None = all CPUs
 # =================================
 
-RACES = ["white", "black", "asian", "hispanic"]
-RACE_SPLIT_RE = re.compile(r"\s*(?:,|/|;|\s+and\s+)\s*", flags=re.IGNORECASE)
-
-def canonicalize_occupation(filename: str) -> str:
-    """
-    Convert 'buildinginspectorprofile_mistral.csv' → 'buildinginspector'
-    """
-    stem = os.path.splitext(os.path.basename(filename))[0]
-    # Strip the fixed suffix if present
-    if stem.endswith("profile_mistral"):
-        stem = stem.replace("profile_mistral", "")
-    # Clean up leftover underscores or hyphens
-    stem = re.sub(r"[_\-]+$", "", stem).strip()
-    return stem
-
-def extract_races(cell: str):
-    if not isinstance(cell, str) or not cell.strip():
-        return set()
-    parts = RACE_SPLIT_RE.split(cell.strip().lower())
-    return {p for p in parts if p in RACES}
-
-def pct(n, d):
-    if d == 0:
-        return 0.0
-    return round(100.0 * n / d, DECIMALS)
-
-def process_file(path: str):
-    try:
-        df = pd.read_csv(path, encoding="utf-8")
-    except UnicodeDecodeError:
-        df = pd.read_csv(path, encoding="cp1252")
-
-    cols = {c.lower(): c for c in df.columns}
-    gender_col = cols["gender"]
-    eth_col = cols["ethnicity"]
-
-    total_rows = len(df)
-    gender_series = df[gender_col].astype(str).str.strip().str.lower()
-    n_female = (gender_series == "female").sum()
-
-    race_counts = {r: 0 for r in RACES}
-    for val in df[eth_col]:
-        races = extract_races(val)
-        for r in races:
-            race_counts[r] += 1
-
-    return {
-        "p_women": pct(n_female, total_rows),
-        "p_white": pct(race_counts["white"], total_rows),
-        "p_black": pct(race_counts["black"], total_rows),
-        "p_asian": pct(race_counts["asian"], total_rows),
-        "p_hispanic": pct(race_counts["hispanic"], total_rows),
-    }
-
 def main():
-    rows = []
-    for entry in sorted(os.listdir(DIR_PATH)):
-        if entry.startswith(".") or not entry.lower().endswith(".csv"):
-            continue
-        path = os.path.join(DIR_PATH, entry)
-        occupation = canonicalize_occupation(entry)
-        metrics = process_file(path)
-        rows.append({"occupation": occupation, **metrics})
-
-    header = ["occupation", "p_women", "p_white", "p_black", "p_asian", "p_hispanic"]
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=header)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-
-    print(f"Wrote {len(rows)} rows to {OUTPUT_CSV}")
+    # Race/gender counts come from common.demographics: each ethnicity label is
+    # decoded once into a race bitmask and the rows are counted with bincount
+    results = count_models(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB,
+                           decimals=DECIMALS, workers=WORKERS)
+
+    for model, df in results.items():
+        output_csv = f"{OUTPUT_DIR}/{model}_percentages_across_40_careers.csv"
+        df.to_csv(output_csv, index=False, encoding="utf-8", lineterminator="\r\n")
+        print(f"Wrote {len(df)} rows to {output_csv}")
 
 if __name__ == "__main__":
     main()
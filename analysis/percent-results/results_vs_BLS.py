@@ -50,6 +50,45 @@ def extract_model_name(filename):
     suffix = "_percentages_across_40_careers.csv"
     return base[: -len(suffix)] if base.endswith(suffix) else os.path.splitext(base)[0]
 
+def differences_vs_bls(df, model_name, bls, source="model table"):
+    """Per-occupation percentage-point differences (model − BLS) for one model."""
+    if "occupation" not in df.columns:
+        raise ValueError(f"{source} must contain an 'occupation' column.")
+    missing_demo = [c for c in DEMO_COLS if c not in df.columns]
+    if missing_demo:
+        raise ValueError(f"{source} missing columns: {missing_demo}")
+
+    df = clean_occ(df.copy(), "occupation")
+    df = ensure_numeric(df, DEMO_COLS)
+    df = df[["occupation"] + DEMO_COLS]
+
+    merged = df.merge(bls, on="occupation", how="left", validate="many_to_one")
+
+    if merged[[f"bls_{c}" for c in DEMO_COLS]].isna().any().any():
+        missing = merged[merged[f"bls_{DEMO_COLS[0]}"].isna()]["occupation"].unique()
+        raise ValueError(f"BLS baselines missing for occupations in {source}: {missing}")
+
+    # Differences in percentage points: BLS − model
+    diff = pd.DataFrame()
+    diff["occupation"] = merged["occupation"]
+    diff["model_name"] = model_name
+    for c in DEMO_COLS:
+        diff[f"diff_{c}"] = merged[c] - merged[f"bls_{c}"]
+    return diff
+
+def format_differences(out_rows):
+    """Combine per-model difference tables into the published layout."""
+    out = pd.concat(out_rows, ignore_index=True)
+    out["occupation"] = out["occupation"].str.title()  # optional prettify
+
+    cols = ["occupation", "model_name"] + [f"diff_{c}" for c in DEMO_COLS]
+    out = out[cols]
+
+    # 🔹 Round numeric columns to 2 decimal places
+    for c in [f"diff_{col}" for col in DEMO_COLS]:
+        out[c] = out[c].round(2)
+    return out
+
 def main():
     if not os.path.exists(BLS_FILE):
         raise FileNotFoundError(f"Missing required file: {BLS_FILE}")
@@ -64,41 +103,9 @@ def main():
     for path in model_files:
         model_name = extract_model_name(path)
         df = pd.read_csv(path)
+        out_rows.append(differences_vs_bls(df, model_name, bls, source=path))
 
-        if "occupation" not in df.columns:
-            raise ValueError(f"{path} must contain an 'occupation' column.")
-        missing_demo = [c for c in DEMO_COLS if c not in df.columns]
-        if missing_demo:
-            raise ValueError(f"{path} missing columns: {missing_demo}")
-
-        df = clean_occ(df, "occupation")
-        df = ensure_numeric(df, DEMO_COLS)
-        df = df[["occupation"] + DEMO_COLS]
-
-        merged = df.merge(bls, on="occupation", how="left", validate="many_to_one")
-
-        if merged[[f"bls_{c}" for c in DEMO_COLS]].isna().any().any():
-            missing = merged[merged[f"bls_{DEMO_COLS[0]}"].isna()]["occupation"].unique()
-            raise ValueError(f"BLS baselines missing for occupations in {path}: {missing}")
-
-        # Differences in percentage points: BLS − model
-        diff = pd.DataFrame()
-        diff["occupation"] = merged["occupation"]
-        diff["model_name"] = model_name
-        for c in DEMO_COLS:
-            diff[f"diff_{c}"] = merged[c] - merged[f"bls_{c}"]
-
-        out_rows.append(diff)
-
-    out = pd.concat(out_rows, ignore_index=True)
-    out["occupation"] = out["occupation"].str.title()  # optional prettify
-
-    cols = ["occupation", "model_name"] + [f"diff_{c}" for c in DEMO_COLS]
-    out = out[cols]
-
-    # 🔹 Round numeric columns to 2 decimal places
-    for c in [f"diff_{col}" for col in DEMO_COLS]:
-        out[c] = out[c].round(2)
+    out = format_differences(out_rows)
 
     out.to_csv(OUT_FILE, index=False)
     print(f"Wrote {OUT_FILE} with {len(out)} rows from {len(model_files)} model file(s).")
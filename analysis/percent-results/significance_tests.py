@@ -0,0 +1,158 @@
+"""
+Significance tests for every percentage in results_across_40 / results_vs_BLS.
+
+All models are tested together from their (model x occupation x category)
+count tensor, and q-values are Benjamini-Hochberg adjusted over the whole
+table:
+
+    significance/vs_bls.csv       each model vs BLS, per occupation and category:
+                                  exact binomial test (p_value / q_value) and
+                                  Pearson chi-square (chi2 / p_chi2 / q_chi2).
+                                  "Average" rows test the mean over occupations
+                                  (what the dotplots show on top) with a normal test.
+    significance/model_pairs.csv  every pair of models, per occupation and
+                                  category: two-proportion z-test (plus
+                                  "Average" rows for the occupation means).
+
+The dotplots read q_value from vs_bls.csv.
+"""
+import sys
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import count_model_files
+from common.intervals import CATEGORIES, category_counts
+from common.significance import (bh_adjust, binomial_test, chisquare_test, mean_share_difference_test,
+                                 mean_share_test, two_proportion_test)
+
+from results_vs_BLS import load_bls
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "significance"
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes for the per-file counts; None = all CPUs
+# =================================
+
+VS_BLS_CSV = "vs_bls.csv"
+MODEL_PAIRS_CSV = "model_pairs.csv"
+
+
+def count_tensor(counts):
+    """
+    {model: [(occupation, DemographicCounts)]} -> (models, occupations,
+    k of shape (models, occupations, 5), n of shape (models, occupations));
+    occupations a model lacks get n = 0.
+    """
+    models = list(counts)
+    occupations = sorted({occ for file_counts in counts.values() for occ, _ in file_counts})
+    index = {occ: i for i, occ in enumerate(occupations)}
+    joint = np.zeros((len(models), len(occupations), 2, 16), dtype=np.int64)
+    for m, model in enumerate(models):
+        for occ, c in counts[model]:
+            joint[m, index[occ]] += c.joint
+    return models, occupations, category_counts(joint), joint.sum(axis=(2, 3))
+
+
+def _long(models, occupations, values):
+    """(models, occupations + Average, 5) arrays -> long-format columns."""
+    labels = ["Average"] + [occ.title() for occ in occupations]
+    m, o, c = np.meshgrid(np.arange(len(models)), np.arange(len(labels)), np.arange(len(CATEGORIES)),
+                          indexing="ij")
+    out = pd.DataFrame({
+        "model": np.asarray(models)[m.ravel()],
+        "occupation": np.asarray(labels)[o.ravel()],
+        "category": np.asarray(CATEGORIES)[c.ravel()],
+    })
+    for name, v in values.items():
+        out[name] = np.asarray(v, dtype=float).ravel()
+    return out
+
+
+def vs_bls_table(counts, bls):
+    models, occupations, k, n = count_tensor(counts)
+    p0 = (bls.set_index("occupation").reindex(occupations)[[f"bls_p_{c}" for c in CATEGORIES]]
+          .to_numpy(dtype=float) / 100)[None]                                   # (1, occ, 5)
+    n_cells = np.broadcast_to(n[:, :, None], k.shape).astype(float)
+
+    p_exact = binomial_test(k, n_cells, p0)
+    chi2, p_chi2 = chisquare_test(k, n_cells, p0)
+    avg_diff, p_avg = mean_share_test(k, n_cells, p0)                           # (models, 5)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100 * k / n_cells
+    avg_pct = np.nanmean(np.where(n_cells > 0, pct, np.nan), axis=1)
+
+    def with_average(avg, cells):
+        return np.concatenate([np.asarray(avg, dtype=float)[:, None], cells], axis=1)
+
+    p0_pct = np.broadcast_to(100 * p0, k.shape)
+    df = _long(models, occupations, {
+        "n": with_average(n_cells.sum(axis=1), n_cells),
+        "count": with_average(k.sum(axis=1), k),
+        "pct": with_average(avg_pct, pct),
+        "bls_pct": with_average(np.nanmean(np.where(n_cells > 0, p0_pct, np.nan), axis=1), p0_pct),
+        "diff": with_average(100 * avg_diff, pct - p0_pct),
+        "p_value": with_average(p_avg, p_exact),
+        "chi2": with_average(np.full(avg_diff.shape, np.nan), chi2),
+        "p_chi2": with_average(np.full(avg_diff.shape, np.nan), p_chi2),
+    })
+    df = df[df["n"] > 0].reset_index(drop=True)   # occupations a model has no profiles for
+    df["q_value"] = bh_adjust(df["p_value"].to_numpy())
+    df["q_chi2"] = bh_adjust(df["p_chi2"].to_numpy())
+    df[["n", "count"]] = df[["n", "count"]].astype(np.int64)
+    df[["pct", "bls_pct", "diff"]] = df[["pct", "bls_pct", "diff"]].round(2)
+    return df[["model", "occupation", "category", "n", "count", "pct", "bls_pct", "diff",
+               "p_value", "q_value", "chi2", "p_chi2", "q_chi2"]]
+
+
+def model_pairs_table(counts):
+    models, occupations, k, n = count_tensor(counts)
+    pairs = list(combinations(range(len(models)), 2))
+    a, b = np.array([i for i, _ in pairs], dtype=int), np.array([j for _, j in pairs], dtype=int)
+    n_cells = np.broadcast_to(n[:, :, None], k.shape).astype(float)
+
+    # (pairs, occupations, 5) in one shot
+    diff, p = two_proportion_test(k[a], n_cells[a], k[b], n_cells[b])
+    avg_diff, p_avg = mean_share_difference_test(k[a], n_cells[a], k[b], n_cells[b])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = 100 * k / n_cells
+
+    names = [f"{models[i]}|{models[j]}" for i, j in pairs]
+    df = _long(names, occupations, {
+        "pct_a": np.concatenate([np.nanmean(np.where(n_cells[a] > 0, pct[a], np.nan), axis=1)[:, None],
+                                 pct[a]], axis=1),
+        "pct_b": np.concatenate([np.nanmean(np.where(n_cells[b] > 0, pct[b], np.nan), axis=1)[:, None],
+                                 pct[b]], axis=1),
+        "diff": 100 * np.concatenate([avg_diff[:, None], diff], axis=1),
+        "p_value": np.concatenate([p_avg[:, None], p], axis=1),
+    })
+    df = df[df["p_value"].notna()].reset_index(drop=True)
+    df["q_value"] = bh_adjust(df["p_value"].to_numpy())
+    df[["model_a", "model_b"]] = df.pop("model").str.split("|", expand=True)
+    df[["pct_a", "pct_b", "diff"]] = df[["pct_a", "pct_b", "diff"]].round(2)
+    return df[["model_a", "model_b", "occupation", "category", "pct_a", "pct_b", "diff", "p_value", "q_value"]]
+
+
+def write_tables(counts, bls, out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    for name, df in [(VS_BLS_CSV, vs_bls_table(counts, bls)), (MODEL_PAIRS_CSV, model_pairs_table(counts))]:
+        df.to_csv(out_dir / name, index=False)
+        print(f"Wrote {len(df)} rows to {out_dir / name}")
+
+
+def main():
+    bls = load_bls(BLS_FILE)
+    counts = count_model_files(MODEL_LIST, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_tables(counts, bls)
+
+
+if __name__ == "__main__":
+    main()
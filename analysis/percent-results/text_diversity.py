@@ -0,0 +1,51 @@
+"""
+How templated the generated motivations and biographies are.
+
+One row per (model, occupation, text column) in
+text_diversity/text_diversity.csv: exact duplicate share, distinct-1/2/3
+ratios, a self-BLEU-style overlap, zlib compression ratio and unigram entropy
+(see common/diversity.py). All ratios except duplicate_pct use the same
+SAMPLE_SIZE texts per file, so cells of different sizes compare fairly.
+Lower distinct-n / compression ratio / entropy and higher self_overlap mean
+more repetition.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # analysis/
+from common.profile_reader import MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.diversity import TEXT_COLS, diversity_table
+
+# ======== CONFIGURE THIS ========
+MODEL_LIST = MODELS
+OUTPUT_DIR = "text_diversity"
+SAMPLE_SIZE = 1000   # texts per file
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None       # processes for the per-file metrics; None = all CPUs
+# =================================
+
+TEXT_DIVERSITY_CSV = "text_diversity.csv"
+METRICS = ["duplicate_pct", "distinct_1", "distinct_2", "distinct_3", "self_overlap", "compression_ratio",
+           "unigram_entropy"]
+
+
+def write_table(df, out_dir=OUTPUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(exist_ok=True)
+    df = df.copy()
+    df["occupation"] = df["occupation"].str.title()
+    df[METRICS] = df[METRICS].round(4)
+    df.to_csv(out_dir / TEXT_DIVERSITY_CSV, index=False)
+    print(f"Wrote {len(df)} rows to {out_dir / TEXT_DIVERSITY_CSV}")
+    return df
+
+
+def main():
+    df = write_table(diversity_table(MODEL_LIST, PROFILES_DIR, cols=TEXT_COLS, sample_size=SAMPLE_SIZE,
+                                     memory_mb=MEMORY_LIMIT_MB, workers=WORKERS))
+    print(df.groupby(["model", "column"])[METRICS].mean().round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
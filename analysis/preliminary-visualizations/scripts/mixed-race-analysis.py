@@ -1,105 +1,108 @@
 import pandas as pd
 import os
-import plotly.graph_objects as go
+import sys
+from pathlib import Path
 
-# Directory containing the GenAI CSVs
-genai_dir = "../profiles/openai/csvs/"
+try:
+    import plotly.graph_objects as go
+except ImportError:  # the CSV tables are still written without plotly
+    go = None
 
-# Path to the BLS baselines file (which has one row per ethnicity per career)
-baseline_path = "../profiles/openai/bls-baselines.csv"
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import MASK_POPCOUNT, N_MASKS, RACES, count_model_files, mask_label
 
-# Read the BLS baseline data: expect columns like
-#   genai_bias_search_term | ethnicity | percent
-baselines_data = pd.read_csv(baseline_path, encoding="cp1252")
+# Models to include (one column each in the rendered table)
+models = MODELS
 
-mixed_data = []
+# Files bigger than this (once parsed) are streamed in chunks
+memory_limit_mb = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
 
-for career_profiles in os.listdir(genai_dir):
-    if not career_profiles.lower().endswith(".csv"):
-        continue
+# Processes used for the per-file loop (None = all CPUs)
+workers = None
 
-    # 1) Read GenAI‐generated CSV
-    genai_path = os.path.join(genai_dir, career_profiles)
-    genai_data = pd.read_csv(genai_path, encoding="cp1252")
-
-    # 2) Extract “career_term” from filename
-    career_term = os.path.basename(career_profiles).split("profiles_openai.csv")[0]
-
-    # 3) Compute GenAI mixed‐race % by counting commas in each “ethnicity” string
-    if "ethnicity" not in genai_data.columns:
-        continue
-    genai_eth = genai_data["ethnicity"].fillna("").str.lower()
-    genai_mixed_count = genai_eth.str.contains(",", regex=False).sum()
-    genai_total = len(genai_eth)
-    genai_mixed_pct = (
-        round((genai_mixed_count / genai_total) * 100, 1)
-        if genai_total > 0 else 0.0
-    )
+# Where the tables go
+output_dir = "mixed_race_tables"
 
-    # 4) Filter the BLS baseline rows for this career
-    career_baseline = baselines_data[
-        baselines_data["genai_bias_search_term"] == career_term
-    ]
-    career_baseline = (
-      career_baseline[["p_white","p_black","p_asian","p_hispanic"]]
-        .rename(columns=lambda c: c.replace("p_",""))  # drop the "p_" prefix
-        .melt(var_name="ethnicity", value_name="percent")
-    )
-    # If there is no baseline entry or no “percent” column, assume 0% mixed
-    if career_baseline.empty or "percent" not in career_baseline.columns:
-        baseline_mixed_pct = 0.0
-    else:
-        # Sum the per‐ethnicity percents for this career
-        total_baseline_pct = career_baseline["percent"].sum()
-        # Any amount over 100% is “extra counts,” interpreted as mixed‐race
-        baseline_mixed_pct = round(max(0, total_baseline_pct - 100), 1)
-        
-    mixed_data.append({
-        "career": career_term,
-        "percent_mixed_genai":     genai_mixed_pct,
-        "percent_mixed_baseline":  baseline_mixed_pct
-    })
-
-# 5) Build a DataFrame and sort by career
-mixed_df = pd.DataFrame(mixed_data).sort_values("career")
-
-fig = go.Figure(data=[
-    go.Table(
-        header=dict(
-            values=[
-                "Career",
-                "GenAI – % Mixed Race",
-                "BLS Baseline – % Mixed Race"
-            ],
-            fill_color="lightgrey",
-            align="left",
-            font=dict(size=18)            # ← header font size
-        ),
-        cells=dict(
-            values=[
-                mixed_df["career"],
-                mixed_df["percent_mixed_genai"],
-                mixed_df["percent_mixed_baseline"]
-            ],
-            align="left",
-            font=dict(size=14)            # ← cell font size
+# Every ethnicity label is decoded once into a 4-bit race mask (common/demographics.py),
+# so "White, Hispanic", "Hispanic/White" and "HispanicWhite" are the same combination
+# and a row is mixed race when its mask has 2+ bits set
+MASK_LABELS = [mask_label(m) for m in range(N_MASKS)]
+
+
+def mask_distribution(counts):
+    """One row per (model, occupation, race mask): profiles and % of the file."""
+    records = []
+    for model, file_counts in counts.items():
+        for occupation, c in file_counts:
+            hist = c.hist
+            for mask in range(N_MASKS):
+                records.append({
+                    "model": model,
+                    "career": occupation,
+                    "mask": mask,
+                    "races": MASK_LABELS[mask],
+                    "n_races": int(MASK_POPCOUNT[mask]),
+                    "count": int(hist[mask]),
+                    "percent": round(100 * hist[mask] / c.n, 2) if c.n else 0.0,
+                })
+    return pd.DataFrame(records)
+
+
+def bls_mixed_percent(path=BLS_FILE):
+    """BLS race percents add up to more than 100 when people report several races; the excess is mixed."""
+    bls = pd.read_csv(path)
+    total = bls[[f"p_{r}" for r in RACES]].apply(pd.to_numeric, errors="coerce").sum(axis=1)
+    return pd.Series((total - 100).clip(lower=0).round(1).to_numpy(), index=bls["genai_bias_search_term"])
+
+
+def mixed_table(distribution, bls_mixed):
+    """% mixed race per career (rows) and model (columns), plus the BLS baseline."""
+    mixed = distribution[distribution["n_races"] >= 2]
+    table = (mixed.groupby(["career", "model"])["percent"].sum()
+                  .unstack("model").reindex(columns=models).round(1))
+    table["BLS"] = bls_mixed.reindex(table.index).fillna(0.0)
+    return table.sort_index()
+
+
+def render(table, path):
+    header = ["Career"] + [f"{m} – % Mixed Race" for m in models] + ["BLS Baseline – % Mixed Race"]
+    fig = go.Figure(data=[
+        go.Table(
+            header=dict(values=header, fill_color="lightgrey", align="left", font=dict(size=18)),
+            cells=dict(values=[table.index] + [table[c] for c in table.columns], align="left",
+                       font=dict(size=14)),
         )
+    ])
+    fig.update_layout(
+        title_text="Mixed-Race % by Career (GenAI vs. BLS Baseline)",
+        title_x=0.5,
+        margin=dict(t=60, b=20, l=20, r=20)
     )
-])
+    fig.write_image(path, width=1400, height=1200)
 
-fig.update_layout(
-    title_text="Mixed-Race % by Career (GenAI vs. BLS Baseline)",
-    title_x=0.5,
-    margin=dict(t=60, b=20, l=20, r=20)
-)
 
-fig.show()
+def main():
+    # One pass over every model's files on a process pool: each file becomes a 2 x 16
+    # (female?, race mask) histogram
+    counts = count_model_files(models, PROFILES_DIR, memory_mb=memory_limit_mb, workers=workers)
 
+    distribution = mask_distribution(counts)
+    table = mixed_table(distribution, bls_mixed_percent())
+
+    os.makedirs(output_dir, exist_ok=True)
+    distribution.to_csv(os.path.join(output_dir, "race_combinations.csv"), index=False)
+    table.to_csv(os.path.join(output_dir, "mixed_race_by_career.csv"))
+    print(table.to_string())
+
+    if go is None:
+        print("plotly is not installed; skipping the rendered table")
+        return
+    output_path = os.path.join(output_dir, "mixed_race_by_career.pdf")
+    render(table, output_path)
+    print(f"Saved mixed-race percentages table to {output_path}")
 
-# 7) Save as PNG
-output_dir = "mixed_race_tables"
-os.makedirs(output_dir, exist_ok=True)
-output_path = os.path.join(output_dir, "mixed_race_by_career.pdf")
-fig.write_image(output_path, width=800, height=1000)
 
-print(f"Saved mixed-race percentages table to {output_path}")
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,18 @@ from collections import Counter
 import plotly.graph_objects as go
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.profile_reader import read_profiles
 
 career_profiles = "../profiles/openai/csvs/welderprofiles_openai.csv"
 baseline_dir_path = "../profiles/openai/bls-baselines.csv"
 
 baselines_data = pd.read_csv(baseline_dir_path)
 
-genai_data = pd.read_csv(career_profiles)
+genai_data = read_profiles(career_profiles, usecols=["name", "gender", "ethnicity"])
 
 # get baseline data
 this_career_term = "welder"
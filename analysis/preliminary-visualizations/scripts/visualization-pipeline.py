@@ -1,29 +1,55 @@
 import plotly.express as px
 from wordcloud import WordCloud
-from collections import Counter
 import plotly.graph_objects as go
 import pandas as pd
 import os
-import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # analysis/
+from common.profile_reader import profile_files
+from common.chunked import ValueCounts, iter_profile_chunks, MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.names import NameSketch
+from common.parallel import parallel_map, report_failures
 
 # --- Configurable parameters ---
 model_name = "GPT 4.0"     
 model_owner = "openai"
 
 # Paths parameterized by model_owner
-dir_path = f"../profiles/{model_owner}/"
+profiles_dir = "../profiles/"
 baseline_dir_path = f"../profiles/bls-baselines.csv"
+memory_limit_mb = ANALYSIS_MEMORY_MB  # files bigger than this (once parsed) are streamed in chunks (env: ANALYSIS_MEMORY_MB)
+workers = None          # processes used for the per-career loop (None = all CPUs)
 
 baselines_data = pd.read_csv(baseline_dir_path)
 
-for career_profiles in os.listdir(dir_path):
+def visualize_career(career_file):
+  """All plots/tables for one career file; runs in a worker process."""
+  this_career_term, datapath = career_file
 
-  datapath = os.path.join(dir_path, career_profiles)
   print(datapath)
-  model_data = pd.read_csv(datapath, encoding="cp1252")
+
+  # Stream the file in chunks and keep only running counts
+  race_counts = ValueCounts()
+  gender_counts = ValueCounts()
+  names = NameSketch()
+  for model_data in iter_profile_chunks(datapath, usecols=["name", "gender", "ethnicity"], memory_mb=memory_limit_mb):
+    # merge any multi (i.e. hispanic, white) -> be included in both categories.
+    merge_races = (
+        model_data["ethnicity"]
+          .str.lower()
+          .str.split(",", expand=False)          # e.g. ["hispanic", " white"]
+          .apply(lambda lst: [x.strip() for x in lst])
+          .explode()                              # now one ethnicity per row
+      )
+    race_counts.update(merge_races.str.lower())
+    gender_counts.update(model_data["gender"].str.lower())
+
+    # Honorifics (Dr., Mr., Mrs., ...) are stripped and names split once per distinct name
+    names.update(model_data["name"])
 
   # get baseline data
-  this_career_term = career_profiles.split(f"profiles_{model_owner}.csv")[0]
   print("Generating visualizations for... " + this_career_term)
 
   this_career_baseline_df = baselines_data[baselines_data["genai_bias_search_term"] == this_career_term]
@@ -39,20 +65,11 @@ for career_profiles in os.listdir(dir_path):
 
   print("Baseline Ethnicity Data")
   print(this_career_baseline_race_df)
-      
-  # merge any multi (i.e. hispanic, white) -> be included in both categories.
-  merge_races = (
-      model_data["ethnicity"]
-        .str.lower()
-        .str.split(",", expand=False)          # e.g. ["hispanic", " white"]
-        .apply(lambda lst: [x.strip() for x in lst])  
-        .explode()                              # now one ethnicity per row
-    )
-    
+
   model_race_df = (
-        merge_races
-          .str.lower()
-          .value_counts(normalize=True)   # proportions
+        race_counts
+          .result(normalize=True)         # proportions
+          .rename_axis("ethnicity")
           .mul(100)                       # → percentages
           .reset_index(name="percent")    # make it a DF with column “percent”
           .rename(columns={"index":"ethnicity"})
@@ -85,9 +102,9 @@ for career_profiles in os.listdir(dir_path):
   print(this_career_baseline_gender_df)
 
   model_gender_df = (
-      model_data["gender"]
-        .str.lower()   
-        .value_counts(normalize=True)
+      gender_counts
+        .result(normalize=True)
+        .rename_axis("gender")
         .mul(100)
         .reset_index(name="percent")
         .rename(columns={"index":"gender"})
@@ -376,27 +393,14 @@ for career_profiles in os.listdir(dir_path):
   =============================================================
   '''
 
-  # 1. Remove common honorifics (Dr., Mr., Mrs., Ms.) at the start of the string
-  clean_names = model_data["name"].str.replace(
-      r'^(?:dr|mr|mrs|ms)\.\s*',   # match title + dot + any spaces
-      '',                          # drop it
-      flags=re.IGNORECASE,
-      regex=True
-  )
-
-  # Split full names into first/last
-  split_names = clean_names.str.split(expand=True)
-  first_names = split_names[0]
-  last_names = split_names[1]
-  first_counts = first_names.value_counts().head(5).reset_index()
+  # Top first/last names (honorifics were stripped while counting)
+  first_counts = names.top["first"].result(5)[["name", "count"]]
   first_counts.columns = ["First Name", "Count"]
-  total_first = len(first_names)
-  first_counts["Percent of Dataset"] =(first_counts["Count"] / 10000)
+  first_counts["Percent of Dataset"] = (100 * first_counts["Count"] / names.n).round(2)
 
-  last_counts = last_names.value_counts().head(5).reset_index()
+  last_counts = names.top["last"].result(5)[["name", "count"]]
   last_counts.columns = ["Last Name", "Count"]
-  total_last = len(last_names)
-  last_counts["Percent of Dataset"] =(last_counts["Count"] / 10000)
+  last_counts["Percent of Dataset"] = (100 * last_counts["Count"] / names.n).round(2)
 
   fig_first = go.Figure(data=[
     go.Table(
@@ -415,7 +419,7 @@ for career_profiles in os.listdir(dir_path):
   fig_last = go.Figure(data=[
       go.Table(
         header=dict(values=list(last_counts.columns), fill_color='lightgrey'),
-        cells=dict(values=[last_counts["Last Name"], last_counts["Count"], first_counts["Percent of Dataset"]])
+        cells=dict(values=[last_counts["Last Name"], last_counts["Count"], last_counts["Percent of Dataset"]])
     )
   ])
   fig_last.update_layout(
@@ -429,11 +433,8 @@ for career_profiles in os.listdir(dir_path):
   print(f"Saved top 5 last-name counts table for: {this_career_term}")
 
   # Word clouds
-  # 2. Flatten into a single list of first and last names
-  words = split_names.stack().tolist()
-
-  # 3. Count frequencies of each name part
-  freq = Counter(words)
+  # 2-3. Frequencies of each name part (first, middle and last)
+  freq = names.top["part"].counts.to_dict()
 
   # 4. Generate a word cloud image from frequencies
   wc = WordCloud(width=800, height=800, background_color="white")
@@ -449,3 +450,11 @@ for career_profiles in os.listdir(dir_path):
   )
   fig.write_image(f"wordcloud-{model_owner}/{this_career_term}.pdf", scale=2)
   print(f"Saved word cloud for: {this_career_term}")
+
+
+if __name__ == "__main__":
+  # One career per task; a failing career is reported instead of stopping the run
+  career_files = profile_files(model_owner, profiles_dir)
+  results = parallel_map(visualize_career, career_files, workers=workers,
+                         keys=[term for term, _ in career_files])
+  report_failures(results)
@@ -0,0 +1,373 @@
+"""
+Bring every analysis output up to date, recomputing only what changed.
+
+    python run_stages.py                      # everything that is stale
+    python run_stages.py dotplot_race         # one output and what it needs
+    python run_stages.py --dry-run            # list stale stages only
+    python run_stages.py --force bls_diffs:gemini
+
+Each stage below declares the files it reads and writes (see
+common/stages.py). If one Gemini occupation CSV gets top-up rows, only
+percentages:gemini and the stages downstream of its output (Gemini BLS
+differences, cross-model averages, dotplots) rerun. The (female, race mask)
+code of every profile is scanned once by the cell_codes stage; the
+intersectional, race_policies, divergence and convergence stages read that
+file instead of the CSVs.
+"""
+import argparse
+import sys
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+ANALYSIS_DIR = Path(__file__).resolve().parent
+PERCENT_DIR = ANALYSIS_DIR / "percent-results"
+sys.path.insert(0, str(ANALYSIS_DIR))
+sys.path.insert(0, str(PERCENT_DIR))
+
+from common.profile_reader import BLS_FILE, MODELS, PROFILES_DIR
+from common.chunked import MEMORY_LIMIT_MB as ANALYSIS_MEMORY_MB
+from common.demographics import count_model_files, count_models
+from common.names import count_model_names
+from common.distributions import load_distributions
+from common.lexicon import count_model_lexicons
+from common.diversity import diversity_table
+from common.near_duplicates import find_near_duplicates
+from common.crosstab import codes_tensor, load_codes, profile_codes, save_codes
+from common.stages import Stage, run_stages
+
+from results_vs_BLS import differences_vs_bls, format_differences, load_bls
+from average_percent_diffs_per_category import average_differences
+from avg_diffs_vs_bls import average_across_models
+from confidence_intervals import interval_table
+from significance_tests import write_tables as write_significance_tables
+from name_frequencies import write_tables as write_name_tables
+from age_salary import write_tables as write_age_salary_tables
+from lexicon_rates import load_lexicons, write_table as write_lexicon_table
+from text_diversity import SAMPLE_SIZE, write_table as write_diversity_table
+from divergence_vs_bls import divergence_table, write_tables as write_divergence_tables
+from model_agreement import load_differences, write_tables as write_agreement_tables
+from race_policies import write_table as write_race_policy_table
+from convergence import TOLERANCE, compute_from_codes as convergence_from_codes
+from convergence import write_tables as write_convergence_tables
+from intersectional import write_tables as write_intersectional_tables
+from near_duplicates import JACCARD_THRESHOLD, PERMUTATIONS, write_tables as write_near_duplicate_tables
+from biography_clusters import CLUSTERS, cluster_all, write_tables as write_cluster_tables
+
+# ======== CONFIGURE THIS ========
+ROOT = ANALYSIS_DIR.parent   # stage paths are relative to the repository root
+DECIMALS = 1
+MEMORY_LIMIT_MB = ANALYSIS_MEMORY_MB  # env: ANALYSIS_MEMORY_MB
+WORKERS = None  # processes per stage; None = ANALYSIS_WORKERS or all CPUs
+# =================================
+
+PERCENTAGES_CSV = "analysis/percent-results/results_across_40/{model}_percentages_across_40_careers.csv"
+DIFFERENCES_CSV = "analysis/percent-results/results_vs_BLS/{model}_differences_vs_bls.csv"
+CATEGORY_AVERAGES_CSV = "analysis/percent-results/average_percent_diffs_per_category/{model}_averages.csv"
+CROSS_MODEL_CSV = "analysis/percent-results/results_across_40/averaged_differences_vs_BLS.csv"
+INTERVALS_CSV = "analysis/percent-results/confidence_intervals/{model}_intervals.csv"
+SIGNIFICANCE_DIR = "analysis/percent-results/significance"
+SIGNIFICANCE_CSVS = [f"{SIGNIFICANCE_DIR}/vs_bls.csv", f"{SIGNIFICANCE_DIR}/model_pairs.csv"]
+INTERSECTIONAL_DIR = "analysis/percent-results/intersectional"
+DIVERGENCE_DIR = "analysis/percent-results/divergence"
+AGREEMENT_DIR = "analysis/percent-results/agreement"
+RACE_POLICIES_CSV = "analysis/percent-results/race_policies/race_policies.csv"
+CONVERGENCE_DIR = "analysis/percent-results/convergence"
+NAMES_DIR = "analysis/percent-results/name_frequencies"
+AGE_SALARY_DIR = "analysis/percent-results/age_salary"
+LEXICON_CSV = "analysis/percent-results/lexicon_rates/lexicon_rates.csv"
+DIVERSITY_CSV = "analysis/percent-results/text_diversity/text_diversity.csv"
+NEAR_DUPLICATES_DIR = "analysis/percent-results/near_duplicates"
+CLUSTERS_DIR = "analysis/percent-results/biography_clusters"
+CELL_CODES_NPZ = "analysis/.cache/cell_codes.npz"
+BLS_CSV = "profiles/bls-baselines.csv"
+
+COMMON_CODE = [
+    "analysis/common/profile_reader.py",
+    "analysis/common/chunked.py",
+    "analysis/common/demographics.py",
+    "analysis/common/parallel.py",
+    "analysis/common/profile_index.py",
+]
+
+
+# ----------------------------
+# Stage actions
+# ----------------------------
+def write_percentages(model):
+    df = count_models([model], PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, decimals=DECIMALS, workers=WORKERS)[model]
+    df.to_csv(ROOT / PERCENTAGES_CSV.format(model=model), index=False, encoding="utf-8", lineterminator="\r\n")
+
+
+def write_differences(model):
+    df = pd.read_csv(ROOT / PERCENTAGES_CSV.format(model=model))
+    diff = format_differences([differences_vs_bls(df, model, load_bls(BLS_FILE), source=model)])
+    diff.to_csv(ROOT / DIFFERENCES_CSV.format(model=model), index=False)
+
+
+def write_category_averages(model):
+    diff = pd.read_csv(ROOT / DIFFERENCES_CSV.format(model=model))
+    average_differences(diff).to_csv(ROOT / CATEGORY_AVERAGES_CSV.format(model=model), index=False)
+
+
+def write_intervals(model):
+    counts = count_model_files([model], PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)[model]
+    path = ROOT / INTERVALS_CSV.format(model=model)
+    path.parent.mkdir(exist_ok=True)
+    interval_table(counts, load_bls(BLS_FILE)).to_csv(path, index=False)
+
+
+def write_significance():
+    counts = count_model_files(MODELS, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_significance_tables(counts, load_bls(BLS_FILE), ROOT / SIGNIFICANCE_DIR)
+
+
+def write_cell_codes():
+    path = ROOT / CELL_CODES_NPZ
+    path.parent.mkdir(parents=True, exist_ok=True)
+    save_codes(path, profile_codes(MODELS, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS))
+
+
+def cell_tensor():
+    return codes_tensor(load_codes(ROOT / CELL_CODES_NPZ), MODELS)
+
+
+def write_intersectional():
+    models, occupations, joint = cell_tensor()
+    write_intersectional_tables(models, occupations, joint, load_bls(BLS_FILE), ROOT / INTERSECTIONAL_DIR)
+
+
+def write_divergence():
+    models, occupations, joint = cell_tensor()
+    write_divergence_tables(divergence_table(models, occupations, joint, load_bls(BLS_FILE)), ROOT / DIVERGENCE_DIR)
+
+
+def write_agreement():
+    frames = load_differences(ROOT / DIFFERENCES_CSV.rsplit("/", 1)[0])
+    write_agreement_tables(frames, ROOT / AGREEMENT_DIR)
+
+
+def write_race_policies():
+    models, occupations, joint = cell_tensor()
+    write_race_policy_table(models, occupations, joint, (ROOT / RACE_POLICIES_CSV).parent)
+
+
+def write_convergence():
+    results = convergence_from_codes(load_codes(ROOT / CELL_CODES_NPZ), MODELS, TOLERANCE)
+    write_convergence_tables(results, ROOT / CONVERGENCE_DIR)
+
+
+def write_names():
+    sketches = count_model_names(MODELS, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_name_tables(sketches, ROOT / NAMES_DIR)
+
+
+def write_age_salary():
+    dists = load_distributions(MODELS, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_age_salary_tables(dists, ROOT / AGE_SALARY_DIR)
+
+
+def write_lexicon_rates():
+    counts = count_model_lexicons(load_lexicons(), MODELS, PROFILES_DIR, memory_mb=MEMORY_LIMIT_MB,
+                                  workers=WORKERS)
+    write_lexicon_table(counts, (ROOT / LEXICON_CSV).parent)
+
+
+def write_text_diversity():
+    table = diversity_table(MODELS, PROFILES_DIR, sample_size=SAMPLE_SIZE, memory_mb=MEMORY_LIMIT_MB,
+                            workers=WORKERS)
+    write_diversity_table(table, (ROOT / DIVERSITY_CSV).parent)
+
+
+def write_near_duplicates():
+    dups = find_near_duplicates(MODELS, PROFILES_DIR, threshold=JACCARD_THRESHOLD,
+                                num_perm=PERMUTATIONS, memory_mb=MEMORY_LIMIT_MB, workers=WORKERS)
+    write_near_duplicate_tables(dups, ROOT / NEAR_DUPLICATES_DIR, PROFILES_DIR)
+
+
+def write_biography_clusters():
+    clusters = cluster_all(MODELS, PROFILES_DIR, n_clusters=CLUSTERS, workers=WORKERS)
+    write_cluster_tables(clusters, ROOT / CLUSTERS_DIR)
+
+
+def write_cross_model_average():
+    frames = [pd.read_csv(ROOT / PERCENTAGES_CSV.format(model=m)) for m in sorted(MODELS)]
+    average_across_models(frames).to_csv(ROOT / CROSS_MODEL_CSV, index=False)
+
+
+# ----------------------------
+# Stage graph
+# ----------------------------
+def build_stages():
+    stages = []
+    for m in MODELS:
+        stages += [
+            Stage(f"percentages:{m}",
+                  inputs=[f"profiles/{m}/*.csv"],
+                  outputs=[PERCENTAGES_CSV.format(model=m)],
+                  code=COMMON_CODE,
+                  action=partial(write_percentages, m),
+                  params={"decimals": DECIMALS}),
+            Stage(f"bls_diffs:{m}",
+                  inputs=[PERCENTAGES_CSV.format(model=m), BLS_CSV],
+                  outputs=[DIFFERENCES_CSV.format(model=m)],
+                  code=["analysis/percent-results/results_vs_BLS.py"],
+                  action=partial(write_differences, m)),
+            Stage(f"category_averages:{m}",
+                  inputs=[DIFFERENCES_CSV.format(model=m)],
+                  outputs=[CATEGORY_AVERAGES_CSV.format(model=m)],
+                  code=["analysis/percent-results/average_percent_diffs_per_category.py"],
+                  action=partial(write_category_averages, m)),
+            Stage(f"intervals:{m}",
+                  inputs=[f"profiles/{m}/*.csv", BLS_CSV],
+                  outputs=[INTERVALS_CSV.format(model=m)],
+                  code=COMMON_CODE + ["analysis/common/intervals.py",
+                                      "analysis/percent-results/confidence_intervals.py"],
+                  action=partial(write_intervals, m)),
+        ]
+
+    stages += [
+        Stage("cross_model_average",
+              inputs=[PERCENTAGES_CSV.format(model=m) for m in MODELS],
+              outputs=[CROSS_MODEL_CSV],
+              code=COMMON_CODE + ["analysis/percent-results/avg_diffs_vs_bls.py"],
+              action=write_cross_model_average),
+        Stage("significance",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS] + [BLS_CSV],
+              outputs=SIGNIFICANCE_CSVS,
+              code=COMMON_CODE + ["analysis/common/intervals.py", "analysis/common/glm.py",
+                                  "analysis/common/significance.py",
+                                  "analysis/percent-results/significance_tests.py"],
+              action=write_significance),
+        Stage("cell_codes",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[CELL_CODES_NPZ],
+              code=COMMON_CODE + ["analysis/common/crosstab.py"],
+              action=write_cell_codes),
+        Stage("intersectional",
+              inputs=[CELL_CODES_NPZ, BLS_CSV],
+              outputs=[f"{INTERSECTIONAL_DIR}/crosstab.csv", f"{INTERSECTIONAL_DIR}/conditional_rates.csv"],
+              code=COMMON_CODE + ["analysis/common/crosstab.py", "analysis/percent-results/intersectional.py",
+                                  "analysis/percent-results/results_vs_BLS.py"],
+              action=write_intersectional),
+        Stage("race_policies",
+              inputs=[CELL_CODES_NPZ],
+              outputs=[RACE_POLICIES_CSV],
+              code=COMMON_CODE + ["analysis/common/crosstab.py", "analysis/percent-results/race_policies.py"],
+              action=write_race_policies),
+        Stage("convergence",
+              inputs=[CELL_CODES_NPZ],
+              outputs=[f"{CONVERGENCE_DIR}/{name}" for name in ["stable_n.csv", "curves.csv", "budget.csv"]],
+              code=COMMON_CODE + ["analysis/common/crosstab.py", "analysis/common/intervals.py",
+                                  "analysis/common/convergence.py", "analysis/percent-results/convergence.py"],
+              action=write_convergence,
+              params={"tolerance": TOLERANCE}),
+        Stage("divergence",
+              inputs=[CELL_CODES_NPZ, BLS_CSV],
+              outputs=[f"{DIVERGENCE_DIR}/{name}" for name in ["divergence.csv", "by_model.csv", "by_occupation.csv"]],
+              code=COMMON_CODE + ["analysis/common/crosstab.py", "analysis/common/divergence.py",
+                                  "analysis/common/intervals.py", "analysis/percent-results/divergence_vs_bls.py",
+                                  "analysis/percent-results/results_vs_BLS.py"],
+              action=write_divergence),
+        Stage("model_agreement",
+              inputs=[DIFFERENCES_CSV.format(model="*")],
+              outputs=[f"{AGREEMENT_DIR}/{name}"
+                       for name in ["model_distances.csv", "occupation_clusters.csv", "model_outliers.csv"]],
+              code=["analysis/common/profile_reader.py", "analysis/common/agreement.py",
+                    "analysis/percent-results/model_agreement.py"],
+              action=write_agreement),
+        Stage("name_frequencies",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[f"{NAMES_DIR}/top_names.csv", f"{NAMES_DIR}/distinct_names.csv"],
+              code=COMMON_CODE + ["analysis/common/names.py", "analysis/percent-results/name_frequencies.py"],
+              action=write_names),
+        Stage("age_salary",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[f"{AGE_SALARY_DIR}/quantiles.csv", f"{AGE_SALARY_DIR}/gaps.csv"],
+              code=COMMON_CODE + ["analysis/common/distributions.py", "analysis/percent-results/age_salary.py"],
+              action=write_age_salary),
+        Stage("lexicon_rates",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[LEXICON_CSV],
+              code=COMMON_CODE + ["analysis/common/lexicon.py", "analysis/percent-results/lexicon_rates.py"],
+              action=write_lexicon_rates),
+        Stage("text_diversity",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[DIVERSITY_CSV],
+              code=COMMON_CODE + ["analysis/common/diversity.py", "analysis/percent-results/text_diversity.py"],
+              action=write_text_diversity,
+              params={"sample_size": SAMPLE_SIZE}),
+        Stage("near_duplicates",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[f"{NEAR_DUPLICATES_DIR}/cell_rates.csv", f"{NEAR_DUPLICATES_DIR}/clusters.csv"],
+              code=COMMON_CODE + ["analysis/common/diversity.py", "analysis/common/near_duplicates.py",
+                                  "analysis/percent-results/near_duplicates.py"],
+              action=write_near_duplicates,
+              params={"threshold": JACCARD_THRESHOLD, "num_perm": PERMUTATIONS}),
+        Stage("biography_clusters",
+              inputs=[f"profiles/{m}/*.csv" for m in MODELS],
+              outputs=[f"{CLUSTERS_DIR}/clusters.csv", f"{CLUSTERS_DIR}/composition.csv"],
+              code=COMMON_CODE + ["analysis/common/biography_clusters.py",
+                                  "analysis/percent-results/biography_clusters.py"],
+              action=write_biography_clusters,
+              params={"n_clusters": CLUSTERS}),
+
+        # The logistic regression preprocessing reads profiles/openai and writes
+        # output.csv next to where it is run
+        Stage("logreg_preprocessing",
+              inputs=["profiles/openai/*.csv", BLS_CSV],
+              outputs=["analysis/logistic-regression-scripts/output.csv"],
+              code=COMMON_CODE + ["analysis/logistic-regression-scripts/scripts/logistic_regression_preprocessing.py"],
+              action=["python", "scripts/logistic_regression_preprocessing.py"],
+              cwd="analysis/logistic-regression-scripts"),
+        Stage("regression_results",
+              inputs=["analysis/logistic-regression-scripts/results/preprocessed-csvs/*.csv"],
+              outputs=["analysis/logistic-regression-scripts/results/regression_results_all_models_with_methods.csv",
+                       "analysis/logistic-regression-scripts/results/regression_results_averaged_with_methods.csv"],
+              code=["analysis/common/glm.py",
+                    "analysis/logistic-regression-scripts/scripts/regression_results.py"],
+              action=["python", "scripts/regression_results.py"],
+              cwd="analysis/logistic-regression-scripts"),
+
+        # Dotplot scripts are run from analysis/ and write their PDFs + point tables there
+        Stage("dotplot_race",
+              inputs=[DIFFERENCES_CSV.format(model=m) for m in MODELS]
+                     + [INTERVALS_CSV.format(model=m) for m in MODELS] + SIGNIFICANCE_CSVS[:1] + [BLS_CSV],
+              outputs=["analysis/occupational_bias_multirace_avgTop_jitter.pdf",
+                       "analysis/occupational_bias_averages_only.pdf",
+                       "analysis/occupational_bias_multirace_avgTop_jitter_points.csv",
+                       "analysis/occupational_bias_averages_only_points.csv"],
+              code=["analysis/common/profile_reader.py", "analysis/dotplots/scripts/dotplot_race.py"],
+              action=["python", "dotplots/scripts/dotplot_race.py"],
+              cwd="analysis"),
+        Stage("dotplot_gender",
+              inputs=[DIFFERENCES_CSV.format(model=m) for m in MODELS]
+                     + [INTERVALS_CSV.format(model=m) for m in MODELS] + SIGNIFICANCE_CSVS[:1],
+              outputs=["analysis/occupational_bias_women_avgTop_jitter.pdf",
+                       "analysis/occupational_bias_women_averages_only.pdf"],
+              code=["analysis/common/profile_reader.py", "analysis/dotplots/scripts/dotplot_gender.py"],
+              action=["python", "dotplots/scripts/dotplot_gender.py"],
+              cwd="analysis"),
+    ]
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("targets", nargs="*", help="stage names (default: all)")
+    parser.add_argument("--force", action="store_true", help="rerun the selected stages even if fresh")
+    parser.add_argument("--dry-run", action="store_true", help="only list stages that would run")
+    parser.add_argument("--list", action="store_true", help="list stage names and exit")
+    args = parser.parse_args()
+
+    stages = build_stages()
+    if args.list:
+        for s in stages:
+            print(s.name)
+        return
+    run_stages(stages, ROOT, targets=args.targets or None, force=args.force, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
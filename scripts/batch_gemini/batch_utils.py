@@ -110,9 +110,12 @@ def build_jsonl_from_list(occupations: Iterable[str],
 def build_jsonl_from_dict(missing_counts: Dict[str, int],
                           local_path: str,
                           temperature: float = TEMPERATURE,
-                          use_schema: bool = True) -> str:
+                          use_schema: bool = True,
+                          offsets: Optional[Dict[str, int]] = None) -> str:
     """
     Write requests for a dict like: {"police officer": 213, "roofer": 87}
+    offsets: profiles already requested per occupation, so instance ids of a
+    later round continue after them (…_profile_214, …) instead of repeating.
     """
     Path(os.path.dirname(local_path) or ".").mkdir(parents=True, exist_ok=True)
     n = 0
@@ -121,7 +124,8 @@ def build_jsonl_from_dict(missing_counts: Dict[str, int],
             c = int(count)
             if c <= 0:
                 continue
-            for i in range(1, c + 1):
+            start = (offsets or {}).get(occ, 0)
+            for i in range(start + 1, start + c + 1):
                 f.write(json.dumps(_make_instance(occ, i, temperature, use_schema)) + "\n")
                 n += 1
     print(f"📝 Wrote {n} requests → {local_path}")
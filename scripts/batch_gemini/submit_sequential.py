@@ -0,0 +1,169 @@
+# submit_sequential.py — sequential (early-stopping) version of submit_batch.py
+#
+# Instead of per_occupation requests for every occupation in one batch, submit
+# one batch per round: after each round the downloaded results are recounted
+# and only occupations whose percentages are still uncertain get another
+# ROUND_SIZE requests (stopping rule in scripts/sequential.py). Re-running the
+# script resumes from the results already in VERTEX_OUT_DIR. Occupations that get
+# no new results in a round are not requested again, and the run stops after
+# MAX_ROUNDS rounds in total. The job of the latest round is kept in STATE_FILE
+# until its results are downloaded, so a re-run first collects a round that was
+# interrupted (or whose download failed) instead of planning on counts missing it.
+# When it finishes, run to_csv.py as usual (it reads every round's predictions).
+import os
+import sys
+import json
+from pathlib import Path
+import batch_utils as bu
+import to_csv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # scripts/
+import sequential
+
+occupations = [
+    # list of occupations
+]
+
+ROUND_SIZE = sequential.ROUND_SIZE
+MIN_PER_OCCUPATION = sequential.MIN_PER_OCCUPATION
+MAX_PER_OCCUPATION = 10000
+TARGET_HALF_WIDTH_PP = sequential.TARGET_HALF_WIDTH_PP
+MAX_ROUNDS = sequential.MAX_ROUNDS
+# Compare against another model's profiles instead of BLS, e.g.
+# "../../profiles/openai/{career}profiles_openai.csv" (None = against BLS)
+REFERENCE_PATTERN = None
+
+VERTEX_OUT_DIR = to_csv.VERTEX_OUT_DIR
+STATE_FILE = "requests/sequential_state.json"   # requests already made per occupation (keeps instance ids unique)
+
+#change everything below this point to fit the project
+GCS_INPUT_URI = os.getenv("INPUT_GCS_URI", "gs://my-gemini-input-bucket-1/demographic_requests_round{round}.jsonl")
+GCS_OUTPUT_DIR = os.getenv("OUTPUT_GCS_DIR", "gs://my-gemini-output-bucket-1/gemini_demographic_results/")
+PROJECT_ID = os.getenv("PROJECT_ID", "gen-lang-client-0808814869")
+REGION = os.getenv("REGION", "us-central1")
+MODEL_ID = os.getenv("MODEL_ID", "gemini-2.5-pro")
+JOB_IDS_DIR = "job_ids"
+FAILED_JOB_STATES = {"JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+
+def career_key(occupation: str) -> str:
+    # Same key to_csv derives from instance ids ("police officer" -> "policeofficer")
+    return ''.join(ch for ch in occupation if ch.isalpha()).lower()
+
+
+def count_downloaded(vertex_dir: str = VERTEX_OUT_DIR) -> dict:
+    """{career key: CategoryCounts} over every round downloaded so far."""
+    counts = {}
+    for path in to_csv.find_prediction_files(vertex_dir):
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                parsed = to_csv.parse_line(raw)
+                if parsed is None:
+                    continue
+                key, data = parsed
+                counts.setdefault(key, sequential.CategoryCounts()).update(data.get("gender", ""),
+                                                                           data.get("ethnicity", ""))
+    return counts
+
+
+def load_state() -> dict:
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {"round": 0, "requested": {}, "pending_job": None}
+
+
+def save_state(state: dict):
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def collect_pending_round(state: dict) -> bool:
+    """
+    Download the results of the last submitted round if that has not happened
+    yet. Returns False while its job has no results, so that no new round is
+    planned without them. A job that failed is dropped, and the next round is
+    planned from what was actually downloaded.
+    """
+    job_name = state.get("pending_job")
+    if not job_name:
+        return True
+    job_state = getattr(bu.get_job(job_name, PROJECT_ID, REGION).state, "name", "")
+    if job_state in FAILED_JOB_STATES:
+        print(f"Round {state['round']} ({job_name}) ended as {job_state}; planning the next round without it.")
+    elif bu.download_results(job_name, VERTEX_OUT_DIR, PROJECT_ID, REGION) is None:
+        return False
+    state["pending_job"] = None
+    save_state(state)
+    return True
+
+
+def main():
+    Path("requests").mkdir(exist_ok=True)
+    Path(JOB_IDS_DIR).mkdir(exist_ok=True)
+    state = load_state()
+    if not collect_pending_round(state):
+        print(f"Round {state['round']} ({state['pending_job']}) has no results yet; "
+              "re-run this script once the job has finished.")
+        return
+
+    references = None
+    if REFERENCE_PATTERN:
+        references = {occ: sequential.count_csv(REFERENCE_PATTERN.format(career=career_key(occ)))
+                      for occ in occupations}
+
+    counts, plan, stalled = None, {}, set()
+    while True:
+        downloaded = count_downloaded()
+        previous = counts
+        counts = {occ: downloaded.get(career_key(occ), sequential.CategoryCounts()) for occ in occupations}
+        if previous is not None:
+            stalled |= sequential.stalled_occupations(previous, counts, plan)
+        plan = sequential.plan_round(counts, references, ROUND_SIZE, MIN_PER_OCCUPATION,
+                                     MAX_PER_OCCUPATION, TARGET_HALF_WIDTH_PP, skip=stalled)
+        round_no = state["round"] + 1
+        sequential.print_round(round_no, counts, plan, references, stalled)
+        if not plan:
+            break
+        if round_no > MAX_ROUNDS:
+            print(f"Reached MAX_ROUNDS ({MAX_ROUNDS}); not submitting round {round_no} for the "
+                  f"{len(plan)} occupation(s) still uncertain.")
+            break
+
+        # Build, upload and submit this round's JSONL
+        local_jsonl = f"requests/demographic_requests_round{round_no}.jsonl"
+        bu.build_jsonl_from_dict(plan, local_jsonl, offsets=state["requested"])
+        gcs_input_uri = GCS_INPUT_URI.format(round=round_no)
+        bu.upload_to_gcs(local_jsonl, gcs_input_uri)
+        job = bu.submit_batch(
+            gcs_input_uri=gcs_input_uri,
+            gcs_output_prefix=GCS_OUTPUT_DIR,
+            project_id=PROJECT_ID,
+            region=REGION,
+            model_id=MODEL_ID,
+            display_name=f"gemini-demographic-round{round_no}"
+        )
+        with open(os.path.join(JOB_IDS_DIR, f"round{round_no}_job_id.txt"), "w") as f:
+            f.write(job.resource_name)
+
+        state["round"] = round_no
+        state["pending_job"] = job.resource_name
+        for occ, k in plan.items():
+            state["requested"][occ] = state["requested"].get(occ, 0) + k
+        save_state(state)
+
+        # Next round's counts need this round's results
+        job.wait()
+        if not collect_pending_round(state):
+            print("Round did not succeed; re-run this script to resume (it downloads this round's "
+                  "results before planning another).")
+            return
+
+    total = sum(state["requested"].values())
+    print(f"Finished after {state['round']} round(s), {total} requests in total "
+          f"(fixed budget: {MAX_PER_OCCUPATION * len(occupations)}). Run to_csv.py next.")
+    if stalled:
+        print(f"No new results for: {', '.join(sorted(stalled))}; check the job output and re-run to retry them.")
+
+if __name__ == "__main__":
+    main()
@@ -81,13 +81,46 @@ def find_instance_id(obj: dict) -> str:
             return iid2
     return "unknown"
 
+def find_prediction_files(vertex_dir: str = VERTEX_OUT_DIR) -> list:
+    files = glob.glob(os.path.join(vertex_dir, "**", "*.jsonl"), recursive=True)
+    # Prefer the main predictions.jsonl if present (incrementals can be partial/empty)
+    main_preds = [p for p in files if os.path.basename(p) == "predictions.jsonl"]
+    return main_preds if main_preds else files
+
+def parse_line(raw: str):
+    """(career key, parsed profile dict) for one output line, or None if it can't be used."""
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+    except Exception:
+        return None
+
+    # Get text payload from either 'response' or 'predictions'
+    text = ""
+    if "response" in obj:
+        text = extract_text_from_response_obj(obj["response"])
+    elif "predictions" in obj or "prediction" in obj:
+        text = extract_text_from_predictions_list(obj.get("predictions") or obj.get("prediction"))
+    else:
+        # unknown shape; skip
+        return None
+
+    if not text:
+        return None
+
+    # Parse the model's JSON text (fenced or loose)
+    try:
+        data = best_effort_json(text)
+    except Exception:
+        return None
+    return career_key_from_instance_id(find_instance_id(obj)), data
+
 def main():
     Path(CSV_OUT_DIR).mkdir(parents=True, exist_ok=True)
 
-    files = glob.glob(os.path.join(VERTEX_OUT_DIR, "**", "*.jsonl"), recursive=True)
-    # Prefer the main predictions.jsonl if present (incrementals can be partial/empty)
-    main_preds = [p for p in files if os.path.basename(p) == "predictions.jsonl"]
-    files = main_preds if main_preds else files
+    files = find_prediction_files(VERTEX_OUT_DIR)
 
     print(f"Found {len(files)} JSONL files in {VERTEX_OUT_DIR}")
     if not files:
@@ -101,35 +134,15 @@ def main():
         print(f"Reading: {path}")
         with open(path, "r", encoding="utf-8") as f:
             for raw in f:
-                line = raw.strip()
-                if not line:
+                if not raw.strip():
                     continue
                 total_lines += 1
                 file_total += 1
 
-                try:
-                    obj = json.loads(line)
-                except Exception:
-                    continue
-
-                # Get text payload from either 'response' or 'predictions'
-                text = ""
-                if "response" in obj:
-                    text = extract_text_from_response_obj(obj["response"])
-                elif "predictions" in obj or "prediction" in obj:
-                    text = extract_text_from_predictions_list(obj.get("predictions") or obj.get("prediction"))
-                else:
-                    # unknown shape; skip
-                    continue
-
-                if not text:
-                    continue
-
-                # Parse the model's JSON text (fenced or loose)
-                try:
-                    data = best_effort_json(text)
-                except Exception:
+                parsed = parse_line(raw)
+                if parsed is None:
                     continue
+                key, data = parsed
 
                 # Normalize ethnicity to CSV-friendly string
                 eth = data.get("ethnicity", "")
@@ -148,9 +161,6 @@ def main():
                     data.get("biography",""),
                 ]
 
-                iid = find_instance_id(obj)
-                key = career_key_from_instance_id(iid)
-
                 out_path = os.path.join(CSV_OUT_DIR, f"{key}_gemini.csv")
                 if key not in writers:
                     fh = open(out_path, "a", newline="", encoding="utf-8")
@@ -2,9 +2,24 @@ from openai import OpenAI
 import csv
 import time
 import json
+import sys
+from pathlib import Path
 import utils
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # scripts/
+import sequential
+
 # Code to synchronously generate 1,000 profiles via DeepSeek for 40 career terms.
+
+# Sequential mode: generate in rounds and stop each career once its percentages are
+# known to +- sequential.TARGET_HALF_WIDTH_PP (see scripts/sequential.py), instead of
+# a fixed PER_CAREER profiles each
+SEQUENTIAL = False
+PER_CAREER = 1000
+# Compare against another model's profiles instead of BLS, e.g.
+# "../../profiles/openai/{career}profiles_openai.csv" (None = against BLS)
+REFERENCE_PATTERN = None
+
 career_list = [
     # "chiefexecutiveofficer",
     # "computer programmer",
@@ -51,11 +66,10 @@ career_list = [
 
 csv_headers = ["name", "age", "gender", "ethnicity", "salary", "motivations", "biography"]
 
-for career_term in career_list:
-    filename = career_term.replace(" ", "")
-    with open(f"../../profiles/deepseek/{filename}_deepseek.csv", mode="a", newline="") as file:
+def generate_profiles(career_term, count):
+    with open(profiles_path(career_term), mode="a", newline="") as file:
         writer = csv.writer(file)
-        for i in range(1000):  
+        for i in range(count):
             try:
                 response = utils.get_response(f"Generate a profile for: {career_term}").choices[0].message.content
                 result = json.loads(response.strip())
@@ -76,4 +90,20 @@ for career_term in career_list:
                     print(result)
             except Exception as e: 
                 print("Error loading:")
-                print(e)
\ No newline at end of file
+                print(e)
+
+
+def profiles_path(career_term):
+    return f"../../profiles/deepseek/{career_term.replace(' ', '')}_deepseek.csv"
+
+
+if SEQUENTIAL:
+    reference = None
+    if REFERENCE_PATTERN:
+        reference = lambda c: sequential.count_csv(REFERENCE_PATTERN.format(career=c.replace(" ", "")))
+    sequential.run_rounds(career_list, generate_profiles,
+                          count=lambda c: sequential.count_csv(profiles_path(c)),
+                          reference=reference, max_n=PER_CAREER)
+else:
+    for career_term in career_list:
+        generate_profiles(career_term, PER_CAREER)
@@ -0,0 +1,158 @@
+# sequential.py — early-stopping ("sequential") sampling shared by the generation scripts
+#
+# Instead of a fixed number of profiles per occupation, generate in rounds:
+# after each round, recount every occupation's profiles and only keep going
+# for the ones whose estimates are still too uncertain.
+#
+# An occupation is done when, for every category (% women, % white, % black,
+# % asian, % hispanic), the 95% interval half-width is <= TARGET_HALF_WIDTH_PP:
+#   - against BLS: BLS is a fixed number, so this is the occupation's own interval
+#   - between models: pass the other model's counts as `reference`; the width is
+#     then that of the difference between the two models' percentages
+# Occupations always get at least MIN_PER_OCCUPATION and never more than
+# MAX_PER_OCCUPATION profiles. An occupation that gains no rows in a round (API
+# outage, bad key, every response failing to parse) is dropped from later rounds,
+# and a run never goes past MAX_ROUNDS. Races are multi-label (a "White, Hispanic"
+# profile counts toward both) and decoded by the analysis' own extract_races
+# (analysis/common/demographics.py), so both always agree.
+import csv
+import math
+import sys
+from pathlib import Path
+from typing import Callable, Collection, Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "analysis"))
+from common.demographics import RACES, extract_races  # analysis/common/demographics.py
+
+CATEGORIES = ["women"] + RACES
+CSV_HEADERS = ["name", "age", "gender", "ethnicity", "salary", "motivations", "biography"]
+
+Z = 1.96                      # 95% intervals
+TARGET_HALF_WIDTH_PP = 2.0    # stop once every category is known to +- this many percentage points
+ROUND_SIZE = 500              # profiles per occupation per round
+MIN_PER_OCCUPATION = 500
+MAX_PER_OCCUPATION = 10000
+MAX_ROUNDS = 20               # stop after this many rounds even if some occupations are still uncertain
+
+
+class CategoryCounts:
+    """Profiles seen for one occupation and how many count toward each category."""
+
+    def __init__(self):
+        self.n = 0
+        self.k = [0] * len(CATEGORIES)
+
+    def update(self, gender, ethnicity):
+        if isinstance(ethnicity, (list, tuple)):
+            ethnicity = ",".join(str(e) for e in ethnicity)
+        races = extract_races(ethnicity)
+        self.n += 1
+        self.k[0] += str(gender).strip().lower() == "female"
+        for i, race in enumerate(RACES, start=1):
+            self.k[i] += race in races
+        return self
+
+    def merge(self, other: "CategoryCounts"):
+        self.n += other.n
+        self.k = [a + b for a, b in zip(self.k, other.k)]
+        return self
+
+    def variances(self):
+        """Variance of each category's share (Agresti-Coull adjusted, so 0% / 100% still count as uncertain)."""
+        return [((k + 2) / (self.n + 4)) * (1 - (k + 2) / (self.n + 4)) / (self.n + 4) for k in self.k]
+
+
+def count_csv(path) -> CategoryCounts:
+    """Counts for one profile CSV (with or without a header row); empty if the file does not exist yet."""
+    counts = CategoryCounts()
+    if not Path(path).exists():
+        return counts
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.reader(f):
+            if len(row) < 4 or row[0] == CSV_HEADERS[0]:
+                continue
+            counts.update(row[2], row[3])
+    return counts
+
+
+def half_widths(counts: CategoryCounts, reference: Optional[CategoryCounts] = None):
+    """95% half-width (percentage points) per category, vs BLS (reference=None) or vs another model's counts."""
+    ref = reference.variances() if reference is not None and reference.n else [0.0] * len(CATEGORIES)
+    return [100 * Z * math.sqrt(v + r) for v, r in zip(counts.variances(), ref)]
+
+
+def is_settled(counts: CategoryCounts, reference: Optional[CategoryCounts] = None,
+               target: float = TARGET_HALF_WIDTH_PP) -> bool:
+    return max(half_widths(counts, reference)) <= target
+
+
+def plan_round(counts: Dict[str, CategoryCounts],
+               references: Optional[Dict[str, CategoryCounts]] = None,
+               round_size: int = ROUND_SIZE,
+               min_n: int = MIN_PER_OCCUPATION,
+               max_n: int = MAX_PER_OCCUPATION,
+               target: float = TARGET_HALF_WIDTH_PP,
+               skip: Collection[str] = ()) -> Dict[str, int]:
+    """{occupation: profiles to request next round}; occupations that are done (or in `skip`) are left out."""
+    plan = {}
+    for occ, c in counts.items():
+        if occ in skip:
+            continue
+        if c.n < min_n:
+            plan[occ] = min_n - c.n
+        elif c.n < max_n and not is_settled(c, (references or {}).get(occ), target):
+            plan[occ] = min(round_size, max_n - c.n)
+    return plan
+
+
+def stalled_occupations(before: Dict[str, CategoryCounts], after: Dict[str, CategoryCounts],
+                        plan: Dict[str, int]) -> set:
+    """Occupations that were requested last round but gained no profiles."""
+    return {occ for occ in plan if after[occ].n <= before[occ].n}
+
+
+def print_round(round_no: int, counts: Dict[str, CategoryCounts], plan: Dict[str, int],
+                references: Optional[Dict[str, CategoryCounts]] = None, stalled: Collection[str] = ()):
+    print(f"--- Round {round_no}: {len(plan)} of {len(counts)} occupations still uncertain, "
+          f"{sum(plan.values())} profiles requested")
+    for occ, c in counts.items():
+        widest = max(half_widths(c, (references or {}).get(occ))) if c.n else float("inf")
+        status = f"+{plan[occ]}" if occ in plan else "STALLED (no new profiles)" if occ in stalled else "done"
+        print(f"    {occ:<32} n={c.n:<6} widest +-{widest:5.1f} pp  {status}")
+
+
+def run_rounds(occupations: Iterable[str],
+               generate: Callable[[str, int], None],
+               count: Callable[[str], CategoryCounts],
+               reference: Optional[Callable[[str], CategoryCounts]] = None,
+               round_size: int = ROUND_SIZE,
+               min_n: int = MIN_PER_OCCUPATION,
+               max_n: int = MAX_PER_OCCUPATION,
+               target: float = TARGET_HALF_WIDTH_PP,
+               max_rounds: int = MAX_ROUNDS) -> Dict[str, CategoryCounts]:
+    """
+    Synchronous driver: generate(occupation, k) appends k profiles, count(occupation)
+    recounts what has been saved so far. Profiles already on disk count, so an
+    interrupted run picks up where it stopped. Occupations that gain nothing in a
+    round are not asked again, and at most `max_rounds` rounds run.
+    """
+    occupations = list(occupations)
+    references = {occ: reference(occ) for occ in occupations} if reference else None
+    counts = {occ: count(occ) for occ in occupations}
+    stalled = set()
+    for round_no in range(1, max_rounds + 1):
+        plan = plan_round(counts, references, round_size, min_n, max_n, target, skip=stalled)
+        print_round(round_no, counts, plan, references, stalled)
+        if not plan:
+            break
+        for occ, k in plan.items():
+            generate(occ, k)
+        previous, counts = counts, {occ: count(occ) for occ in occupations}
+        stalled |= stalled_occupations(previous, counts, plan)
+    else:
+        remaining = plan_round(counts, references, round_size, min_n, max_n, target, skip=stalled)
+        print(f"Stopped after MAX_ROUNDS ({max_rounds}) rounds; {len(remaining)} occupation(s) still uncertain: "
+              f"{', '.join(remaining) or '-'}")
+    if stalled:
+        print(f"No new profiles for: {', '.join(sorted(stalled))} (see the errors above); re-run to retry them.")
+    return counts